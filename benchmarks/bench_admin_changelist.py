@@ -0,0 +1,117 @@
+"""
+Transaction admin changelist: the previous ModelAdmin vs the large-table one.
+
+Creates a throwaway test database with --users users and --rows
+transactions, runs ANALYZE, and requests the changelist as a superuser
+with each admin registered in turn: the first page, a filter, a search by
+username and a search by description.
+
+    python benchmarks/bench_admin_changelist.py --rows 300000
+"""
+import argparse
+import datetime
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib import admin  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import clear_url_caches  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+
+from tracker.admin import ShardedModelAdmin, TransactionAdmin  # noqa: E402
+from tracker.models import Category, Transaction  # noqa: E402
+
+
+class BaselineTransactionAdmin(ShardedModelAdmin):
+    list_display = ('user', 'transaction_type', 'amount', 'currency', 'category', 'date', 'payment_method')
+    list_filter = ('transaction_type', 'date', 'payment_method', 'currency')
+    search_fields = ('description', 'user__username')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+URLS = (
+    ('first page', ''),
+    ('filter by type', '?transaction_type__exact=expense'),
+    ('search username', '?q=user7'),
+    ('search description', '?q=Groceries'),
+)
+
+
+def timed(client, query, repeat):
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.get('/admin/tracker/transaction/' + query)
+            timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return min(timings), len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        users = [
+            User.objects.create_user(f'user{i}', f'user{i}@example.com', 'bench-password')
+            for i in range(args.users)
+        ]
+        categories = [
+            Category.objects.for_user(user).create(user=user, name='Food', category_type='expense')
+            for user in users
+        ]
+        for start in range(0, args.rows, 20000):
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user=users[i % args.users], category=categories[i % args.users], amount='12.50',
+                    transaction_type='expense' if i % 3 else 'income',
+                    date=datetime.date(2020, 1, 1) + datetime.timedelta(days=i % 1800),
+                    description=('Groceries' if i % 7 == 0 else 'Coffee') + f' #{i}',
+                )
+                for i in range(start, min(start + 20000, args.rows))
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        client = Client()
+        client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'bench-password'))
+
+        results = {}
+        for label, admin_class in (('baseline', BaselineTransactionAdmin), ('large-table', TransactionAdmin)):
+            admin.site._registry[Transaction] = admin_class(Transaction, admin.site)
+            # admin.site.urls binds the ModelAdmin instances when the URLconf is imported
+            importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+            clear_url_caches()
+            results[label] = [timed(client, query, args.repeat) for _, query in URLS]
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"rows: {args.rows:,}   users: {args.users}")
+    print(f"{'':<20}{'baseline':>22}{'large-table':>22}")
+    for (name, _), before, after in zip(URLS, results['baseline'], results['large-table']):
+        print(f"{name:<20}{before[0] * 1000:>10.1f} ms {before[1]:>3} q {after[0] * 1000:>10.1f} ms {after[1]:>3} q")
+
+
+if __name__ == '__main__':
+    main()
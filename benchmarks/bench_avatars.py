@@ -0,0 +1,72 @@
+"""
+Avatar thumbnails: bytes sent per page and time to generate them.
+
+Builds a phone-sized JPEG (--width x --height, with detail and noise so
+it compresses like a photo). Times ``avatars.render()`` against decoding
+it at full size, and compares the original's bytes with the thumbnails the
+sidebar (48px, 2x = 96) and the profile page (80px, 2x = 160) now use.
+
+    python benchmarks/bench_avatars.py --width 4032 --height 3024
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from PIL import Image, ImageOps  # noqa: E402
+
+from tracker.avatars import render  # noqa: E402
+
+
+def photo(width, height):
+    noise = Image.effect_noise((width, height), 40)
+    detail = Image.effect_mandelbrot((width, height), (-2.0, -1.2, 0.8, 1.2), 64)
+    gradient = Image.linear_gradient('L').resize((width, height))
+    buffer = io.BytesIO()
+    Image.merge('RGB', (detail, Image.blend(gradient, noise, 0.5), gradient)).save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    original = photo(args.width, args.height)
+
+    def full_decode():
+        with Image.open(io.BytesIO(original)) as image:
+            return ImageOps.fit(image.convert('RGB'), (160, 160), Image.Resampling.LANCZOS)
+
+    naive, _ = timed(full_decode, args.repeat)
+    drafted, thumbnails = timed(lambda: render(io.BytesIO(original)), args.repeat)
+
+    print(f"original: {args.width}x{args.height} JPEG, {len(original) / 1024:,.0f} KiB")
+    print(f"full decode + one resize: {naive * 1000:7.1f} ms")
+    print(f"render() all thumbnails:  {drafted * 1000:7.1f} ms  ({len(thumbnails)} files)")
+    for (size, extension), content in sorted(thumbnails.items()):
+        print(f"  {size:>3}px {extension:<4} {len(content) / 1024:7.1f} KiB")
+    for page, sizes in (('sidebar', (48, 96)), ('profile', (96, 160))):
+        webp = sum(len(thumbnails[size, 'webp']) for size in sizes) / 2
+        print(f"{page}: {len(original) / 1024:,.0f} KiB -> {webp / 1024:.1f} KiB (WebP, mean of 1x/2x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Finding duplicate transactions: pairwise self-join vs the fingerprint index.
+
+Creates a throwaway test database with --users users holding --rows
+transactions between them, about --duplicate-rate of which repeat an
+earlier row within a few days, then times:
+- a self-join pairing rows of the same user, type, amount, currency,
+  payment method and description within the window (no fingerprint);
+- find_duplicates' grouped query on (user, fingerprint, date);
+- the per-insert lookup create_transaction makes.
+
+    python benchmarks/bench_duplicates.py --rows 200000
+"""
+import argparse
+import datetime
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker import duplicates  # noqa: E402
+from tracker.models import Transaction  # noqa: E402
+
+
+MERCHANTS = ['Starbucks', 'Uber', 'Rent', 'Grocery store', 'Pharmacy', 'Cinema', 'Fuel', 'Bookshop']
+
+SELF_JOIN = """
+    SELECT COUNT(*) FROM tracker_transaction a JOIN tracker_transaction b
+      ON a.user_id = b.user_id AND a.amount = b.amount AND a.transaction_type = b.transaction_type
+     AND a.currency = b.currency AND a.payment_method = b.payment_method AND a.description = b.description
+     AND a.id < b.id AND ABS(julianday(a.date) - julianday(b.date)) <= %s
+"""
+
+
+def populate(users, rows, duplicate_rate):
+    rng = random.Random(42)
+    start = datetime.date(2020, 1, 1)
+    batch = []
+    for _ in range(rows):
+        if batch and rng.random() < duplicate_rate:
+            original = rng.choice(batch[-500:])
+            row = Transaction(
+                user=original.user, transaction_type='expense', amount=original.amount,
+                date=original.date + datetime.timedelta(days=rng.randrange(3)),
+                description=original.description.upper(), payment_method=original.payment_method,
+            )
+        else:
+            row = Transaction(
+                user=rng.choice(users), transaction_type='expense',
+                amount=f'{rng.randrange(100, 50000) / 100:.2f}',
+                date=start + datetime.timedelta(days=rng.randrange(1800)),
+                description=f'{rng.choice(MERCHANTS)} {rng.randrange(1000)}',
+                payment_method=rng.choice(['cash', 'card']),
+            )
+        batch.append(row)
+        if len(batch) == 5000:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    Transaction.objects.bulk_create(batch)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        users = [User.objects.create_user(f'bench{i}', password='bench-password') for i in range(args.users)]
+        populate(users, args.rows, args.duplicate_rate)
+
+        with connection.cursor() as cursor:
+            join_time, _ = timed(lambda: cursor.execute(SELF_JOIN, [settings.TRACKER_DUPLICATE_WINDOW]))
+            pairs = cursor.fetchone()[0]
+        grouped_time, _ = timed(lambda: call_command('find_duplicates', '--limit', '0', stdout=io.StringIO()))
+
+        samples = list(Transaction.objects.values_list('user_id', 'fingerprint', 'date')[:args.lookups])
+        lookup_time, _ = timed(lambda: [duplicates.find(*sample) for sample in samples])
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"transactions: {args.rows:,}, users: {args.users}, window: {settings.TRACKER_DUPLICATE_WINDOW} days")
+    print(f"pairwise self-join:   {join_time * 1000:9.1f} ms  ({pairs:,} exact pairs; misses case/punctuation)")
+    print(f"find_duplicates:      {grouped_time * 1000:9.1f} ms")
+    print(f"insert-time lookup:   {lookup_time / len(samples) * 1000:9.3f} ms/transaction")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Transactions page render time with cold vs warm fragment caches.
+
+Creates a throwaway test database with one user and --rows transactions,
+then requests /transactions/ through the test client: once right after a
+data version bump (everything rendered) and --repeat times with the cached
+sidebar, dropdown data and transaction rows reused.
+
+    python benchmarks/bench_fragment_cache.py --rows 2000
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+
+from tracker.fragments import bump  # noqa: E402
+from tracker.models import Category, Transaction  # noqa: E402
+
+
+def timed(client):
+    start = time.perf_counter()
+    response = client.get('/transactions/')
+    assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+        category = Category.objects.for_user(user).create(user=user, name='Food', category_type='expense')
+        Transaction.objects.for_user(user).bulk_create([
+            Transaction(
+                user=user, category=category, amount='12.50', transaction_type='expense',
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+                description=f'Transaction {i}',
+            )
+            for i in range(args.rows)
+        ])
+
+        client = Client()
+        client.force_login(user)
+        timed(client)  # warm template loading and the session
+
+        cold = []
+        for _ in range(args.repeat):
+            bump(user.pk, 'categories', 'transactions', 'profile')
+            cold.append(timed(client))
+        warm = [timed(client) for _ in range(args.repeat)]
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"rows: {args.rows:,}")
+    print(f"cold (re-rendered):  {min(cold) * 1000:8.1f} ms")
+    print(f"warm (cached):       {min(warm) * 1000:8.1f} ms")
+    print(f"\nspeedup: {min(cold) / min(warm):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Per-request cost of Idempotency-Key handling on transaction creation.
+
+Creates a throwaway test database with one user, then POSTs --requests
+transactions through the test client three ways: without the header,
+with a fresh key each time (claim + store), and retrying an already
+completed key (lookup + replay, no view).
+
+    python benchmarks/bench_idempotency.py --requests 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker.idempotency import claim, request_fingerprint  # noqa: E402
+from tracker.models import Category  # noqa: E402
+
+
+def per_request(client, data, requests, key=None):
+    start = time.perf_counter()
+    for i in range(requests):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key(i)} if key else {}
+        response = client.post('/api/transactions/create/', data, **headers)
+        assert response.status_code == 200, response.content
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+        category = Category.objects.for_user(user).create(user=user, name='Food', category_type='expense')
+        data = {
+            'transaction-type': 'expense', 'amount': '12.50', 'category': str(category.pk),
+            'date': '2024-01-01', 'description': 'Lunch',
+        }
+        client = Client()
+        client.force_login(user)
+        per_request(client, data, 50)  # warm up
+
+        plain = per_request(client, data, args.requests)
+        fresh = per_request(client, data, args.requests, key=lambda i: f'fresh-{i}')
+        replayed = per_request(client, data, args.requests, key=lambda i: 'fresh-0')
+
+        # The lookup itself, outside the request cycle
+        request = client.post('/api/transactions/create/', data).wsgi_request
+        fingerprint = request_fingerprint(request)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            claim(user, 'fresh-0', fingerprint)
+        lookup = (time.perf_counter() - start) / args.requests
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"requests: {args.requests:,}")
+    print(f"no key:              {plain * 1000:6.2f} ms/request")
+    print(f"fresh key:           {fresh * 1000:6.2f} ms/request  (+{(fresh - plain) * 1000:.2f} ms)")
+    print(f"replayed key:        {replayed * 1000:6.2f} ms/request")
+    print(f"key lookup (claim):  {lookup * 1000:6.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
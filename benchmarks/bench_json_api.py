@@ -0,0 +1,105 @@
+"""
+Transaction list JSON: per-instance dicts + stdlib json vs tracker.serializers.
+
+Creates a throwaway test database with one user and --rows transactions,
+then builds the same list payload two ways:
+
+    baseline   model instances with select_related, float()/strftime() and a
+               convert() call per row, encoded by django.http.JsonResponse
+    streamed   transaction_rows() (.values(), conversion in SQL) encoded in
+               batches by StreamingJsonResponse, orjson if installed
+
+    python benchmarks/bench_json_api.py --rows 20000
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.http import JsonResponse  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker.currency import convert  # noqa: E402
+from tracker.models import Category, Transaction  # noqa: E402
+from tracker.serializers import StreamingJsonResponse, _orjson  # noqa: E402
+from tracker.views import transaction_rows  # noqa: E402
+
+
+def baseline(user, currency):
+    transactions = Transaction.objects.for_user(user).select_related('category').order_by('-date', '-created_at')
+    data = [
+        {
+            'id': str(t.id),
+            'date': t.date.strftime('%Y-%m-%d'),
+            'type': t.transaction_type,
+            'category': t.category.name if t.category else '',
+            'description': t.description,
+            'amount': float(t.amount),
+            'currency': t.currency,
+            'converted_amount': float(convert(t.amount, t.currency, currency, t.date)),
+            'payment_method': t.get_payment_method_display(),
+        }
+        for t in transactions
+    ]
+    return JsonResponse(data, safe=False).content
+
+
+def streamed(user, currency):
+    transactions = Transaction.objects.for_user(user).order_by('-date', '-created_at')
+    return b''.join(StreamingJsonResponse(transaction_rows(transactions, currency)).streaming_content)
+
+
+def best(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+        category = Category.objects.for_user(user).create(user=user, name='Food', category_type='expense')
+        Transaction.objects.for_user(user).bulk_create([
+            Transaction(
+                user=user, category=category, amount='12.50', transaction_type='expense',
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+                description=f'Transaction {i}',
+            )
+            for i in range(args.rows)
+        ], batch_size=2000)
+
+        currency = user.profile.currency
+        slow, slow_size = best(baseline, args.repeat, user, currency)
+        fast, fast_size = best(streamed, args.repeat, user, currency)
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"rows: {args.rows:,}   encoder: {'orjson' if _orjson() else 'json'}")
+    print(f"baseline:  {slow * 1000:8.1f} ms  {slow_size:>12,} bytes")
+    print(f"streamed:  {fast * 1000:8.1f} ms  {fast_size:>12,} bytes")
+    print(f"\nspeedup: {slow / fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Decimal vs integer minor-unit amount storage.
+
+Builds two in-memory SQLite tables holding the same amounts, one the way
+Django stores a DecimalField (NUMERIC, converted back per row) and one as
+integer cents (MoneyField), then times SUM() and full row decoding.
+
+    python benchmarks/bench_money.py --rows 500000
+"""
+import argparse
+import decimal
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from tracker.fields import MoneyField  # noqa: E402
+
+
+def build(rows):
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE decimal_amounts (amount decimal NOT NULL)')
+    db.execute('CREATE TABLE cents_amounts (amount bigint NOT NULL)')
+
+    random.seed(42)
+    cents = [random.randint(1, 500_000) for _ in range(rows)]
+    db.executemany(
+        'INSERT INTO decimal_amounts VALUES (?)',
+        ((str(decimal.Decimal(c).scaleb(-2)),) for c in cents)
+    )
+    db.executemany('INSERT INTO cents_amounts VALUES (?)', ((c,) for c in cents))
+    db.commit()
+    return db, sum(cents)
+
+
+def best_of(repeat, fn):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db, exact_cents = build(args.rows)
+
+    # Same conversion Django's SQLite backend applies to DecimalField values
+    create_decimal = decimal.Context(prec=15).create_decimal_from_float
+    quantize = decimal.Decimal('0.01')
+    money = MoneyField()
+
+    def decimal_sum():
+        return db.execute('SELECT SUM(amount) FROM decimal_amounts').fetchone()[0]
+
+    def cents_sum():
+        return db.execute('SELECT SUM(amount) FROM cents_amounts').fetchone()[0]
+
+    def decimal_rows():
+        return [
+            create_decimal(value).quantize(quantize)
+            for (value,) in db.execute('SELECT amount FROM decimal_amounts')
+        ]
+
+    def cents_rows():
+        return [
+            money.from_db_value(value, None, None)
+            for (value,) in db.execute('SELECT amount FROM cents_amounts')
+        ]
+
+    results = {}
+    for name, fn in [
+        ('SUM decimal', decimal_sum),
+        ('SUM cents', cents_sum),
+        ('decode decimal', decimal_rows),
+        ('decode cents', cents_rows),
+    ]:
+        results[name] = best_of(args.repeat, fn)
+
+    print(f"rows: {args.rows:,}")
+    for name, (seconds, _) in results.items():
+        print(f"{name:<16} {seconds * 1000:9.2f} ms")
+
+    print()
+    print(f"SUM speedup:    {results['SUM decimal'][0] / results['SUM cents'][0]:.2f}x")
+    print(f"decode speedup: {results['decode decimal'][0] / results['decode cents'][0]:.2f}x")
+
+    float_total = decimal.Decimal(repr(results['SUM decimal'][1]))
+    cents_total = decimal.Decimal(results['SUM cents'][1]).scaleb(-2)
+    exact_total = decimal.Decimal(exact_cents).scaleb(-2)
+    print(f"exact total:    {exact_total}")
+    print(f"decimal SUM:    {float_total} ({'exact' if float_total == exact_total else 'drifted'})")
+    print(f"cents SUM:      {cents_total} ({'exact' if cents_total == exact_total else 'drifted'})")
+
+
+if __name__ == '__main__':
+    main()
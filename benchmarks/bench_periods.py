@@ -0,0 +1,106 @@
+"""
+Monthly bucketing: date__month lookups and TruncMonth vs CalendarDay.
+
+Creates a throwaway test database with one user and --rows expenses
+spread over two years. It then times the dashboard's six-month trend two
+ways: one date__year/date__month query per month, as before, and a single
+range query grouped through CalendarDay. It also times grouping a whole
+year by month with TruncMonth and with periods.bucket().
+
+    python benchmarks/bench_periods.py --rows 200000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from django.db.models.functions import TruncMonth  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+
+from tracker.models import Category, Transaction  # noqa: E402
+from tracker.periods import bucket, trailing  # noqa: E402
+
+
+def timed(func, repeat):
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+        category = Category.objects.for_user(user).filter(category_type='expense').first()
+        today = datetime.date(2024, 6, 15)
+        rng = random.Random(1)
+        Transaction.objects.for_user(user).bulk_create((
+            Transaction(
+                user=user, category=category, transaction_type='expense', amount=rng.randrange(100, 10000),
+                currency='usd', date=today - datetime.timedelta(days=rng.randrange(730)),
+            )
+            for _ in range(args.rows)
+        ), batch_size=5000)
+        expenses = Transaction.objects.for_user(user).filter(transaction_type='expense')
+        months = trailing(today, 'month', 6)
+
+        def trend_per_month():
+            return [
+                expenses.filter(date__year=start.year, date__month=start.month).aggregate(total=Sum('amount'))['total']
+                for start, _ in months
+            ]
+
+        def trend_grouped():
+            totals = dict(
+                expenses.filter(date__gte=months[0][0], date__lt=months[-1][1]).annotate(month=bucket('month'))
+                .values('month').annotate(total=Sum('amount')).order_by().values_list('month', 'total')
+            )
+            return [totals.get(start) for start, _ in months]
+
+        year = expenses.filter(date__gte=datetime.date(2023, 1, 1), date__lt=datetime.date(2024, 1, 1))
+
+        def year_trunc():
+            return sorted(year.annotate(month=TruncMonth('date')).values('month').annotate(
+                total=Sum('amount')).order_by().values_list('month', 'total'))
+
+        def year_bucket():
+            return sorted(year.annotate(month=bucket('month')).values('month').annotate(
+                total=Sum('amount')).order_by().values_list('month', 'total'))
+
+        per_month, old = timed(trend_per_month, args.repeat)
+        grouped, new = timed(trend_grouped, args.repeat)
+        assert old == new, (old, new)
+        trunc, by_trunc = timed(year_trunc, args.repeat)
+        calendar, by_calendar = timed(year_bucket, args.repeat)
+        assert [total for _, total in by_trunc] == [total for _, total in by_calendar]
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"rows: {args.rows:,}")
+    print(f"6-month trend, date__month per month: {per_month * 1000:8.1f} ms")
+    print(f"6-month trend, one CalendarDay query: {grouped * 1000:8.1f} ms")
+    print(f"year by month, TruncMonth:            {trunc * 1000:8.1f} ms")
+    print(f"year by month, CalendarDay bucket:    {calendar * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
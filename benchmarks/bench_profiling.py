@@ -0,0 +1,85 @@
+"""
+Cost of the profiling middleware: off, sampled and profiled requests.
+
+Creates a throwaway test database with one staff user and --rows
+transactions, then GETs the dashboard --requests times through the test
+client three ways: no profiling (the check every request pays), sampling
+at 1 in --sample-rate, and profiling every request with X-Profile.
+
+    python benchmarks/bench_profiling.py --requests 500
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker.models import Category, Transaction  # noqa: E402
+
+
+def per_request(client, requests, **headers):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/dashboard/', **headers)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--sample-rate', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.TRACKER_PROFILE_DIR = tempfile.mkdtemp(prefix='bench-profiles-')
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', 'bench@example.com', 'bench-password', is_staff=True)
+        category = Category.objects.for_user(user).filter(category_type='expense').first()
+        today = datetime.date.today()
+        Transaction.objects.for_user(user).bulk_create([
+            Transaction(
+                user=user, category=category, transaction_type='expense', amount='12.50',
+                date=today - datetime.timedelta(days=i % 90), description=f'Lunch {i}',
+            )
+            for i in range(args.rows)
+        ])
+        client = Client()
+        client.force_login(user)
+        per_request(client, 20)  # warm up
+
+        settings.TRACKER_PROFILE_SAMPLE_RATE = 0
+        off = per_request(client, args.requests)
+        settings.TRACKER_PROFILE_SAMPLE_RATE = args.sample_rate
+        sampled = per_request(client, args.requests)
+        settings.TRACKER_PROFILE_SAMPLE_RATE = 0
+        profiled = per_request(client, max(1, args.requests // 10), HTTP_X_PROFILE='1')
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"requests: {args.requests:,}, transactions: {args.rows:,}")
+    print(f"profiling off:        {off * 1000:7.2f} ms/request")
+    print(f"sampled 1 in {args.sample_rate:<8,}{sampled * 1000:7.2f} ms/request  (+{(sampled - off) * 1000:.2f} ms)")
+    print(f"profiled (X-Profile): {profiled * 1000:7.2f} ms/request  (x{profiled / off:.1f})")
+
+
+if __name__ == '__main__':
+    main()
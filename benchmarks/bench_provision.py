@@ -0,0 +1,80 @@
+"""
+Provisioning a cohort: one create_user() per user vs tracker.provisioning.
+
+Creates a throwaway test database and provisions --users users with
+provision() (bulk inserts, receivers' work done in batch), after timing
+--baseline users created one at a time through create_user() and the
+post_save receivers. Neither side sets passwords; hashing is timed
+separately for --passwords passwords with --workers processes, since it
+scales with CPUs rather than with the database.
+
+    python benchmarks/bench_provision.py --users 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker.models import Category  # noqa: E402
+from tracker.provisioning import hash_passwords, provision  # noqa: E402
+
+
+def rows(prefix, count):
+    return [
+        {
+            'username': f'{prefix}{i}', 'email': f'{prefix}{i}@example.com', 'password': '',
+            'first_name': '', 'last_name': '', 'currency': 'usd', 'timezone': 'UTC',
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--baseline', type=int, default=500)
+    parser.add_argument('--passwords', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        start = time.perf_counter()
+        for row in rows('single', args.baseline):
+            User.objects.create_user(row['username'], row['email'])
+        single = (time.perf_counter() - start) / args.baseline
+
+        start = time.perf_counter()
+        created, _ = provision(rows('bulk', args.users))
+        bulk = time.perf_counter() - start
+        assert Category.objects.filter(user__username='bulk0').count() == Category.objects.filter(
+            user__username='single0').count()
+    finally:
+        runner.teardown_databases(databases)
+
+    start = time.perf_counter()
+    hash_passwords([f'password-{i}' for i in range(args.passwords)], workers=args.workers)
+    hashing = (time.perf_counter() - start) / args.passwords
+
+    print(f"users: {args.users:,}")
+    print(f"create_user() + receivers: {single * 1000:7.2f} ms/user  (~{single * args.users:.1f} s for {args.users:,})")
+    print(f"provision():               {bulk / args.users * 1000:7.2f} ms/user  ({bulk:.1f} s)")
+    print(f"password hashing:          {hashing * 1000:7.1f} ms/password with {args.workers} worker(s)"
+          f"  (~{hashing * args.users:.0f} s for {args.users:,})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Categorisation throughput: the compiled matcher vs a loop over the rules.
+
+Builds --rules unsaved rules (mostly "contains" merchant names, some
+regexes, a few with amount ranges or payment methods) and --rows
+descriptions, a --hit-rate share of which name a merchant, then matches
+every row with ``tracker.rules.Matcher`` and with a loop testing each rule
+in priority order.
+
+    python benchmarks/bench_rules.py --rules 200 --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from tracker.models import Category, CategoryRule  # noqa: E402
+from tracker.rules import Matcher  # noqa: E402
+
+
+WORDS = 'coffee lunch weekly shop fuel ticket refund online order store market monthly'.split()
+
+
+def merchant(rng):
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randrange(4, 11)))
+
+
+def make_rules(count, rng):
+    categories = [Category(id=i, name=f'c{i}', category_type='expense') for i in range(10)]
+    rules = []
+    for i in range(count):
+        rule = CategoryRule(category=categories[i % 10], match_type='contains', pattern=merchant(rng))
+        if i % 20 == 3:
+            rule.match_type, rule.pattern = 'regex', rf'\b{rule.pattern}\b'
+        if i % 10 == 5:
+            rule.min_amount = Decimal('50')
+        if i % 10 == 7:
+            rule.payment_method = 'card'
+        rules.append(rule)
+    return rules
+
+
+def make_rows(count, rules, hit_rate, rng):
+    rows = []
+    for _ in range(count):
+        words = rng.sample(WORDS, 3)
+        if rng.random() < hit_rate:
+            words.insert(1, rng.choice(rules).pattern.strip('\\b').upper())
+        rows.append((
+            'expense', rng.choice(['cash', 'card']), ' '.join(words),
+            Decimal(rng.randrange(100, 20000)) / 100,
+        ))
+    return rows
+
+
+def loop_match(rules, transaction_type, payment_method, description, amount):
+    text = description.lower()
+    for rule, search in rules:
+        if rule.category.category_type != transaction_type or rule.payment_method not in ('', payment_method):
+            continue
+        if search is None:
+            if rule.pattern.lower() not in text:
+                continue
+        elif search(description) is None:
+            continue
+        if rule.min_amount is not None and amount < rule.min_amount:
+            continue
+        if rule.max_amount is not None and amount > rule.max_amount:
+            continue
+        return rule.category_id
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--hit-rate', type=float, default=0.6)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rules = make_rules(args.rules, rng)
+    rows = make_rows(args.rows, rules, args.hit_rate, rng)
+
+    start = time.perf_counter()
+    matcher = Matcher(rules)
+    for row in rows[:100]:
+        matcher.match(*row)  # compiles the tries used
+    compile_time = time.perf_counter() - start
+    searches = [(rule, matcher.regexes.get(index)) for index, rule in enumerate(rules)]
+
+    start = time.perf_counter()
+    combined = [matcher.match(*row) for row in rows]
+    combined_time = time.perf_counter() - start
+    start = time.perf_counter()
+    looped = [loop_match(searches, *row) for row in rows]
+    loop_time = time.perf_counter() - start
+    assert combined == looped
+
+    matched = sum(category_id is not None for category_id in combined)
+    print(f"rules: {args.rules:,}, rows: {args.rows:,}, matched: {matched:,}")
+    print(f"compile matcher:        {compile_time * 1000:8.1f} ms")
+    print(f"compiled matcher:       {args.rows / combined_time:10,.0f} rows/s")
+    print(f"loop over rules:        {args.rows / loop_time:10,.0f} rows/s  (x{loop_time / combined_time:.1f} slower)")
+
+
+if __name__ == '__main__':
+    main()
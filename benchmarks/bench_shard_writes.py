@@ -0,0 +1,99 @@
+"""
+Concurrent write throughput with one SQLite file vs per-user shards.
+
+Runs --users writer threads, each inserting its own transactions and
+committing every row (like the create-transaction endpoint). In the single
+file case every writer contends for the same database lock; with shards,
+users are spread over --shards files (user_id % shards, as
+tracker.sharding places them) and only writers on the same file contend.
+
+    python benchmarks/bench_shard_writes.py --users 16 --shards 4
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.ids import uuid7  # noqa: E402
+
+
+SCHEMA = [
+    '''CREATE TABLE tracker_transaction (
+        id char(32) NOT NULL PRIMARY KEY,
+        user_id integer NOT NULL,
+        amount bigint NOT NULL,
+        date date NOT NULL
+    )''',
+    'CREATE INDEX tracker_tra_user_date ON tracker_transaction (user_id, date)',
+]
+
+
+def create(path):
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode = WAL')
+    for statement in SCHEMA:
+        db.execute(statement)
+    db.commit()
+    db.close()
+
+
+def writer(path, user_id, rows, retries):
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    for i in range(rows):
+        while True:
+            try:
+                db.execute('BEGIN IMMEDIATE')
+                break
+            except sqlite3.OperationalError:
+                retries[user_id] += 1
+        db.execute(
+            'INSERT INTO tracker_transaction VALUES (?, ?, ?, ?)',
+            (uuid7().hex, user_id, i, '2024-01-01')
+        )
+        db.execute('COMMIT')
+    db.close()
+
+
+def run(tmp, shards, users, rows):
+    paths = [os.path.join(tmp, f'{shards}_shard_{i}.sqlite3') for i in range(shards)]
+    for path in paths:
+        create(path)
+
+    retries = [0] * users
+    threads = [
+        threading.Thread(target=writer, args=(paths[user_id % shards], user_id, rows, retries))
+        for user_id in range(users)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return users * rows / elapsed, sum(retries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--rows', type=int, default=500, help='Rows per user')
+    parser.add_argument('--shards', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {count: run(tmp, count, args.users, args.rows) for count in (1, args.shards)}
+
+    print(f"users: {args.users}  rows/user: {args.rows}  (one commit per row)")
+    for count, (rate, retries) in results.items():
+        print(f"{count:2d} file(s): {rate:10,.0f} commits/s   lock retries {retries:,}")
+
+    print(f"\nthroughput {args.shards} shards/1 file: {results[args.shards][0] / results[1][0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Deleting a category in the request: Model.delete() vs soft_delete().
+
+Creates a throwaway test database with one user and a category holding
+--rows transactions, then times deleting it both ways (the hard delete
+re-nulls every linked transaction), and how long compact_deleted takes to
+do that work later in batches.
+
+    python benchmarks/bench_soft_delete.py --rows 20000
+"""
+import argparse
+import datetime
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+from tracker.models import Category, Transaction  # noqa: E402
+
+
+def category_with_rows(user, name, rows):
+    category = Category.objects.for_user(user).create(user=user, name=name, category_type='expense')
+    Transaction.objects.for_user(user).bulk_create([
+        Transaction(
+            user=user, category=category, amount='12.50', transaction_type='expense',
+            date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+        )
+        for i in range(rows)
+    ], batch_size=2000)
+    return category
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+        hard = timed(category_with_rows(user, 'Hard', args.rows).delete)
+        soft = timed(category_with_rows(user, 'Soft', args.rows).soft_delete)
+        with override_settings(TRACKER_UNDO_WINDOW=0):
+            compact = timed(lambda: call_command('compact_deleted', stdout=io.StringIO()))
+        assert not Transaction.objects.for_user(user).filter(category__isnull=False).exists()
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"linked transactions: {args.rows:,}   database: {settings.DATABASES['default']['ENGINE']}")
+    print(f"delete():            {hard * 1000:8.2f} ms  (in the request)")
+    print(f"soft_delete():       {soft * 1000:8.2f} ms  (in the request)")
+    print(f"compact_deleted:     {compact * 1000:8.2f} ms  (background, batches of 1000)")
+
+
+if __name__ == '__main__':
+    main()
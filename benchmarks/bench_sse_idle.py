@@ -0,0 +1,88 @@
+"""
+Cost of idle Server-Sent Events streams on one event loop.
+
+Opens --streams concurrent ``tracker.events.stream()`` generators (the body
+of ``/api/stream/``) spread over --users users, waits for them to sit idle,
+then publishes one event per user from a worker thread, the way a sync
+write view does. Reports memory per idle stream (tracemalloc) and how long
+the fan-out took to reach every stream.
+
+    python benchmarks/bench_sse_idle.py --streams 5000 --users 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test.utils import override_settings  # noqa: E402
+
+from tracker.events import get_broker, stream  # noqa: E402
+
+
+async def consume(user_id, ready, received):
+    body = stream(user_id)
+    await body.__anext__()  # retry: line; the stream is subscribed now
+    ready.release()
+    async for chunk in body:
+        if not chunk.startswith(':'):
+            received.append(time.perf_counter())
+            break
+    await body.aclose()
+
+
+async def run(args):
+    broker = get_broker()
+    ready = asyncio.Semaphore(0)
+    received = []
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = [
+        asyncio.create_task(consume(i % args.users, ready, received))
+        for i in range(args.streams)
+    ]
+    for _ in range(args.streams):
+        await ready.acquire()
+    await asyncio.sleep(0.5)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    per_stream = sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / args.streams
+
+    print(f"streams: {broker.subscriber_count():,} across {args.users:,} users")
+    print(f"memory per idle stream: {per_stream / 1024:.1f} KiB")
+
+    def publish_all():
+        for user_id in range(args.users):
+            broker.publish(user_id, 'totals', {'income': 0})
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=publish_all)
+    thread.start()
+    await asyncio.gather(*tasks)
+    thread.join()
+    print(f"fan-out to all streams: {(max(received) - start) * 1000:.1f} ms")
+    print(f"streams left subscribed: {broker.subscriber_count()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--streams', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    with override_settings(TRACKER_SSE_HEARTBEAT=60, TRACKER_SSE_MAX_AGE=600):
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
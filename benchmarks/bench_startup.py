@@ -0,0 +1,84 @@
+"""
+Worker cold-start cost per settings profile, from ``python -X importtime``.
+
+Each profile starts a fresh interpreter that runs django.setup() and loads
+its URLconf (what a web worker does before its first request), repeated
+--repeat times. Reports best wall time, number of modules imported, total
+import time and the heaviest project-level imports.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --top 25 --profile prod-app
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    'dev': {'DJANGO_SETTINGS_MODULE': 'finance_tracker.settings'},
+    'prod-all': {'DJANGO_SETTINGS_MODULE': 'finance_tracker.settings_production', 'TRACKER_URLCONF': 'all'},
+    'prod-app': {'DJANGO_SETTINGS_MODULE': 'finance_tracker.settings_production', 'TRACKER_URLCONF': 'app'},
+    'prod-api': {'DJANGO_SETTINGS_MODULE': 'finance_tracker.settings_production', 'TRACKER_URLCONF': 'api'},
+}
+
+STARTUP = (
+    'import django; django.setup(); '
+    'from django.urls import get_resolver; get_resolver().reverse_dict'
+)
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def run(profile):
+    env = {
+        **os.environ,
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'startup-benchmark'),
+        'TRACKER_WARMUP': 'False',
+        **PROFILES[profile],
+    }
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us), int(cumulative_us), len(indent)))
+    return elapsed, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profile', action='append', choices=PROFILES, help='Profiles to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Heaviest project imports to list')
+    args = parser.parse_args()
+
+    for profile in args.profile or PROFILES:
+        runs = [run(profile) for _ in range(args.repeat)]
+        wall = min(elapsed for elapsed, _ in runs)
+        imports = min(runs, key=lambda item: item[0])[1]
+        total_ms = sum(self_us for _, self_us, _, _ in imports) / 1000
+
+        print(f"{profile:<9} wall {wall * 1000:7.1f} ms   {len(imports):4d} modules   import {total_ms:7.1f} ms")
+        heaviest = sorted(
+            (item for item in imports if item[0].split('.')[0] in ('tracker', 'finance_tracker', 'crispy_forms', 'crispy_tailwind')
+             or item[0].startswith(('django.contrib.admin', 'django.contrib.auth.forms'))),
+            key=lambda item: item[2], reverse=True
+        )
+        for module, _, cumulative_us, _ in heaviest[:args.top]:
+            print(f"    {cumulative_us / 1000:7.1f} ms  {module}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Write throttling: other users' latency while one user floods, and check cost.
+
+Creates a throwaway file-backed test database, then runs --users normal
+users, each creating a transaction every --think seconds, three ways: on
+their own, next to --flooders threads of a single user posting creates
+back to back with throttling off, and the same with throttling on.
+Prints the normal users' p50/p95 write latency for each run, the
+flooding user's successful writes, and what one throttle check costs with
+each store.
+
+    python benchmarks/bench_throttling.py --flooders 4 --duration 10
+"""
+import argparse
+import datetime
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker import throttling  # noqa: E402
+
+
+FORM = {
+    'transaction-type': 'expense', 'amount': '12.50', 'date': datetime.date.today().isoformat(),
+    'description': 'Lunch', 'payment_method': 'cash',
+}
+
+
+def client_for(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def normal_user(user, stop, think, latencies):
+    client = client_for(user)
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = client.post('/api/transactions/create/', {**FORM, 'allow_duplicate': '1'})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+        time.sleep(think)
+    connections.close_all()
+
+
+def flooder(user, stop, counts):
+    client = client_for(user)
+    while not stop.is_set():
+        status = client.post('/api/transactions/create/', {**FORM, 'allow_duplicate': '1'}).status_code
+        counts[status] = counts.get(status, 0) + 1
+    connections.close_all()
+
+
+def run(users, flood_user, flooders, duration, think, burst):
+    settings.TRACKER_THROTTLE_BURST = burst
+    throttling.store().clear()
+    stop = threading.Event()
+    latencies, counts = [], {}
+    threads = [threading.Thread(target=normal_user, args=(user, stop, think, latencies)) for user in users]
+    threads += [threading.Thread(target=flooder, args=(flood_user, stop, counts)) for _ in range(flooders)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)], counts
+
+
+def check_cost(checks):
+    costs = {}
+    for name, store in throttling.STORES.items():
+        store.clear()
+        start = time.perf_counter()
+        for i in range(checks):
+            store.take((i % 1000, 'create_transaction'), 10 ** 9, 1.0)
+        costs[name] = (time.perf_counter() - start) / checks
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--flooders', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--think', type=float, default=0.1)
+    parser.add_argument('--checks', type=int, default=100000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    logging.getLogger('django.request').setLevel(logging.ERROR)  # one warning per 429
+    # Threads need a real file to share; the default test database is in memory
+    connections['default'].settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        users = [User.objects.create_user(f'user{i}', password='bench-password') for i in range(args.users)]
+        flood_user = User.objects.create_user('flooder', password='bench-password')
+        burst = settings.TRACKER_THROTTLE_BURST
+        results = {
+            'alone': run(users, flood_user, 0, args.duration, args.think, burst),
+            'flood, unthrottled': run(users, flood_user, args.flooders, args.duration, args.think, 0),
+            'flood, throttled': run(users, flood_user, args.flooders, args.duration, args.think, burst),
+        }
+        costs = check_cost(args.checks)
+    finally:
+        runner.teardown_databases(databases)
+
+    print(f"normal users: {args.users}, flooding threads: {args.flooders}, {args.duration:g} s per run")
+    for name, (p50, p95, counts) in results.items():
+        flood = f"  flooder: {counts.get(200, 0):,} written, {counts.get(429, 0):,} throttled" if counts else ''
+        print(f"{name:<20} p50 {p50 * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms{flood}")
+    for name, cost in costs.items():
+        print(f"throttle check ({name}): {cost * 1e6:6.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
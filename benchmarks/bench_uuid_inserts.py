@@ -0,0 +1,92 @@
+"""
+Bulk-insert throughput and index size with random vs time-ordered keys.
+
+Creates two SQLite files with the Transaction table's key layout (UUIDs
+stored as 32-char hex, plus the (user_id, date) index), fills one with
+uuid4 keys and one with uuid7 keys in batches, and reports rows/second and
+the resulting index and file sizes. A small page cache makes the run behave
+like a table much larger than memory.
+
+    python benchmarks/bench_uuid_inserts.py --rows 500000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.ids import uuid7  # noqa: E402
+
+
+SCHEMA = [
+    '''CREATE TABLE tracker_transaction (
+        id char(32) NOT NULL PRIMARY KEY,
+        user_id integer NOT NULL,
+        amount bigint NOT NULL,
+        date date NOT NULL
+    )''',
+    'CREATE INDEX tracker_tra_user_date ON tracker_transaction (user_id, date)',
+]
+
+
+def index_sizes(db):
+    """Bytes per b-tree, when SQLite was built with the dbstat table"""
+    try:
+        return dict(db.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def run(path, make_id, rows, batch_size, cache_kib):
+    db = sqlite3.connect(path)
+    db.execute(f'PRAGMA cache_size = -{cache_kib}')
+    db.execute('PRAGMA journal_mode = WAL')
+    for statement in SCHEMA:
+        db.execute(statement)
+
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        batch = [
+            (make_id().hex, rng.randint(1, 1000), rng.randint(1, 500_000), '2024-01-01')
+            for _ in range(min(batch_size, rows - offset))
+        ]
+        db.executemany('INSERT INTO tracker_transaction VALUES (?, ?, ?, ?)', batch)
+        db.commit()
+    elapsed = time.perf_counter() - start
+
+    db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    sizes = index_sizes(db)
+    db.close()
+    return rows / elapsed, sizes, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--cache-kib', type=int, default=2048)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            name: run(os.path.join(tmp, f'{name}.sqlite3'), make_id, args.rows, args.batch_size, args.cache_kib)
+            for name, make_id in [('uuid4', uuid.uuid4), ('uuid7', uuid7)]
+        }
+
+    print(f"rows: {args.rows:,}  batch: {args.batch_size}  cache: {args.cache_kib} KiB")
+    for name, (rate, sizes, file_size) in results.items():
+        pk_size = sizes.get('sqlite_autoindex_tracker_transaction_1')
+        pk = f"{pk_size / 2**20:7.1f} MiB" if pk_size else '      n/a'
+        print(f"{name}: {rate:12,.0f} rows/s   pk index {pk}   file {file_size / 2**20:7.1f} MiB")
+
+    print(f"\nthroughput uuid7/uuid4: {results['uuid7'][0] / results['uuid4'][0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Transaction ingestion: one autocommit per row vs the group-commit queue.
+
+Creates a throwaway file-backed test database (run it on a real disk, not
+tmpfs: the syncs are what is being measured), then has --clients threads
+POST --rows transactions in total to /api/transactions/create/, first
+with TRACKER_WRITE_QUEUE off and then on. Both ways a 200 is only sent
+after the row has committed. Also times the insert path without the
+HTTP layer (``save()`` vs ``writequeue.submit().result()``). Throttling is
+turned off (``TRACKER_THROTTLE_BURST = 0``): with the default limit each
+user could only create about one row a second, whichever way it is written.
+
+    python benchmarks/bench_write_queue.py --rows 2000 --clients 16
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from tracker import writequeue  # noqa: E402
+from tracker.models import Transaction  # noqa: E402
+
+
+TODAY = datetime.date.today()
+
+
+def in_threads(clients, rows, work):
+    """Run ``work(index)`` ``rows`` times over ``clients`` threads; returns rows/s"""
+    def worker(offset):
+        try:
+            for index in range(offset, rows, clients):
+                work(index)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return rows / (time.perf_counter() - start)
+
+
+def via_api(users, clients, rows):
+    local = threading.local()
+
+    def post(index):
+        user = users[index % len(users)]
+        sessions = local.__dict__.setdefault('sessions', {})
+        if user.pk not in sessions:
+            sessions[user.pk] = Client()
+            sessions[user.pk].force_login(user)
+        response = sessions[user.pk].post('/api/transactions/create/', {
+            'transaction-type': 'expense', 'amount': '12.50', 'date': TODAY.isoformat(),
+            'description': f'Feed row {index}', 'payment_method': 'card', 'allow_duplicate': '1',
+        })
+        assert response.status_code == 200, response.content
+
+    return in_threads(clients, rows, post)
+
+
+def via_model(users, clients, rows, queued):
+    def insert(index):
+        row = Transaction(
+            user=users[index % len(users)], transaction_type='expense', amount='12.50', date=TODAY,
+            description=f'Feed row {index}', payment_method='card',
+        )
+        if queued:
+            writequeue.submit(row).result()
+        else:
+            row.save()
+
+    return in_threads(clients, rows, insert)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--users', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.TRACKER_THROTTLE_BURST = 0
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    directory = tempfile.mkdtemp()
+    database = connections['default'].settings_dict
+    # Threads need a real file to share; the default test database is in memory
+    database['TEST']['NAME'] = os.path.join(directory, 'bench.sqlite3')
+    # Writers wait for the lock instead of failing while another commits
+    database['OPTIONS'] = {**database.get('OPTIONS', {}), 'timeout': 60}
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        users = [User.objects.create_user(f'feed{i}', password='bench-password') for i in range(args.users)]
+        results = {}
+        for queued in (False, True):
+            settings.TRACKER_WRITE_QUEUE = queued
+            results['api', queued] = via_api(users, args.clients, args.rows)
+            results['model', queued] = via_model(users, args.clients, args.rows, queued)
+        writequeue.write_queue.close()
+        written = Transaction.objects.count()
+    finally:
+        runner.teardown_databases(databases)
+        os.rmdir(directory)
+
+    assert written == args.rows * 4, written
+    print(f"rows: {args.rows:,} per run, client threads: {args.clients}, users: {args.users}, throttling off")
+    for path, label in (('api', 'POST /api/transactions/create/'), ('model', 'insert path only')):
+        direct, queued = results[path, False], results[path, True]
+        print(f"{label:<32} autocommit {direct:8,.0f} rows/s   queued {queued:8,.0f} rows/s  (x{queued / direct:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -53,9 +53,10 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tracker.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tracker.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'finance_tracker.urls'
@@ -64,14 +65,22 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Parsed templates are kept per worker; the dev server's
+            # autoreloader resets this cache when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'tracker.context_processors.user_categories',  
+                'tracker.context_processors.data_versions',
             ],
         },
     },
@@ -79,6 +88,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'finance_tracker.wsgi.application'
 
+# Parse templates, build URL tables and connect to the databases when the
+# app loads, so a new worker's first request is not a cold one. Enable it
+# for web workers only (it also runs for management commands).
+TRACKER_WARMUP = config('TRACKER_WARMUP', default=False, cast=bool)
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
@@ -89,6 +103,18 @@ DATABASES = {
     }
 }
 
+# Per-user sharding: user data is spread over TRACKER_SHARD_COUNT extra
+# SQLite files (see tracker/sharding.py). 0 keeps everything in 'default'.
+TRACKER_SHARD_COUNT = config('TRACKER_SHARD_COUNT', default=0, cast=int)
+
+for shard in range(TRACKER_SHARD_COUNT):
+    DATABASES[f'shard_{shard}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_shard_{shard}.sqlite3',
+    }
+
+DATABASE_ROUTERS = ['tracker.sharding.ShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -120,10 +146,44 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 STATIC_URL = 'static/'
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
 STATICFILES_DIRS = [
     BASE_DIR / 'tracker' / 'static',
 ]
 
+# Content-hashed, precompressed files at collectstatic time. Off in DEBUG
+# so development works without running collectstatic.
+TRACKER_STATIC_PIPELINE = config('TRACKER_STATIC_PIPELINE', default=not DEBUG, cast=bool)
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'tracker.storage.CompressedManifestStaticFilesStorage' if TRACKER_STATIC_PIPELINE
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Serve STATIC_ROOT (preferring .br/.gz files) from the WSGI app itself
+TRACKER_SERVE_STATIC = config('TRACKER_SERVE_STATIC', default=False, cast=bool)
+
+# User uploads (avatars)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Serve MEDIA_ROOT from the WSGI app too, with the same cache headers
+TRACKER_SERVE_MEDIA = config('TRACKER_SERVE_MEDIA', default=False, cast=bool)
+
+# Avatar uploads are limited to MAX_SIZE bytes and MAX_PIXELS pixels. Their
+# thumbnails (tracker/avatars.py) are generated on WORKERS background
+# threads per process; 0 generates them in the request instead
+TRACKER_AVATAR_MAX_SIZE = config('TRACKER_AVATAR_MAX_SIZE', default=2 * 1024 * 1024, cast=int)
+TRACKER_AVATAR_MAX_PIXELS = config('TRACKER_AVATAR_MAX_PIXELS', default=40_000_000, cast=int)
+TRACKER_AVATAR_WORKERS = config('TRACKER_AVATAR_WORKERS', default=1, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -136,3 +196,84 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'welcome'
 
+
+# Shared by rendered fragments, shard placements and rate lookups. Use a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache) when
+# running several worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='finance-tracker'),
+    }
+}
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Seconds an authenticated user (with profile) is reused per worker before
+# being re-checked against the database; 0 disables the cache
+TRACKER_AUTH_CACHE_TTL = config('TRACKER_AUTH_CACHE_TTL', default=30, cast=int)
+
+# Fragments are keyed by per-user data versions (tracker/fragments.py), so
+# this only bounds how long unused copies linger
+TRACKER_FRAGMENT_CACHE_TIMEOUT = config('TRACKER_FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Live dashboard updates over /api/stream/ (tracker/events.py); needs ASGI.
+# Streams send a keep-alive comment every HEARTBEAT seconds and close after
+# MAX_AGE so the browser reconnects and dead connections are reaped
+TRACKER_EVENT_BROKER = config('TRACKER_EVENT_BROKER', default='tracker.events.LocalBroker')
+TRACKER_SSE_HEARTBEAT = config('TRACKER_SSE_HEARTBEAT', default=15, cast=int)
+TRACKER_SSE_MAX_AGE = config('TRACKER_SSE_MAX_AGE', default=60 * 5, cast=int)
+TRACKER_SSE_QUEUE_SIZE = config('TRACKER_SSE_QUEUE_SIZE', default=100, cast=int)
+
+# JSON API responses (tracker/serializers.py) at least this many bytes are
+# gzipped for clients that send Accept-Encoding: gzip
+TRACKER_JSON_GZIP_MIN_SIZE = config('TRACKER_JSON_GZIP_MIN_SIZE', default=1024, cast=int)
+
+# Stored responses for Idempotency-Key retries (tracker/idempotency.py) are
+# replayed for TTL seconds; a concurrent duplicate waits up to WAIT seconds
+# for the first attempt to finish
+TRACKER_IDEMPOTENCY_TTL = config('TRACKER_IDEMPOTENCY_TTL', default=60 * 60 * 24, cast=int)
+TRACKER_IDEMPOTENCY_WAIT = config('TRACKER_IDEMPOTENCY_WAIT', default=5, cast=int)
+
+# Each user may send BURST requests at once to each mutating API view, and
+# RATE more per second after that (tracker/throttling.py); RATES overrides
+# them per view, e.g. "create_transaction=60/2". STORE is 'memory' (per
+# worker process) or 'cache' (shared through CACHES)
+TRACKER_THROTTLE_BURST = config('TRACKER_THROTTLE_BURST', default=30, cast=int)
+TRACKER_THROTTLE_RATE = config('TRACKER_THROTTLE_RATE', default=1.0, cast=float)
+TRACKER_THROTTLE_RATES = config('TRACKER_THROTTLE_RATES', default='')
+TRACKER_THROTTLE_STORE = config('TRACKER_THROTTLE_STORE', default='memory')
+
+# Deleted transactions and categories can be restored for at least this many
+# seconds; compact_deleted purges rows deleted longer ago
+TRACKER_UNDO_WINDOW = config('TRACKER_UNDO_WINDOW', default=60 * 60, cast=int)
+
+# A new transaction with the same fingerprint (type, amount, currency,
+# payment method, normalized description) as one within this many days is a
+# likely duplicate (tracker/duplicates.py). DUPLICATES is 'flag' to save it
+# and report the match, or 'skip' to refuse it unless allow_duplicate is sent
+TRACKER_DUPLICATE_WINDOW = config('TRACKER_DUPLICATE_WINDOW', default=3, cast=int)
+TRACKER_DUPLICATES = config('TRACKER_DUPLICATES', default='flag')
+
+# With WRITE_QUEUE on, create_transaction hands rows to a writer thread that
+# commits them in batches of up to BATCH rows, collected for up to DELAY
+# milliseconds (tracker/writequeue.py). Callers wait up to TIMEOUT seconds
+# for the commit; "Prefer: respond-async" gets 202 and a status URL instead.
+# Raise create_transaction in TRACKER_THROTTLE_RATES along with it: the
+# default limit allows about one row a second per user
+TRACKER_WRITE_QUEUE = config('TRACKER_WRITE_QUEUE', default=False, cast=bool)
+TRACKER_WRITE_QUEUE_DELAY = config('TRACKER_WRITE_QUEUE_DELAY', default=5, cast=float)
+TRACKER_WRITE_QUEUE_BATCH = config('TRACKER_WRITE_QUEUE_BATCH', default=500, cast=int)
+TRACKER_WRITE_QUEUE_TIMEOUT = config('TRACKER_WRITE_QUEUE_TIMEOUT', default=10, cast=float)
+
+# Request profiles (tracker/profiling.py) are written to PROFILE_DIR and the
+# newest PROFILE_KEEP kept. Staff ask for one with X-Profile: 1 or
+# ?_profile=1; SAMPLE_RATE N also profiles one in N requests (0 disables)
+TRACKER_PROFILE_DIR = config('TRACKER_PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+TRACKER_PROFILE_SAMPLE_RATE = config('TRACKER_PROFILE_SAMPLE_RATE', default=0, cast=int)
+TRACKER_PROFILE_KEEP = config('TRACKER_PROFILE_KEEP', default=200, cast=int)
+
+
+# Cold storage for archived transaction years (see archive_transactions)
+TRACKER_ARCHIVE_ROOT = config('TRACKER_ARCHIVE_ROOT', default=str(BASE_DIR / 'archive'))
@@ -0,0 +1,52 @@
+"""
+Production profile: ``DJANGO_SETTINGS_MODULE=finance_tracker.settings_production``.
+
+Starts from the development settings and trims what every worker and
+management command would otherwise load at start-up.
+
+``TRACKER_URLCONF`` picks what this process serves: ``app`` (pages and
+their JSON endpoints, the default), ``api``, ``admin`` or ``all``. Route
+/admin/ and /api/ to separate worker pools at the proxy:
+
+* ``app`` and ``api`` processes leave ``django.contrib.admin`` out of
+  ``INSTALLED_APPS`` entirely. Run ``migrate`` and user deletions (which
+  cascade to the admin log) with ``admin`` or ``all``.
+* ``admin`` and ``all`` use ``SimpleAdminConfig``; ``admin.py`` modules are
+  registered by the URLconf instead of at start-up.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, STORAGES, config
+
+
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+SECRET_KEY = config('SECRET_KEY')
+
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=lambda v: [h.strip() for h in v.split(',') if h.strip()])
+
+URLCONFS = {
+    'all': 'finance_tracker.urls',
+    'app': 'finance_tracker.urls_app',
+    'api': 'finance_tracker.urls_api',
+    'admin': 'finance_tracker.urls_admin',
+}
+TRACKER_URLCONF = config('TRACKER_URLCONF', default='app')
+ROOT_URLCONF = URLCONFS[TRACKER_URLCONF]
+
+if TRACKER_URLCONF in ('app', 'api'):
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'django.contrib.admin']
+else:
+    INSTALLED_APPS = [
+        'django.contrib.admin.apps.SimpleAdminConfig' if app == 'django.contrib.admin' else app
+        for app in INSTALLED_APPS
+    ]
+
+# A plain path keeps login redirects working in URLconfs without the
+# 'login' route (api, admin)
+LOGIN_URL = '/login/'
+
+TRACKER_STATIC_PIPELINE = True
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'tracker.storage.CompressedManifestStaticFilesStorage'},
+}
@@ -19,6 +19,10 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+# No-op with the default admin app; registers ModelAdmins when the
+# production profile installs SimpleAdminConfig
+admin.autodiscover()
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('tracker.urls')),
@@ -0,0 +1,14 @@
+"""
+Admin site only (``TRACKER_URLCONF=admin``).
+
+The production profile installs ``SimpleAdminConfig``, so ``admin.py``
+modules are registered here rather than at start-up.
+"""
+from django.contrib import admin
+from django.urls import path
+
+admin.autodiscover()
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+]
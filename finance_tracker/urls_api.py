@@ -0,0 +1,8 @@
+"""
+JSON endpoints only (``TRACKER_URLCONF=api``).
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('tracker.api_urls')),
+]
@@ -0,0 +1,10 @@
+"""
+Pages and the JSON endpoints they call, without the admin.
+
+Used by ``finance_tracker.settings_production`` (``TRACKER_URLCONF=app``).
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('tracker.urls')),
+]
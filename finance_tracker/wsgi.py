@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
 
 application = get_wsgi_application()
+
+if settings.TRACKER_SERVE_STATIC:
+    from tracker.static_handler import PrecompressedStaticHandler
+
+    application = PrecompressedStaticHandler(application)
+
+if settings.TRACKER_SERVE_MEDIA:
+    from tracker.static_handler import PrecompressedStaticHandler
+
+    application = PrecompressedStaticHandler(
+        application, settings.MEDIA_ROOT, settings.MEDIA_URL, remember=False
+    )
@@ -1,10 +1,154 @@
-from django.contrib import admin
+import io
+import uuid
+
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 from .models import (
     Category, Transaction, UserProfile, 
-    BudgetAlert, FinancialReport
+    BudgetAlert, FinancialReport, ExchangeRate, ArchivedMonth, ShardAssignment, RequestProfile, CategoryRule
 )
+from .profiling import delete_files, report_path, stats_path
+from .provisioning import ProvisioningError, provision, read_csv
+from .sharding import data_aliases, is_sharded_model
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """Pick which shard a changelist reads; there is no cross-shard "All" view"""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in data_aliases()]
+
+    def value(self):
+        value = super().value()
+        return value if value in data_aliases() else data_aliases()[0]
+
+    def choices(self, changelist):
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        return queryset.using(self.value())
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """Admin for per-user models, which may live on any shard"""
+
+    def get_list_filter(self, request):
+        return (ShardListFilter, *super().get_list_filter(request))
+
+    def get_object(self, request, object_id, from_field=None):
+        for alias in data_aliases():
+            request.shard_alias = alias
+            obj = super().get_object(request, object_id, from_field)
+            if obj is not None:
+                return obj
+        return None
+
+    def get_queryset(self, request):
+        # Soft-deleted rows stay visible here until compact_deleted purges them
+        manager = getattr(self.model, 'all_objects', self.model._default_manager)
+        queryset = manager.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        alias = getattr(request, 'shard_alias', None)
+        return queryset.using(alias) if alias else queryset
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        alias = getattr(request, 'shard_alias', None)
+        if alias and is_sharded_model(db_field.related_model):
+            kwargs['using'] = alias
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class DeletedListFilter(admin.SimpleListFilter):
+    """Live or soft-deleted rows (see tracker.models.SoftDeleteModel)"""
+    title = 'deleted'
+    parameter_name = 'deleted'
+
+    def lookups(self, request, model_admin):
+        return (('no', 'Live'), ('yes', 'Deleted, not yet compacted'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'no':
+            return queryset.filter(deleted_at__isnull=True)
+        if self.value() == 'yes':
+            return queryset.filter(deleted_at__isnull=False)
+        return queryset
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs a full ``COUNT(*)`` over a large table.
+
+    An unfiltered changelist uses the database's row estimate (SQLite
+    ``sqlite_stat1`` after ``ANALYZE``, PostgreSQL ``pg_class.reltuples``,
+    MySQL ``information_schema``). Filtered lists, and databases without
+    statistics, count at most ``count_limit`` rows, so the last pages of a
+    huge result are reached by narrowing the filter rather than paging.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self.estimate_rows(queryset)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        return queryset.order_by()[:self.count_limit].count()
+
+    def estimate_rows(self, queryset):
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        queries = {
+            'sqlite': ("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table]),
+            'postgresql': ("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table]),
+            'mysql': (
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s", [table]
+            ),
+        }
+        if connection.vendor not in queries:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(*queries[connection.vendor])
+                row = cursor.fetchone()
+        except DatabaseError:
+            # e.g. sqlite_stat1 does not exist until ANALYZE has run
+            return None
+        if not row or row[0] is None:
+            return None
+        # sqlite_stat1.stat is "rows rows-per-key ..."
+        estimate = int(str(row[0]).split()[0])
+        return estimate if estimate > 0 else None
+
+
+class LargeTableAdmin(ShardedModelAdmin):
+    """
+    Changelist settings for tables with millions of rows: estimated counts,
+    no second unfiltered count, and joins for the FKs shown in the list.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class UserProfileInline(admin.StackedInline):
@@ -12,35 +156,199 @@ class UserProfileInline(admin.StackedInline):
     can_delete = False
 
 
+class ProvisionUsersForm(forms.Form):
+    csv_file = forms.FileField(
+        label='CSV file',
+        help_text='Columns: username, email, password, first_name, last_name, currency, timezone. '
+                  'Only username is required; users without a password get an unusable one.'
+    )
+
+
 class CustomUserAdmin(UserAdmin):
     inlines = [UserProfileInline]
 
+    def get_urls(self):
+        return [
+            path('provision/', self.admin_site.admin_view(self.provision_view), name='auth_user_provision'),
+            *super().get_urls(),
+        ]
+
+    def provision_view(self, request):
+        """Bulk-create users from an uploaded CSV (see tracker.provisioning)"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
 
-class TransactionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'transaction_type', 'amount', 'category', 'date', 'payment_method')
-    list_filter = ('transaction_type', 'date', 'payment_method')
-    search_fields = ('description', 'user__username')
-    readonly_fields = ('created_at', 'updated_at')
+        form = ProvisionUsersForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            try:
+                rows = read_csv(io.TextIOWrapper(form.cleaned_data['csv_file'], encoding='utf-8', newline=''))
+            except (ProvisioningError, UnicodeDecodeError) as e:
+                form.add_error('csv_file', str(e))
+            else:
+                created, skipped = provision(rows)
+                message = f"Provisioned {len(created)} users."
+                if skipped:
+                    message += f" Skipped {len(skipped)} that already exist: {', '.join(skipped[:20])}"
+                self.message_user(request, message, messages.WARNING if skipped else messages.SUCCESS)
+                return redirect('admin:auth_user_changelist')
 
+        return TemplateResponse(request, 'admin/auth/user/provision.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Provision users',
+            'opts': self.model._meta,
+            'form': form,
+        })
 
-class CategoryAdmin(admin.ModelAdmin):
+
+class TransactionAdmin(LargeTableAdmin):
+    list_display = ('user', 'transaction_type', 'amount', 'currency', 'category', 'date', 'payment_method')
+    list_select_related = ('user', 'category')
+    list_filter = ('transaction_type', 'payment_method', 'currency', DeletedListFilter)
+    date_hierarchy = 'date'
+    search_fields = ('=id', '=user__username', '^description')
+    search_help_text = 'Transaction id, exact username, or the start of a description'
+    readonly_fields = ('created_at', 'updated_at', 'deleted_at')
+    raw_id_fields = ('user', 'category')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Route each kind of term to an indexed lookup instead of OR-ing
+        ``LIKE '%term%'`` over description and a join to auth_user
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        try:
+            return queryset.filter(pk=uuid.UUID(term)), False
+        except ValueError:
+            pass
+
+        # Usernames resolve in the default database; the (user, date) index
+        # then serves the filter on whichever shard the changelist reads
+        user_ids = list(User.objects.filter(username__iexact=term).values_list('pk', flat=True))
+        if user_ids:
+            return queryset.filter(user_id__in=user_ids), False
+
+        # A prefix LIKE, served by the NOCASE index on description
+        return queryset.filter(description__istartswith=term), False
+
+
+class CategoryAdmin(ShardedModelAdmin):
     list_display = ('name', 'user', 'category_type', 'monthly_budget', 'is_default')
-    list_filter = ('category_type', 'is_default')
+    list_select_related = ('user',)
+    list_filter = ('category_type', 'is_default', DeletedListFilter)
     search_fields = ('name', 'user__username')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'deleted_at')
 
 
-class BudgetAlertAdmin(admin.ModelAdmin):
+class BudgetAlertAdmin(ShardedModelAdmin):
     list_display = ('user', 'category', 'threshold_percentage', 'is_active')
+    list_select_related = ('user', 'category')
     list_filter = ('is_active', 'alert_type')
 
 
-class FinancialReportAdmin(admin.ModelAdmin):
+class CategoryRuleAdmin(ShardedModelAdmin):
+    list_display = ('user', 'category', 'match_type', 'pattern', 'payment_method', 'priority', 'is_active')
+    list_select_related = ('user', 'category')
+    list_filter = ('match_type', 'is_active')
+    search_fields = ('pattern', 'user__username')
+    readonly_fields = ('created_at',)
+
+
+class FinancialReportAdmin(ShardedModelAdmin):
     list_display = ('user', 'report_type', 'month', 'generated_at')
+    list_select_related = ('user',)
     list_filter = ('report_type', 'month')
     readonly_fields = ('generated_at',)
 
 
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ('date', 'base_currency', 'quote_currency', 'rate')
+    list_filter = ('base_currency', 'quote_currency')
+    date_hierarchy = 'date'
+
+
+class ArchivedMonthAdmin(ShardedModelAdmin):
+    list_display = ('user', 'month', 'currency', 'income', 'expenses', 'transaction_count')
+    list_select_related = ('user',)
+    list_filter = ('month',)
+    search_fields = ('user__username',)
+    readonly_fields = ('archived_at',)
+
+
+class ShardAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('user', 'alias', 'assigned_at')
+    list_select_related = ('user',)
+    list_filter = ('alias',)
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'alias', 'assigned_at')
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles are written by tracker.profiling; deleting a row removes its files"""
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'sql_count', 'sql_ms', 'peak_kib', 'trigger', 'user')
+    list_select_related = ('user',)
+    list_filter = ('trigger', 'method', 'status_code')
+    search_fields = ('path', 'view_name')
+    date_hierarchy = 'created_at'
+    fields = (
+        'name', 'created_at', 'user', 'trigger', 'method', 'path', 'view_name', 'status_code',
+        'duration_ms', 'sql_count', 'sql_ms', 'peak_memory', 'download', 'report',
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/download/', self.admin_site.admin_view(self.download_view),
+                name='tracker_requestprofile_download'
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, object_id):
+        """The raw pstats dump, for snakeviz or ``python -m pstats``"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        record = get_object_or_404(RequestProfile, pk=object_id)
+        try:
+            return FileResponse(open(stats_path(record), 'rb'), as_attachment=True, filename=f'{record.name}.prof')
+        except FileNotFoundError:
+            raise Http404('The profile file is missing')
+
+    @admin.display(description='Peak KiB', ordering='peak_memory')
+    def peak_kib(self, obj):
+        return None if obj.peak_memory is None else round(obj.peak_memory / 1024)
+
+    @admin.display(description='pstats dump')
+    def download(self, obj):
+        url = reverse('admin:tracker_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}.prof</a>', url, obj.name)
+
+    @admin.display(description='Report')
+    def report(self, obj):
+        try:
+            text = report_path(obj).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return 'The report file is missing.'
+        return format_html('<pre style="white-space: pre; overflow-x: auto; font-size: 12px">{}</pre>', text)
+
+    def delete_model(self, request, obj):
+        delete_files([obj])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_files(queryset)
+        super().delete_queryset(request, queryset)
+
+
 # Register models
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
@@ -48,4 +356,9 @@ admin.site.register(Transaction, TransactionAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(UserProfile)
 admin.site.register(BudgetAlert, BudgetAlertAdmin)
-admin.site.register(FinancialReport, FinancialReportAdmin)
\ No newline at end of file
+admin.site.register(CategoryRule, CategoryRuleAdmin)
+admin.site.register(FinancialReport, FinancialReportAdmin)
+admin.site.register(ExchangeRate, ExchangeRateAdmin)
+admin.site.register(ArchivedMonth, ArchivedMonthAdmin)
+admin.site.register(ShardAssignment, ShardAssignmentAdmin)
+admin.site.register(RequestProfile, RequestProfileAdmin)
\ No newline at end of file
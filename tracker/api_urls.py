@@ -0,0 +1,23 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('api/dashboard/summary/', views.api_dashboard_summary, name='api_dashboard_summary'),
+    path('api/transactions/', views.api_transactions, name='api_transactions'),
+    path('api/transactions/recent/', views.api_recent_transactions, name='api_recent_transactions'),
+    path('api/transactions/create/', views.create_transaction, name='create_transaction'),
+    path('api/transactions/queued/<uuid:transaction_id>/', views.transaction_write_status, name='transaction_write_status'),
+    path('api/transactions/<uuid:transaction_id>/update/', views.update_transaction, name='update_transaction'),
+    path('api/transactions/<uuid:transaction_id>/delete/', views.delete_transaction, name='delete_transaction'),
+    path('api/transactions/<uuid:transaction_id>/restore/', views.restore_transaction, name='restore_transaction'),
+    path('api/categories/', views.api_categories, name='api_categories'),
+    path('api/categories/create/', views.create_category, name='create_category'),
+    path('api/categories/<uuid:category_id>/update/', views.update_category, name='update_category'),
+    path('api/categories/<uuid:category_id>/delete/', views.delete_category, name='delete_category'),
+    path('api/categories/<uuid:category_id>/restore/', views.restore_category, name='restore_category'),
+    path('api/rules/', views.api_rules, name='api_rules'),
+    path('api/rules/create/', views.create_rule, name='create_rule'),
+    path('api/rules/<int:rule_id>/delete/', views.delete_rule, name='delete_rule'),
+    path('api/reports/monthly/', views.api_monthly_report, name='api_monthly_report'),
+    path('api/stream/', views.event_stream, name='api_stream'),
+]
@@ -7,4 +7,12 @@ class TrackerConfig(AppConfig):
     
     def ready(self):
         """Import signals when app is ready"""
-        import tracker.signals
\ No newline at end of file
+        import tracker.signals
+        
+        from django.conf import settings
+        from .throttling import check_settings
+        check_settings()
+        
+        if settings.TRACKER_WARMUP:
+            from .warmup import warm_up
+            warm_up()
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Cold storage for closed years of transactions.
+
+Each archived user/year is a directory under ``TRACKER_ARCHIVE_ROOT``::
+
+    <user_id>/<year>/date.npy     datetime64[D]  (memory-mapped on read)
+    <user_id>/<year>/amount.npy   int64 cents    (memory-mapped on read)
+    <user_id>/<year>/type.npy     int8, 0=income 1=expense (memory-mapped)
+    <user_id>/<year>/text.npz     compressed id/category/description/
+                                  payment_method/currency columns
+
+Numeric columns stay uncompressed so range scans and sums can be served
+from memory-mapped arrays; the bulky text columns are only decompressed
+when rows are exported. Per-month totals live in ``ArchivedMonth`` so
+dashboards never need to open the files at all.
+"""
+import os
+import shutil
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import ArchivedMonth
+
+
+TRANSACTION_TYPES = ('income', 'expense')
+NUMERIC_COLUMNS = ('date', 'amount', 'type')
+TEXT_COLUMNS = ('id', 'category', 'description', 'payment_method', 'currency')
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Transaction archives require numpy (pip install numpy)")
+    return numpy
+
+
+def archive_root():
+    return Path(settings.TRACKER_ARCHIVE_ROOT)
+
+
+def archive_path(user_id, year):
+    return archive_root() / str(user_id) / str(year)
+
+
+def write_year(user_id, year, rows):
+    """
+    Write ``rows`` (dicts from ``Transaction.objects.values()``) merged with
+    any existing archive for the year into a temporary directory. Archived
+    rows with the id of one of ``rows`` are replaced, so archiving the same
+    rows again never counts them twice.
+
+    Returns ``(tmp_path, final_path)``; call ``publish()`` to move the new
+    archive into place as the last step before the database transaction
+    that deletes the live rows commits. If that commit then fails, the rows
+    are both live and archived until the year is archived again.
+    """
+    np = _numpy()
+    final_path = archive_path(user_id, year)
+
+    columns = {name: [] for name in NUMERIC_COLUMNS + TEXT_COLUMNS}
+    for row in rows:
+        columns['date'].append(row['date'])
+        columns['amount'].append(int(row['amount'].scaleb(2)))
+        columns['type'].append(TRANSACTION_TYPES.index(row['transaction_type']))
+        columns['id'].append(row['id'].hex)
+        columns['category'].append(row['category__name'] or '')
+        columns['description'].append(row['description'] or '')
+        columns['payment_method'].append(row['payment_method'])
+        columns['currency'].append(row['currency'])
+
+    arrays = {
+        'date': np.array(columns['date'], dtype='datetime64[D]'),
+        'amount': np.array(columns['amount'], dtype=np.int64),
+        'type': np.array(columns['type'], dtype=np.int8),
+    }
+    arrays.update({name: np.array(columns[name], dtype=str) for name in TEXT_COLUMNS})
+
+    if final_path.exists():
+        existing = YearArchive(final_path)
+        text = existing.text()
+        kept = ~np.isin(text['id'], arrays['id'])
+        for name in NUMERIC_COLUMNS:
+            arrays[name] = np.concatenate([np.asarray(existing.column(name))[kept], arrays[name]])
+        for name in TEXT_COLUMNS:
+            arrays[name] = np.concatenate([text[name][kept], arrays[name]])
+
+    # Keep rows newest first, matching Transaction.Meta.ordering
+    order = np.argsort(arrays['date'], kind='stable')[::-1]
+
+    tmp_path = final_path.with_name(f'.{year}.tmp')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    for name in NUMERIC_COLUMNS:
+        np.save(tmp_path / f'{name}.npy', arrays[name][order])
+    np.savez_compressed(tmp_path / 'text.npz', **{name: arrays[name][order] for name in TEXT_COLUMNS})
+
+    return tmp_path, final_path
+
+
+def publish(tmp_path, final_path):
+    """Atomically replace the archive directory with a freshly written one"""
+    old_path = final_path.with_name(f'.{final_path.name}.old')
+    if final_path.exists():
+        os.replace(final_path, old_path)
+    os.replace(tmp_path, final_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+class YearArchive:
+    """Read access to one user/year archive"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._columns = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = _numpy().load(self.path / f'{name}.npy', mmap_mode='r')
+        return self._columns[name]
+
+    def text(self):
+        with _numpy().load(self.path / 'text.npz') as data:
+            return {name: data[name] for name in TEXT_COLUMNS}
+
+    def mask(self, date_from=None, date_to=None):
+        np = _numpy()
+        dates = self.column('date')
+        selected = np.ones(len(dates), dtype=bool)
+        if date_from:
+            selected &= dates >= np.datetime64(date_from, 'D')
+        if date_to:
+            selected &= dates <= np.datetime64(date_to, 'D')
+        return selected
+
+    def totals(self, date_from=None, date_to=None):
+        """Income/expense totals in stored amounts, straight from the mmap"""
+        selected = self.mask(date_from, date_to)
+        amounts = self.column('amount')[selected]
+        types = self.column('type')[selected]
+        return {
+            kind: Decimal(int(amounts[types == code].sum())).scaleb(-2)
+            for code, kind in enumerate(TRANSACTION_TYPES)
+        }
+
+    def rows(self, date_from=None, date_to=None):
+        """Yield rows shaped like the live ``Transaction`` export columns"""
+        np = _numpy()
+        indexes = np.flatnonzero(self.mask(date_from, date_to))
+        if not len(indexes):
+            return
+
+        text = self.text()
+        dates = self.column('date')
+        amounts = self.column('amount')
+        types = self.column('type')
+        for i in indexes:
+            yield {
+                'id': str(text['id'][i]),
+                'date': dates[i].item(),
+                'transaction_type': TRANSACTION_TYPES[types[i]],
+                'category': str(text['category'][i]),
+                'description': str(text['description'][i]),
+                'amount': Decimal(int(amounts[i])).scaleb(-2),
+                'payment_method': str(text['payment_method'][i]),
+                'currency': str(text['currency'][i]),
+            }
+
+
+def archived_years(user):
+    return sorted(
+        {month.year for month in ArchivedMonth.objects.for_user(user).dates('month', 'year')},
+        reverse=True
+    )
+
+
+def iter_archived_rows(user, date_from=None, date_to=None):
+    """Archived rows for ``user`` within an optional date range, newest first"""
+    for year in archived_years(user):
+        if date_from and year < date_from.year:
+            continue
+        if date_to and year > date_to.year:
+            continue
+        path = archive_path(user.pk, year)
+        if path.exists():
+            yield from YearArchive(path).rows(date_from, date_to)
+
+
+def archived_month_totals(user, months):
+    """``{month: ArchivedMonth}`` for the given first-of-month dates"""
+    return {
+        summary.month: summary
+        for summary in ArchivedMonth.objects.for_user(user).filter(month__in=months)
+    }
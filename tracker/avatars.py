@@ -0,0 +1,183 @@
+"""
+Avatar uploads and their thumbnails.
+
+``validate()`` runs in the request. The upload has already been opened and
+verified by ``forms.ImageField``, so it only checks the limits and renames
+the file after its content hash. Decoding and resizing are slow for
+multi-megabyte phone photos, so they happen after the response:
+``schedule()`` queues ``process()`` on a small thread pool once the profile
+is committed. Pillow releases the GIL while it decodes, resizes and encodes.
+
+``process()`` renders a square thumbnail of each ``THUMBNAIL_SIZES`` in
+WebP and JPEG. Files are named ``avatars/<user>/avatar.<digest>.<size>.<ext>``
+and never change, so they can be cached for a year. It then records the
+digest on the profile and deletes the user's older avatar files.
+Templates show thumbnails only; until the first set is ready they show the
+user's initial. The ``process_avatars`` command regenerates missing
+thumbnails, e.g. for avatars uploaded before this existed.
+"""
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .fragments import bump
+from .middleware import auth_cache
+from .models import UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+# Square thumbnails, in CSS pixels; templates pick 1x and 2x from these
+THUMBNAIL_SIZES = (48, 96, 160)
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+DIGEST_LENGTH = 12
+
+_executor = None
+
+
+def validate(upload):
+    """
+    Check an upload that ``forms.ImageField`` has already verified and
+    rename it ``avatar.<digest>.<ext>``. Raises ``ValidationError``.
+    """
+    if upload.size > settings.TRACKER_AVATAR_MAX_SIZE:
+        raise ValidationError(f"Avatars can be at most {settings.TRACKER_AVATAR_MAX_SIZE // (1024 * 1024)} MB.")
+
+    image = upload.image
+    if image.format not in EXTENSIONS:
+        raise ValidationError("Upload a JPEG, PNG, GIF or WebP image.")
+    if image.width * image.height > settings.TRACKER_AVATAR_MAX_PIXELS:
+        raise ValidationError("This image has too many pixels.")
+
+    upload.name = f'avatar.{digest(upload)}{EXTENSIONS[image.format]}'
+    return upload
+
+
+def digest(handle):
+    sha = hashlib.sha256()
+    handle.seek(0)
+    for chunk in iter(lambda: handle.read(64 * 1024), b''):
+        sha.update(chunk)
+    handle.seek(0)
+    return sha.hexdigest()[:DIGEST_LENGTH]
+
+
+def render(handle):
+    """``{(size, extension): bytes}`` of every thumbnail of an image file"""
+    # Only the workers need Pillow loaded; forms.ImageField opens uploads itself
+    from PIL import Image, ImageOps
+
+    with Image.open(handle) as image:
+        # JPEGs decode straight to 1/2, 1/4 or 1/8 scale, at most down to
+        # the largest thumbnail, so a 12 MP photo never fully decodes
+        largest = max(THUMBNAIL_SIZES)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+            transparent = image.convert('RGBA')
+            opaque = Image.new('RGB', transparent.size, 'white')
+            opaque.paste(transparent, mask=transparent.getchannel('A'))
+        else:
+            transparent = opaque = image.convert('RGB')
+
+    thumbnails = {}
+    for size in sorted(THUMBNAIL_SIZES, reverse=True):
+        for extension, image_format, options in FORMATS:
+            source = transparent if image_format == 'WEBP' else opaque
+            thumbnail = ImageOps.fit(source, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, image_format, **options)
+            thumbnails[size, extension] = buffer.getvalue()
+    return thumbnails
+
+
+def process(profile_id, name):
+    """
+    Generate the thumbnails of avatar ``name``, unless the profile has moved
+    on to another avatar in the meantime; returns whether it was recorded
+    """
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None or (profile.avatar.name or '') != name:
+        return False
+
+    if name:
+        with default_storage.open(name, 'rb') as handle:
+            profile.avatar_digest = digest(handle)
+            thumbnails = render(handle)
+        for (size, extension), content in thumbnails.items():
+            thumbnail_name = profile.avatar_thumbnail_name(size, extension)
+            if not default_storage.exists(thumbnail_name):
+                default_storage.save(thumbnail_name, ContentFile(content))
+    else:
+        profile.avatar_digest = ''
+
+    # Conditional, so a slow job cannot overwrite a newer upload's digest
+    unchanged = Q(avatar=name) if name else Q(avatar='') | Q(avatar__isnull=True)
+    recorded = UserProfile.objects.filter(unchanged, pk=profile_id).update(
+        avatar_digest=profile.avatar_digest, updated_at=timezone.now()
+    )
+    if recorded:
+        bump(profile.user_id, 'profile')
+        auth_cache.invalidate(profile.user_id)
+        sweep(profile)
+    return bool(recorded)
+
+
+def sweep(profile):
+    """Delete the user's avatar files other than the current avatar and its thumbnails"""
+    directory = f'avatars/{profile.user_id}'
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    # Re-read, in case another upload landed after ours was recorded; its
+    # thumbnails (same digest prefix) may be being written right now
+    current = UserProfile.objects.filter(pk=profile.pk).values_list('avatar', flat=True).first()
+    keep = {os.path.basename(name) for name in (current, profile.avatar.name) if name}
+    prefixes = tuple(name.rsplit('.', 1)[0] + '.' for name in keep)
+    if profile.avatar_digest:
+        prefixes += (f'avatar.{profile.avatar_digest}.',)
+    for filename in files:
+        if filename not in keep and not filename.startswith(prefixes):
+            default_storage.delete(f'{directory}/{filename}')
+
+
+def run(profile_id, name):
+    try:
+        process(profile_id, name)
+    except Exception:
+        logger.exception("Could not process avatar %s of profile %s", name, profile_id)
+    finally:
+        # Pool threads outlive requests; do not leave their connections open
+        connections.close_all()
+
+
+def schedule(profile):
+    """Process ``profile``'s current avatar (or its removal) after the transaction commits"""
+    profile_id, name = profile.pk, profile.avatar.name or ''
+
+    def submit():
+        global _executor
+        if not settings.TRACKER_AVATAR_WORKERS:
+            process(profile_id, name)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.TRACKER_AVATAR_WORKERS, thread_name_prefix='avatars')
+        _executor.submit(run, profile_id, name)
+
+    transaction.on_commit(submit)
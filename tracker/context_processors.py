@@ -1,7 +1,30 @@
+from django.conf import settings
+from django.db.models import F
+from django.utils.functional import SimpleLazyObject
+
+from .fragments import get_versions
+from .models import Category
+
+
 def user_categories(request):
     """Add user categories to context for all templates"""
     if request.user.is_authenticated:
+        categories = Category.objects.for_user(request.user)
         return {
-            'user_categories': request.user.categories.all()
+            'user_categories': categories,
+            # Called lazily by the template, only when the cached copy is missing
+            'user_categories_data': lambda: list(
+                categories.values('id', 'name', 'icon', type=F('category_type'))
+            ),
         }
-    return {}
\ No newline at end of file
+    return {}
+
+
+def data_versions(request):
+    """Per-user data versions for ``{% cache %}`` keys (see tracker.fragments)"""
+    if request.user.is_authenticated:
+        return {
+            'data_versions': SimpleLazyObject(lambda: get_versions(request.user.pk)),
+            'fragment_timeout': settings.TRACKER_FRAGMENT_CACHE_TIMEOUT,
+        }
+    return {}
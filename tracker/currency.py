@@ -0,0 +1,109 @@
+import time
+from decimal import Decimal
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db.models import (
+    Case, When, F, Value, Subquery, OuterRef, DecimalField, Sum
+)
+from django.db.models.functions import Coalesce, Round
+
+from .fields import MoneyField
+from .models import ExchangeRate
+
+
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+
+RATES_VERSION_KEY = 'tracker:rates:version'
+
+
+def _rate_subquery(base, quote, on_date):
+    """Latest rate on or before ``on_date`` for a base/quote pair"""
+    return Subquery(
+        ExchangeRate.objects.filter(
+            base_currency=base,
+            quote_currency=quote,
+            date__lte=on_date,
+        ).order_by('-date').values('rate')[:1],
+        output_field=RATE_FIELD
+    )
+
+
+def converted_amount(currency, prefix=''):
+    """
+    Expression converting a transaction amount into ``currency`` inside the query.
+
+    ``prefix`` lets the expression be used across a relation, e.g.
+    ``converted_amount('usd', prefix='transactions__')``. Rows without a known
+    rate (direct or inverse) are counted at face value. Amounts are integer
+    cents, so converted rows are rounded back to whole cents and the sum
+    stays an integer.
+    """
+    amount = F(f'{prefix}amount')
+    source = OuterRef(f'{prefix}currency')
+    on_date = OuterRef(f'{prefix}date')
+
+    rate = Coalesce(
+        _rate_subquery(source, currency, on_date),
+        Value(Decimal('1'), output_field=RATE_FIELD) / _rate_subquery(currency, source, on_date),
+        Value(Decimal('1'), output_field=RATE_FIELD),
+        output_field=RATE_FIELD
+    )
+
+    return Case(
+        When(**{f'{prefix}currency': currency}, then=amount),
+        default=Round(amount * rate),
+        output_field=MoneyField()
+    )
+
+
+def converted_sum(currency, prefix='', **kwargs):
+    """``Sum`` of transaction amounts converted into ``currency``"""
+    return Sum(converted_amount(currency, prefix=prefix), output_field=MoneyField(), **kwargs)
+
+
+def rates_changed():
+    """Make every process drop its cached ``get_rate()`` lookups"""
+    cache.set(RATES_VERSION_KEY, time.time_ns(), None)
+
+
+def _rates_version():
+    version = cache.get(RATES_VERSION_KEY)
+    if version is None:
+        cache.add(RATES_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(RATES_VERSION_KEY)
+    return version
+
+
+def get_rate(base, quote, on_date):
+    """
+    Rate for a single conversion, cached in-process.
+
+    Lookups are keyed by a version in the shared cache; call
+    ``rates_changed()`` after rates change, from any process.
+    """
+    if base == quote:
+        return Decimal('1')
+    return _lookup_rate(_rates_version(), base, quote, on_date)
+
+
+@lru_cache(maxsize=4096)
+def _lookup_rate(version, base, quote, on_date):
+    rate = ExchangeRate.objects.filter(
+        base_currency=base, quote_currency=quote, date__lte=on_date
+    ).order_by('-date').values_list('rate', flat=True).first()
+    if rate:
+        return rate
+
+    inverse = ExchangeRate.objects.filter(
+        base_currency=quote, quote_currency=base, date__lte=on_date
+    ).order_by('-date').values_list('rate', flat=True).first()
+    if inverse:
+        return Decimal('1') / inverse
+
+    return Decimal('1')
+
+
+def convert(amount, base, quote, on_date):
+    """Convert a single amount, rounded to cents"""
+    return (Decimal(amount) * get_rate(base, quote, on_date)).quantize(Decimal('0.01'))
@@ -0,0 +1,111 @@
+"""
+Duplicate transaction detection.
+
+Every transaction stores a ``fingerprint``: a short hash of its type,
+amount, currency, payment method and normalized description (lowercased,
+punctuation dropped, whitespace collapsed). It is recomputed whenever the
+row is saved, including by ``bulk_create``. The date is deliberately not
+part of the hash. The index on ``(user, fingerprint, date)`` finds rows
+with the same fingerprint within ``TRACKER_DUPLICATE_WINDOW`` days of a
+date with one range scan, so a repeated import or a double entry made the
+next day is still caught.
+
+``create_transaction`` looks up the new row's fingerprint before saving it.
+Depending on ``TRACKER_DUPLICATES`` it saves it anyway and reports the
+match (``flag``), or refuses it with a 409 (``skip``).
+``exclude_existing()`` does the same for rows created in bulk, with one
+query per batch. The ``find_duplicates`` command reports clusters that
+are already stored, starting from one grouped query per database.
+"""
+import hashlib
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+
+from .fields import CENT
+
+
+# Fields that make up the fingerprint; saving any of them updates it
+FINGERPRINT_FIELDS = ('transaction_type', 'amount', 'currency', 'payment_method', 'description')
+FINGERPRINT_LENGTH = 16
+
+PUNCTUATION = re.compile(r'[^\w\s]+')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(description):
+    """``"  Starbucks,  #12 "`` -> ``"starbucks 12"``"""
+    text = PUNCTUATION.sub(' ', (description or '').casefold())
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def fingerprint(transaction_type, amount, currency, payment_method, description):
+    amount = Decimal(str(amount)).quantize(CENT)
+    key = '\x1f'.join((transaction_type or '', str(amount), currency or '', payment_method or '', normalize(description)))
+    return hashlib.blake2b(key.encode(), digest_size=FINGERPRINT_LENGTH // 2).hexdigest()
+
+
+def window(days=None):
+    return timedelta(days=settings.TRACKER_DUPLICATE_WINDOW if days is None else days)
+
+
+def find(user, fingerprint, date, days=None):
+    """Id of a stored transaction of ``user`` that ``fingerprint`` on ``date`` duplicates, or ``None``"""
+    from .models import Transaction
+
+    span = window(days)
+    return Transaction.objects.for_user(user).filter(
+        fingerprint=fingerprint,
+        date__range=(date - span, date + span),
+    ).values_list('id', flat=True).first()
+
+
+def exclude_existing(user, transactions, days=None):
+    """
+    The unsaved ``transactions`` (of one user) that neither duplicate a
+    stored row nor an earlier one in the list
+    """
+    from .models import Transaction
+
+    transactions = list(transactions)
+    if not transactions:
+        return []
+    span = window(days)
+    for transaction in transactions:
+        transaction.fingerprint = transaction.get_fingerprint()
+
+    seen = {}
+    stored = Transaction.objects.for_user(user).filter(
+        fingerprint__in={transaction.fingerprint for transaction in transactions},
+        date__range=(
+            min(transaction.date for transaction in transactions) - span,
+            max(transaction.date for transaction in transactions) + span,
+        ),
+    ).values_list('fingerprint', 'date')
+    for key, date in stored:
+        seen.setdefault(key, []).append(date)
+
+    kept = []
+    for transaction in transactions:
+        dates = seen.setdefault(transaction.fingerprint, [])
+        if not any(abs(transaction.date - date) <= span for date in dates):
+            kept.append(transaction)
+        dates.append(transaction.date)
+    return kept
+
+
+def split(dates, days=None):
+    """Split sorted ``(date, id)`` pairs into clusters of two or more no more than the window apart"""
+    span = window(days)
+    clusters, current = [], []
+    for date, pk in dates:
+        if current and date - current[-1][0] > span:
+            if len(current) > 1:
+                clusters.append(current)
+            current = []
+        current.append((date, pk))
+    if len(current) > 1:
+        clusters.append(current)
+    return clusters
@@ -0,0 +1,184 @@
+"""
+Live dashboard updates over Server-Sent Events.
+
+Transaction writes (tracker.signals) publish small delta events for their
+user once the database transaction commits; ``/api/stream/``
+(``views.event_stream``) subscribes and forwards them to every open
+dashboard of that user. Events:
+
+    transaction   ``{action, id, html}`` - a row for the recent list
+                  (``html`` is empty for ``deleted``)
+    totals        this month's cards and pie chart data
+    budget_alert  ``{category_id, level, html}`` for the category that was
+                  written to; ``level`` is ``ok`` once it drops below 80%
+    resync        the subscriber fell behind and should refetch
+
+The broker is chosen with ``TRACKER_EVENT_BROKER``. ``LocalBroker`` keeps
+subscribers in this process, which is enough for a single ASGI worker and
+for tests; with several workers the writes and the stream can land on
+different processes, so those deployments need a broker with the same
+interface on top of a shared pub/sub (e.g. Redis).
+"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+from .models import Category, UserProfile
+from .serializers import dumps
+from .summary import month_totals, month_category_expenses, budget_alert
+from .periods import local_today
+
+
+class Subscription:
+    """One open stream; events are ``(id, name, data)`` tuples"""
+
+    def __init__(self, user_id, max_queue):
+        self.user_id = str(user_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_queue)
+
+    def put(self, item):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            # Too far behind to be useful; drop the backlog and ask for a refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            item = (item[0], 'resync', {})
+        self.queue.put_nowait(item)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """
+    In-process pub/sub. ``publish()`` may be called from any thread (sync
+    views run in a thread pool under ASGI); delivery is handed to each
+    subscriber's event loop.
+    """
+
+    def __init__(self, max_queue=None):
+        self.max_queue = max_queue or settings.TRACKER_SSE_QUEUE_SIZE
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, user_id):
+        """Register a subscription; must be called from a running event loop"""
+        subscription = Subscription(user_id, self.max_queue)
+        with self._lock:
+            self._subscribers[subscription.user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return str(user_id) in self._subscribers
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id, event, data):
+        item = (next(self._ids), event, data)
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, item)
+            except RuntimeError:
+                # Loop already closed; the stream is gone
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.TRACKER_EVENT_BROKER)()
+
+
+def format_event(event_id, event, data):
+    """Serialise one event in the ``text/event-stream`` wire format"""
+    return f"id: {event_id}\nevent: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+async def stream(user_id):
+    """
+    ``text/event-stream`` body for one client: the user's events as they are
+    published, a keep-alive comment when idle, ending after
+    ``TRACKER_SSE_MAX_AGE`` seconds (EventSource then reconnects).
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.TRACKER_SSE_MAX_AGE
+    try:
+        yield 'retry: 3000\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                item = await asyncio.wait_for(
+                    subscription.get(), min(settings.TRACKER_SSE_HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_event(*item)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def transaction_changed(instance, action, using):
+    """
+    Queue the events for a saved or deleted transaction; they are built and
+    published after commit, and only if the user has a stream open.
+    """
+    if not get_broker().has_subscribers(instance.user_id):
+        return
+    # Model.delete() clears the pk once the delete signals have run
+    pk = str(instance.pk)
+    transaction.on_commit(lambda: publish_transaction(instance, pk, action), using=using)
+
+
+def publish_transaction(instance, pk, action):
+    broker = get_broker()
+    user_id = instance.user_id
+    profile = UserProfile.objects.only('currency', 'timezone').get(user_id=user_id)
+    currency = profile.currency
+    today = local_today(profile.timezone)
+
+    broker.publish(user_id, 'transaction', {
+        'action': action,
+        'id': pk,
+        'html': '' if action == 'deleted' else render_to_string(
+            'tracker/includes/_recent_transaction.html', {'transaction': instance}
+        ),
+    })
+
+    totals = month_totals(user_id, currency, today)
+    broker.publish(user_id, 'totals', {
+        **{key: float(value) for key, value in totals.items()},
+        'categories': month_category_expenses(user_id, currency, today),
+    })
+
+    if instance.category_id:
+        category = Category.objects.for_user(user_id).filter(pk=instance.category_id).first()
+        alert = category and budget_alert(category, currency, today)
+        broker.publish(user_id, 'budget_alert', {
+            'category_id': str(instance.category_id),
+            'level': alert['level'] if alert else 'ok',
+            'html': render_to_string(
+                'tracker/includes/_budget_alert.html', {'alert': alert, 'user_profile': profile}
+            ) if alert else '',
+        })
@@ -0,0 +1,78 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+CENT = Decimal('0.01')
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    Money amount stored as integer minor units (cents).
+
+    Python code always sees ``Decimal`` values with two decimal places;
+    the database only stores integers, so sums are exact and rows decode
+    without going through float/text conversion.
+    """
+    description = _("Money amount stored in minor units")
+
+    default_error_messages = {
+        'invalid': _('“%(value)s” value must be a decimal number.'),
+    }
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            value = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+            if not value.is_finite():
+                raise InvalidOperation
+            return value.quantize(CENT, rounding=ROUND_HALF_UP)
+        except (InvalidOperation, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'],
+                code='invalid',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        return int(self.to_python(value).scaleb(2))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        if not isinstance(value, int):
+            value = round(value)
+        return Decimal(value).scaleb(-2)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{
+            'form_class': forms.DecimalField,
+            'decimal_places': 2,
+            'max_digits': 17,
+            **kwargs,
+        })
+
+
+class FingerprintField(models.CharField):
+    """
+    Hash of other fields of the row, taken from the model's
+    ``get_fingerprint()`` each time the row is written; ``pre_save`` also
+    runs for ``bulk_create``, so bulk-loaded rows get one too
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 16)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = model_instance.get_fingerprint()
+        setattr(model_instance, self.attname, value)
+        return value
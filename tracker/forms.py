@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from . import avatars
 from .models import UserProfile
 
 
@@ -47,4 +48,11 @@ class UserProfileForm(forms.ModelForm):
         if self.instance and self.instance.user:
             self.fields['first_name'].initial = self.instance.user.first_name
             self.fields['last_name'].initial = self.instance.user.last_name
-            self.fields['email'].initial = self.instance.user.email
\ No newline at end of file
+            self.fields['email'].initial = self.instance.user.email
+    
+    def clean_avatar(self):
+        avatar = self.cleaned_data.get('avatar')
+        # A new upload carries the decoded ``image``; the stored file does not
+        if avatar and hasattr(avatar, 'image'):
+            avatars.validate(avatar)
+        return avatar
\ No newline at end of file
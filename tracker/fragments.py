@@ -0,0 +1,48 @@
+"""
+Per-user data versions for template fragment caching.
+
+Each user has a version number per scope, kept in the cache. Templates put
+the version in the ``{% cache %}`` key, so a fragment is reused until the
+data behind it changes; signals call ``bump()`` on every write, which moves
+the user to a fresh key instead of deleting old fragments. A version that
+was evicted is simply recreated with a new value, so an eviction can only
+cost a re-render, never serve stale HTML.
+
+Scopes:
+    categories    category names/icons/budgets (dropdown data)
+    transactions  transaction rows, including their category labels
+    profile       name, email and profile settings shown in the chrome
+"""
+import time
+
+from django.core.cache import cache
+
+
+SCOPES = ('categories', 'transactions', 'profile')
+KEY = 'tracker:version:{}:{}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def get_versions(user_id):
+    """``{scope: version}`` for a user, creating missing versions"""
+    keys = {scope: KEY.format(scope, user_id) for scope in SCOPES}
+    found = cache.get_many(keys.values())
+
+    versions, missing = {}, {}
+    for scope, key in keys.items():
+        if key in found:
+            versions[scope] = found[key]
+        else:
+            versions[scope] = missing[key] = _new_version()
+    if missing:
+        cache.set_many(missing, None)
+    return versions
+
+
+def bump(user_id, *scopes):
+    """Invalidate every cached fragment of ``user_id`` that depends on ``scopes``"""
+    version = _new_version()
+    cache.set_many({KEY.format(scope, user_id): version for scope in scopes}, None)
@@ -0,0 +1,167 @@
+"""
+``Idempotency-Key`` support for the mutating API views.
+
+A client that may retry a POST (a timed-out mobile request, a double click)
+sends the same ``Idempotency-Key`` header with every attempt. The first
+attempt claims the key by inserting an in-progress ``IdempotencyKey`` row;
+the unique (user, key) index makes that insert the only serialization point,
+so no database lock is held while the view runs. When the view succeeds its
+response is stored on the row and every later attempt gets it replayed
+instead of running the view again.
+
+- A duplicate arriving while the first attempt is still running waits up to
+  ``TRACKER_IDEMPOTENCY_WAIT`` seconds for the stored response, then gets
+  409 with ``Retry-After``.
+- Reusing a key for a different request (method, path or form data) is
+  rejected with 422.
+- Only 2xx responses are stored. A failed attempt releases its key, so the
+  retry runs the view again.
+- Keys expire after ``TRACKER_IDEMPOTENCY_TTL`` seconds. An expired row is
+  replaced when its key is reused, and ``purge_idempotency_keys`` deletes
+  the rest.
+"""
+import hashlib
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# An in-progress row this old belongs to a worker that died mid-request
+ABANDONED_AFTER = timedelta(minutes=1)
+POLL_INTERVAL = 0.05
+
+
+def request_fingerprint(request):
+    """Hash of what makes two requests "the same" request"""
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.path}\n'.encode())
+    if request.POST:
+        # Multipart boundaries differ between retries; the fields do not
+        for name, values in sorted(request.POST.lists()):
+            digest.update(repr((name, values)).encode())
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def expired(record, now=None):
+    now = now or timezone.now()
+    if record.status_code is None:
+        return record.created_at < now - ABANDONED_AFTER
+    return record.created_at < now - timedelta(seconds=settings.TRACKER_IDEMPOTENCY_TTL)
+
+
+def find(keys, key):
+    """The record for ``key``; not ``.first()``, whose ORDER BY id would make
+    SQLite walk the primary key instead of the (user, key) index"""
+    for record in keys.filter(key=key)[:1]:
+        return record
+    return None
+
+
+def claim(user, key, fingerprint):
+    """
+    ``(record, True)`` if this request now owns ``key``, otherwise the
+    existing record (``None`` if it kept changing under us) and ``False``
+    """
+    keys = IdempotencyKey.objects.for_user(user)
+    for _ in range(3):
+        # Retries are what this exists for, so look before inserting
+        record = find(keys, key)
+        if record is not None:
+            if not expired(record):
+                return record, False
+            # Delete only the row we looked at, so two takers cannot both win
+            keys.filter(pk=record.pk, created_at=record.created_at).delete()
+
+        try:
+            with transaction.atomic(using=keys.db):
+                return keys.create(user=user, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            pass  # a concurrent duplicate got there first; read its row
+
+    return None, False
+
+
+def wait_for(record):
+    """Poll an in-progress record until it completes, is released or times out"""
+    keys = IdempotencyKey.objects.for_user(record.user_id)
+    deadline = time.monotonic() + settings.TRACKER_IDEMPOTENCY_WAIT
+    while record is not None and record.status_code is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        record = find(keys, record.key)
+    return record
+
+
+def replay(record):
+    response = HttpResponse(record.response_body, status=record.status_code, content_type=record.content_type)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    Make a mutating view safe to retry with an ``Idempotency-Key`` header.
+    Requests without the header run unchanged. Apply inside
+    ``login_required``, since keys are scoped per user.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return view(request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({
+                'success': False,
+                'errors': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'
+            }, status=400)
+
+        fingerprint = request_fingerprint(request)
+        record, claimed = claim(request.user, key, fingerprint)
+
+        if not claimed:
+            if record is not None and record.fingerprint != fingerprint:
+                return JsonResponse({
+                    'success': False,
+                    'errors': f'{HEADER} was already used for a different request'
+                }, status=422)
+            if record is not None and record.status_code is None:
+                record = wait_for(record)
+            if record is None or record.status_code is None:
+                response = JsonResponse({
+                    'success': False,
+                    'errors': 'A request with this key is still in progress'
+                }, status=409)
+                response['Retry-After'] = '1'
+                return response
+            return replay(record)
+
+        keys = IdempotencyKey.objects.for_user(request.user).filter(pk=record.pk)
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            keys.delete()
+            raise
+
+        if 200 <= response.status_code < 300 and not response.streaming:
+            keys.update(
+                status_code=response.status_code,
+                content_type=response.get('Content-Type', ''),
+                response_body=response.content,
+            )
+        else:
+            keys.delete()
+        return response
+
+    return wrapper
@@ -0,0 +1,289 @@
+"""
+HTTP load generator for the ``loadtest`` management command.
+
+Each virtual user is an asyncio task with its own keep-alive connection and
+session cookie. It replays ``SCENARIO`` (weighted random steps that browse
+the dashboard and transaction list, create, update and delete transactions
+through ``/api/transactions/*`` and download the CSV) until the deadline.
+Latencies are recorded per step and summarised as throughput, p50/p95/p99
+and error rates.
+
+The client is a small HTTP/1.1 implementation on ``asyncio`` streams. It
+supports Content-Length, chunked and read-until-close bodies, so the tool
+needs no third-party packages.
+"""
+import asyncio
+import datetime
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+SCENARIO = (
+    # (step, weight)
+    ('dashboard', 30),
+    ('transactions', 15),
+    ('transactions_filtered', 15),
+    ('create', 15),
+    ('update', 10),
+    ('delete', 5),
+    ('download_csv', 5),
+)
+
+REQUEST_TIMEOUT = 30
+
+
+class HttpError(Exception):
+    """The server closed the connection or sent something unparseable"""
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened when the server closes it"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body=b''):
+        """``(status, headers, body)``; retried once on a stale keep-alive connection"""
+        for attempt in (1, 2):
+            fresh = self.writer is None
+            if fresh:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._exchange(method, path, headers, body)
+            except (HttpError, ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if fresh or attempt == 2:
+                    raise
+
+    async def _exchange(self, method, path, headers, body):
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError('connection closed')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f'bad status line {status_line!r}')
+
+        response_headers = {}
+        cookies = []
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                cookies.append(value)
+            response_headers[name] = value
+        response_headers['set-cookie'] = cookies
+
+        if 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = await self._read_chunked()
+        else:
+            content = await self.reader.read()
+            await self.close()
+            return status, response_headers, content
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, response_headers, content
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+
+class Stats:
+    """Latencies and outcomes per step"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, step, seconds, status):
+        self.latencies.setdefault(step, []).append(seconds)
+        key = str(status)
+        counts = self.statuses.setdefault(step, {})
+        counts[key] = counts.get(key, 0) + 1
+        # Every scenario step expects 200; a 302 is a lost session
+        if status != 200:
+            self.errors[step] = self.errors.get(step, 0) + 1
+
+    @staticmethod
+    def percentile(ordered, fraction):
+        """Nearest-rank percentile of an already sorted list"""
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for step, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            errors = self.errors.get(step, 0)
+            endpoints[step] = {
+                'requests': len(ordered),
+                'throughput': round(len(ordered) / elapsed, 2),
+                'errors': errors,
+                'error_rate': round(errors / len(ordered), 4),
+                'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+                'p50_ms': round(self.percentile(ordered, 0.50) * 1000, 2),
+                'p95_ms': round(self.percentile(ordered, 0.95) * 1000, 2),
+                'p99_ms': round(self.percentile(ordered, 0.99) * 1000, 2),
+                'statuses': self.statuses[step],
+            }
+        total = sum(item['requests'] for item in endpoints.values())
+        errors = sum(item['errors'] for item in endpoints.values())
+        return {
+            'requests': total,
+            'throughput': round(total / elapsed, 2) if elapsed else 0,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'endpoints': endpoints,
+        }
+
+
+class VirtualUser:
+    """One logged-in user replaying the scenario on its own connection"""
+
+    def __init__(self, base_url, session_cookie, stats, rng, think_time=0):
+        url = urlsplit(base_url)
+        self.connection = Connection(url.hostname, url.port or 80)
+        self.csrf_token = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(32))
+        self.cookies = {**session_cookie, 'csrftoken': self.csrf_token}
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.category_ids = []
+        self.transaction_ids = []
+
+    async def fetch(self, method, path, data=None):
+        headers = {'Cookie': '; '.join(f'{name}={value}' for name, value in self.cookies.items())}
+        body = b''
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.csrf_token
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            body = urlencode(data or {}).encode()
+        status, response_headers, content = await asyncio.wait_for(
+            self.connection.request(method, path, headers, body), REQUEST_TIMEOUT
+        )
+        for cookie in response_headers['set-cookie']:
+            name, _, value = cookie.split(';')[0].partition('=')
+            self.cookies[name.strip()] = value.strip()
+        # The header must match whatever the cookie now holds
+        self.csrf_token = self.cookies['csrftoken']
+        return status, content
+
+    async def step(self, name):
+        if name in ('update', 'delete') and not self.transaction_ids:
+            name = 'create'
+        start = time.perf_counter()
+        try:
+            status = await getattr(self, name)()
+        except Exception as e:
+            status = type(e).__name__
+            await self.connection.close()
+        self.stats.record(name, time.perf_counter() - start, status)
+
+    async def setup(self):
+        status, content = await self.fetch('GET', '/api/categories/')
+        if status != 200:
+            raise HttpError(f'/api/categories/ answered {status}; is the session valid?')
+        self.category_ids = [row['id'] for row in json.loads(content) if row['type'] == 'expense']
+
+    async def run(self, deadline):
+        steps, weights = zip(*SCENARIO)
+        while time.monotonic() < deadline:
+            await self.step(self.rng.choices(steps, weights)[0])
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+        await self.connection.close()
+
+    # Scenario steps; each returns the response status
+
+    async def dashboard(self):
+        return (await self.fetch('GET', '/dashboard/'))[0]
+
+    async def transactions(self):
+        return (await self.fetch('GET', '/transactions/'))[0]
+
+    async def transactions_filtered(self):
+        today = datetime.date.today()
+        query = self.rng.choice([
+            {'type': 'expense'},
+            {'category': self.rng.choice(self.category_ids)} if self.category_ids else {'type': 'income'},
+            {'date_from': (today - datetime.timedelta(days=30)).isoformat(), 'date_to': today.isoformat()},
+        ])
+        return (await self.fetch('GET', '/transactions/?' + urlencode(query)))[0]
+
+    async def create(self):
+        status, content = await self.fetch('POST', '/api/transactions/create/', {
+            'transaction-type': 'expense',
+            'amount': f'{self.rng.uniform(1, 200):.2f}',
+            'category': self.rng.choice(self.category_ids) if self.category_ids else '',
+            'date': (datetime.date.today() - datetime.timedelta(days=self.rng.randrange(60))).isoformat(),
+            'description': 'Load test',
+            'payment_method': 'card',
+        })
+        if status == 200:
+            transaction_id = json.loads(content).get('transaction_id')
+            if transaction_id:
+                self.transaction_ids.append(transaction_id)
+        return status
+
+    async def update(self):
+        transaction_id = self.rng.choice(self.transaction_ids)
+        return (await self.fetch('POST', f'/api/transactions/{transaction_id}/update/', {
+            'amount': f'{self.rng.uniform(1, 200):.2f}',
+        }))[0]
+
+    async def delete(self):
+        transaction_id = self.transaction_ids.pop(self.rng.randrange(len(self.transaction_ids)))
+        return (await self.fetch('POST', f'/api/transactions/{transaction_id}/delete/'))[0]
+
+    async def download_csv(self):
+        return (await self.fetch('GET', '/download-csv/'))[0]
+
+
+async def run(base_url, sessions, duration, think_time=0, seed=None):
+    """
+    Replay the scenario with one virtual user per session cookie
+    (``{name: value}``) for ``duration`` seconds; returns the summary dict
+    """
+    rng = random.Random(seed)
+    stats = Stats()
+    users = [
+        VirtualUser(base_url, cookie, stats, random.Random(rng.random()), think_time)
+        for cookie in sessions
+    ]
+    await asyncio.gather(*(user.setup() for user in users))
+
+    start = time.monotonic()
+    await asyncio.gather(*(user.run(start + duration) for user in users))
+    return stats.summary(time.monotonic() - start)
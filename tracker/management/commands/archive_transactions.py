@@ -0,0 +1,118 @@
+import shutil
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from tracker import archive
+from tracker.currency import converted_sum, convert
+from tracker.models import Transaction, UserProfile, ArchivedMonth
+from tracker.sharding import fan_out
+
+
+ARCHIVE_FIELDS = (
+    'id', 'date', 'amount', 'transaction_type', 'category__name',
+    'description', 'payment_method', 'currency',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move transactions dated before --before YYYY into per-user archive "
+        "files and record a summary per archived month"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=int, required=True, help='Archive years before this one')
+        parser.add_argument('--user', help='Only archive this username')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per DELETE statement (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        current_year = timezone.now().year
+        if options['before'] > current_year:
+            raise CommandError(f"Only closed years can be archived; use --before {current_year} or earlier")
+
+        cutoff = date(options['before'], 1, 1)
+        # Transactions may live on any shard; collect owners from each of them
+        user_ids = set().union(*fan_out(lambda alias: set(
+            Transaction.objects.using(alias).filter(date__lt=cutoff).values_list('user_id', flat=True).distinct()
+        )).values())
+        users = User.objects.filter(pk__in=user_ids).order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        for user in users:
+            currency = UserProfile.objects.filter(user=user).values_list('currency', flat=True).first() or 'birr'
+            live = Transaction.objects.for_user(user).filter(date__lt=cutoff)
+            for year in sorted({d.year for d in live.dates('date', 'year')}):
+                year_qs = live.filter(date__gte=date(year, 1, 1), date__lt=date(year + 1, 1, 1))
+                self.archive_year(user, year, year_qs, currency, options)
+
+    def archive_year(self, user, year, year_qs, currency, options):
+        rows = list(year_qs.values(*ARCHIVE_FIELDS))
+        if options['dry_run']:
+            self.stdout.write(f"{user.username} {year}: {len(rows)} transactions")
+            return
+
+        summaries = self.summarise(year_qs, currency)
+        tmp_path, final_path = archive.write_year(user.pk, year, rows)
+        try:
+            with transaction.atomic(using=year_qs.db):
+                for month, data in summaries.items():
+                    self.merge_summary(user, month, currency, data)
+
+                ids = [row['id'] for row in rows]
+                for start in range(0, len(ids), options['batch_size']):
+                    year_qs.filter(pk__in=ids[start:start + options['batch_size']]).delete()
+
+                # Last, so a failure above leaves the old archive in place;
+                # write_year() drops re-archived ids if the commit fails
+                archive.publish(tmp_path, final_path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {len(rows)} transactions for {user.username} {year}"))
+
+    def summarise(self, year_qs, currency):
+        summaries = {}
+        by_month = year_qs.annotate(month=TruncMonth('date'))
+
+        for item in by_month.values('month', 'transaction_type').annotate(
+            total=converted_sum(currency), count=Count('id')
+        ).order_by():
+            data = summaries.setdefault(item['month'], {'income': 0, 'expense': 0, 'count': 0, 'categories': {}})
+            data[item['transaction_type']] += item['total']
+            data['count'] += item['count']
+
+        for item in by_month.filter(transaction_type='expense').values('month', 'category__name').annotate(
+            total=converted_sum(currency)
+        ).order_by():
+            name = item['category__name'] or 'Uncategorized'
+            summaries[item['month']]['categories'][name] = item['total']
+
+        return summaries
+
+    def merge_summary(self, user, month, currency, data):
+        summary, created = ArchivedMonth.objects.for_user(user).get_or_create(
+            user=user, month=month, defaults={'currency': currency}
+        )
+        categories = {name: convert(total, summary.currency, currency, month)
+                      for name, total in summary.category_totals.items()}
+        for name, total in data['categories'].items():
+            categories[name] = categories.get(name, 0) + total
+
+        summary.income = convert(summary.income, summary.currency, currency, month) + data['income']
+        summary.expenses = convert(summary.expenses, summary.currency, currency, month) + data['expense']
+        summary.transaction_count += data['count']
+        summary.category_totals = {name: str(total) for name, total in categories.items()}
+        summary.currency = currency
+        summary.save()
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tracker.fragments import bump
+from tracker.models import BudgetAlert, Category, CategoryRule, Transaction
+from tracker.sharding import fan_out
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge transactions and categories soft-deleted more than "
+        "TRACKER_UNDO_WINDOW seconds ago, in batches, on every database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be purged')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per UPDATE/DELETE statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.TRACKER_UNDO_WINDOW)
+        batch_size = options['batch_size']
+
+        def compact(alias):
+            transactions = Transaction.all_objects.using(alias).filter(deleted_at__lt=cutoff)
+            categories = Category.all_objects.using(alias).filter(deleted_at__lt=cutoff)
+            if options['dry_run']:
+                return transactions.count(), categories.count()
+            return self.purge(alias, transactions, batch_size), self.purge_categories(alias, categories, batch_size)
+
+        for alias, (transactions, categories) in sorted(fan_out(compact).items()):
+            verb = 'would purge' if options['dry_run'] else 'purged'
+            self.stdout.write(f"{alias}: {verb} {transactions} transaction(s), {categories} categor{'y' if categories == 1 else 'ies'}")
+
+    def purge(self, alias, queryset, batch_size):
+        """Delete ``queryset`` in short transactions of ``batch_size`` rows"""
+        purged = 0
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return purged
+            with transaction.atomic(using=alias):
+                purged += queryset.model.all_objects.using(alias).filter(pk__in=ids)._raw_delete(alias)
+
+    def purge_categories(self, alias, categories, batch_size):
+        """
+        Do what ``on_delete`` would have done inside the user's request:
+        un-categorize the transactions (SET_NULL) and drop the budget alerts
+        and rules (CASCADE), a batch at a time, then delete the categories
+        themselves
+        """
+        purged = 0
+        while True:
+            batch = list(categories.values_list('pk', 'user_id')[:batch_size])
+            if not batch:
+                return purged
+            category_ids = [pk for pk, _ in batch]
+
+            linked = Transaction.all_objects.using(alias).filter(category_id__in=category_ids)
+            while True:
+                ids = list(linked.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                with transaction.atomic(using=alias):
+                    Transaction.all_objects.using(alias).filter(pk__in=ids).update(category=None)
+
+            with transaction.atomic(using=alias):
+                BudgetAlert.objects.using(alias).filter(category_id__in=category_ids)._raw_delete(alias)
+                CategoryRule.objects.using(alias).filter(category_id__in=category_ids)._raw_delete(alias)
+                purged += Category.all_objects.using(alias).filter(pk__in=category_ids)._raw_delete(alias)
+
+            # Transaction rows showed the deleted category's name until now
+            for user_id in {user_id for _, user_id in batch}:
+                bump(user_id, 'categories', 'transactions')
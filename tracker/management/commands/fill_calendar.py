@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from tracker.models import CalendarDay
+from tracker.periods import FILL_END, FILL_START, calendar_days
+from tracker.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Add CalendarDay rows (day -> week, month, quarter, year) for a date "
+        "range on every database; existing days are left alone"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, default=FILL_START, help='First day, YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, default=FILL_END, help='Last day, YYYY-MM-DD')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Rows per bulk insert (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['end'] < options['start']:
+            raise CommandError("--end is before --start")
+
+        days = list(calendar_days(options['start'], options['end']))
+        # Grouping runs inside per-user queries, so every shard needs a copy
+        for alias in [DEFAULT_DB_ALIAS, *shard_aliases()]:
+            CalendarDay.objects.using(alias).bulk_create(
+                days, batch_size=options['batch_size'], ignore_conflicts=True
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Calendar covers {options['start']} to {options['end']} ({len(days)} days)"
+        ))
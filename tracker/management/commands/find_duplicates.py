@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, Min
+
+from tracker.duplicates import split
+from tracker.models import Transaction
+from tracker.sharding import fan_out
+
+
+class Command(BaseCommand):
+    help = (
+        "Report clusters of transactions with the same fingerprint (type, amount, "
+        "currency, payment method, description) within --window days of each other"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only check this username')
+        parser.add_argument(
+            '--window', type=int, default=settings.TRACKER_DUPLICATE_WINDOW,
+            help=f'Days apart that still count as a duplicate (default: {settings.TRACKER_DUPLICATE_WINDOW})'
+        )
+        parser.add_argument('--limit', type=int, default=100, help='Clusters to list (default: 100)')
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options['user']:
+            user_id = User.objects.values_list('pk', flat=True).get(username=options['user'])
+
+        def clusters(alias):
+            transactions = Transaction.objects.using(alias).exclude(fingerprint='')
+            if user_id is not None:
+                transactions = transactions.filter(user_id=user_id)
+
+            # One grouped pass over the (user, fingerprint, date) index
+            groups = transactions.values('user_id', 'fingerprint').annotate(
+                count=Count('pk'), first=Min('date'), last=Max('date')
+            ).filter(count__gt=1).order_by()
+
+            found = []
+            spread = []
+            for group in groups:
+                if (group['last'] - group['first']).days <= options['window']:
+                    found.append((group['user_id'], group['fingerprint'], group['count'], group['first'], group['last']))
+                else:
+                    # e.g. a monthly bill: only rows close together are duplicates
+                    spread.append((group['user_id'], group['fingerprint']))
+
+            for user, fingerprint in spread:
+                dates = transactions.filter(user_id=user, fingerprint=fingerprint).order_by('date').values_list('date', 'pk')
+                for cluster in split(dates, options['window']):
+                    found.append((user, fingerprint, len(cluster), cluster[0][0], cluster[-1][0]))
+            return found
+
+        found = [cluster for clusters_on in fan_out(clusters).values() for cluster in clusters_on]
+        found.sort(key=lambda cluster: (-cluster[2], cluster[3]))
+
+        usernames = dict(User.objects.filter(pk__in={cluster[0] for cluster in found}).values_list('pk', 'username'))
+        for user, fingerprint, count, first, last in found[:options['limit']]:
+            sample = Transaction.objects.for_user(user).filter(
+                fingerprint=fingerprint, date__range=(first, last)
+            ).values('transaction_type', 'amount', 'currency', 'description').first()
+            days = first.isoformat() if first == last else f"{first}..{last}"
+            self.stdout.write(
+                f"{usernames.get(user, user)}: {count}x {days} {sample['transaction_type']} "
+                f"{sample['amount']} {sample['currency']} {sample['description'][:40]!r}"
+            )
+
+        extra = sum(cluster[2] - 1 for cluster in found)
+        self.stdout.write(self.style.SUCCESS(f"{len(found)} cluster(s), {extra} duplicate transaction(s)"))
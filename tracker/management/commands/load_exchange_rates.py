@@ -0,0 +1,69 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from tracker.currency import rates_changed
+from tracker.models import ExchangeRate, CURRENCY_SYMBOLS
+from tracker.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Load exchange rates from a local CSV file with the columns "
+        "date,base,quote,rate (e.g. 2024-01-31,usd,birr,56.75)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the CSV file')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per bulk insert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        rates = []
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8') as handle:
+                for line_no, row in enumerate(csv.DictReader(handle), start=2):
+                    rates.append(self.parse_row(row, line_no))
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['csv_path']}: {e}")
+
+        # Rates are reference data: every shard keeps a full copy so
+        # conversions can run inside per-user queries
+        for alias in [DEFAULT_DB_ALIAS, *shard_aliases()]:
+            ExchangeRate.objects.using(alias).bulk_create(
+                rates,
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['base_currency', 'quote_currency', 'date'],
+                update_fields=['rate'],
+            )
+        rates_changed()
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(rates)} exchange rates"))
+
+    def parse_row(self, row, line_no):
+        base = (row.get('base') or '').strip().lower()
+        quote = (row.get('quote') or '').strip().lower()
+        if base not in CURRENCY_SYMBOLS or quote not in CURRENCY_SYMBOLS:
+            raise CommandError(f"Line {line_no}: unsupported currency pair {base!r}/{quote!r}")
+
+        try:
+            rate_date = date.fromisoformat((row.get('date') or '').strip())
+            rate = Decimal((row.get('rate') or '').strip())
+        except (ValueError, InvalidOperation):
+            raise CommandError(f"Line {line_no}: invalid date or rate")
+
+        if rate <= 0:
+            raise CommandError(f"Line {line_no}: rate must be positive")
+
+        return ExchangeRate(
+            base_currency=base,
+            quote_currency=quote,
+            date=rate_date,
+            rate=rate,
+        )
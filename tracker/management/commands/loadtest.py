@@ -0,0 +1,159 @@
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker import loadtest
+from tracker.provisioning import provision
+
+
+SERVERS = {
+    'runserver': (None, lambda host, port, workers: [
+        sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', f'{host}:{port}', '--noreload',
+    ]),
+    'gunicorn': ('gunicorn', lambda host, port, workers: [
+        sys.executable, '-m', 'gunicorn', 'finance_tracker.wsgi:application',
+        '--bind', f'{host}:{port}', '--workers', str(workers),
+    ]),
+    'uvicorn': ('uvicorn', lambda host, port, workers: [
+        sys.executable, '-m', 'uvicorn', 'finance_tracker.asgi:application',
+        '--host', host, '--port', str(port), '--workers', str(workers), '--no-access-log',
+    ]),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted browse/create/update/delete/export scenario with "
+        "many concurrent logged-in users against a local server, and report "
+        "throughput and p50/p95/p99 latency per endpoint as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Concurrent virtual users (default: 50)')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run (default: 30)')
+        parser.add_argument(
+            '--server', choices=sorted(SERVERS), default='runserver',
+            help='Server to start for the run (default: runserver); ignored with --url'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='gunicorn/uvicorn workers')
+        parser.add_argument('--port', type=int, default=8765, help='Port for the started server (default: 8765)')
+        parser.add_argument('--url', help='Use an already running server at this URL instead')
+        parser.add_argument(
+            '--think-time', type=float, default=0,
+            help='Mean pause in seconds between a user\'s requests (default: 0)'
+        )
+        parser.add_argument('--seed', type=int, help='Random seed, for repeatable scenarios')
+        parser.add_argument(
+            '--throttle', action='store_true',
+            help='Keep per-user write throttling on in the started server (off by default, '
+                 'since virtual users send requests back to back)'
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        sessions = self.login_users(options['users'])
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            base_url = f"http://127.0.0.1:{options['port']}"
+            server = self.start_server(options['server'], options['port'], options['workers'], options['throttle'])
+        try:
+            started_at = timezone.now()
+            report = asyncio.run(loadtest.run(
+                base_url, sessions, options['duration'], options['think_time'], options['seed']
+            ))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        report = {
+            'started_at': started_at.isoformat(),
+            'url': base_url,
+            'server': None if options['url'] else options['server'],
+            'settings': os.environ.get('DJANGO_SETTINGS_MODULE'),
+            'users': options['users'],
+            'duration': options['duration'],
+            'think_time': options['think_time'],
+            **report,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2)
+        self.print_report(report)
+
+    def login_users(self, count):
+        """
+        Session cookies for ``count`` load-test users, created on first use.
+        Sessions are written directly (as ``Client.force_login()`` does), so
+        password hashing stays out of the measurement.
+        """
+        usernames = [f'loadtest-{i}' for i in range(count)]
+        provision([
+            {
+                'username': username, 'email': '', 'password': '', 'first_name': '', 'last_name': '',
+                'currency': 'usd', 'timezone': 'UTC',
+            }
+            for username in usernames
+        ])
+
+        store_class = import_module(settings.SESSION_ENGINE).SessionStore
+        backend = settings.AUTHENTICATION_BACKENDS[0]
+        sessions = []
+        for user in User.objects.filter(username__in=usernames).order_by('pk'):
+            session = store_class()
+            session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+            session[BACKEND_SESSION_KEY] = backend
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.save()
+            sessions.append({settings.SESSION_COOKIE_NAME: session.session_key})
+        return sessions
+
+    def start_server(self, name, port, workers, throttle=False):
+        module, command = SERVERS[name]
+        if module and importlib.util.find_spec(module) is None:
+            raise CommandError(f"{name} is not installed (pip install {module})")
+
+        env = dict(os.environ)
+        if not throttle:
+            env['TRACKER_THROTTLE_BURST'] = '0'
+        process = subprocess.Popen(
+            command('127.0.0.1', port, workers),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"{name} exited with status {process.returncode}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f"{name} did not start listening on port {port}")
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['requests']:,} requests in {report['duration']:.0f}s with {report['users']} users: "
+            f"{report['throughput']:.1f} req/s, {report['error_rate']:.2%} errors"
+        )
+        self.stdout.write(f"{'endpoint':<24}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}")
+        for name, item in report['endpoints'].items():
+            self.stdout.write(
+                f"{name:<24}{item['requests']:>10,}{item['throughput']:>9.1f}{item['p50_ms']:>9.1f}"
+                f"{item['p95_ms']:>9.1f}{item['p99_ms']:>9.1f}{item['error_rate']:>9.2%}"
+            )
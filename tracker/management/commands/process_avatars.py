@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from tracker import avatars
+from tracker.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate missing avatar thumbnails (avatars uploaded before thumbnails "
+        "existed, or whose background job was lost) in this process"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate every avatar, not just unprocessed ones')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the avatars to process')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.exclude(Q(avatar='') | Q(avatar__isnull=True))
+        if not options['all']:
+            profiles = profiles.filter(avatar_digest='')
+
+        names = list(profiles.values_list('pk', 'avatar'))
+        if options['dry_run']:
+            self.stdout.write(f"Would process {len(names)} avatar(s)")
+            return
+
+        processed = failed = 0
+        for profile_id, name in names:
+            try:
+                processed += avatars.process(profile_id, name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} avatar(s), {failed} failed"))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.provisioning import ProvisioningError, provision, read_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users, their profiles and default categories in bulk from a "
+        "CSV file with the columns username,email,password,first_name,"
+        "last_name,currency,timezone (only username is required)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the CSV file')
+        parser.add_argument(
+            '--workers', type=int,
+            help='Processes hashing passwords (default: one per CPU)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per bulk insert (default: 1000)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8') as handle:
+                rows = read_csv(handle)
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['csv_path']}: {e}")
+        except ProvisioningError as e:
+            raise CommandError(str(e))
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(rows)} users are valid")
+            return
+
+        created, skipped = provision(rows, workers=options['workers'], batch_size=options['batch_size'])
+        for username in skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {username}: already exists"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {len(created)} users in {time.perf_counter() - start:.1f}s"
+        ))
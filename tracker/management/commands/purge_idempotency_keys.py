@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from tracker.idempotency import ABANDONED_AFTER
+from tracker.models import IdempotencyKey
+from tracker.sharding import fan_out
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete Idempotency-Key records older than TRACKER_IDEMPOTENCY_TTL "
+        "(and in-progress ones abandoned by a crashed worker) on every database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        stale = Q(created_at__lt=now - timedelta(seconds=settings.TRACKER_IDEMPOTENCY_TTL)) | Q(
+            status_code__isnull=True, created_at__lt=now - ABANDONED_AFTER
+        )
+
+        def purge(alias):
+            keys = IdempotencyKey.objects.using(alias).filter(stale)
+            return keys.count() if options['dry_run'] else keys._raw_delete(alias)
+
+        for alias, count in sorted(fan_out(purge).items()):
+            verb = 'would delete' if options['dry_run'] else 'deleted'
+            self.stdout.write(f"{alias}: {verb} {count} key(s)")
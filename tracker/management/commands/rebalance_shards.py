@@ -0,0 +1,106 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from tracker.models import (
+    Category, Transaction, BudgetAlert, FinancialReport, ArchivedMonth, IdempotencyKey, CategoryRule,
+    ShardAssignment,
+)
+from tracker.sharding import shard_aliases, placement, forget, mirror_user, drop_user
+
+
+# Parents before children so foreign keys resolve on the target shard
+SHARDED_MODELS = (Category, Transaction, BudgetAlert, FinancialReport, ArchivedMonth, IdempotencyKey, CategoryRule)
+
+
+class Command(BaseCommand):
+    help = (
+        "Show or change which shard each user's data lives on. Without --user, "
+        "moves every user whose shard differs from the default placement "
+        "(e.g. after TRACKER_SHARD_COUNT was raised). Users without a shard "
+        "yet are moved out of the default database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='store_true', help='Print users per shard and exit')
+        parser.add_argument('--user', help='Move only this username')
+        parser.add_argument('--to', help='Target shard alias for --user')
+        parser.add_argument('--dry-run', action='store_true', help='Report moves without copying data')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per INSERT/DELETE statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        aliases = shard_aliases()
+        if not aliases:
+            raise CommandError("Sharding is disabled; set TRACKER_SHARD_COUNT first")
+
+        if options['status']:
+            counts = Counter(ShardAssignment.objects.values_list('alias', flat=True))
+            for alias in aliases:
+                self.stdout.write(f"{alias}: {counts.pop(alias, 0)} users")
+            for alias, count in counts.items():
+                self.stdout.write(self.style.WARNING(f"{alias} (not configured): {count} users"))
+            return
+
+        if options['to'] and options['to'] not in aliases:
+            raise CommandError(f"Unknown shard {options['to']!r}; choose from {', '.join(aliases)}")
+        if options['to'] and not options['user']:
+            raise CommandError("--to requires --user")
+
+        users = User.objects.using(DEFAULT_DB_ALIAS).order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"No user named {options['user']!r}")
+
+        assigned = dict(ShardAssignment.objects.using(DEFAULT_DB_ALIAS).values_list('user_id', 'alias'))
+        moved = 0
+        for user in users.iterator():
+            source = assigned.get(user.pk, DEFAULT_DB_ALIAS)
+            target = options['to'] or placement(user.pk, aliases)
+            if source == target:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"{user.username}: {source} -> {target}")
+            else:
+                self.move_user(user, source, target, options['batch_size'])
+                self.stdout.write(self.style.SUCCESS(f"Moved {user.username}: {source} -> {target}"))
+            moved += 1
+
+        self.stdout.write(f"{moved} users {'to move' if options['dry_run'] else 'moved'}")
+
+    def move_user(self, user, source, target, batch_size):
+        """
+        Copy a user's rows to ``target`` then remove them from ``source``.
+
+        Rows are inserted raw with their original ids and timestamps. The
+        target copy is committed before the source is cleared, so a failure
+        part-way leaves the data readable from the (still assigned) source.
+        """
+        mirror_user(user, target)
+        with transaction.atomic(using=target):
+            for model in SHARDED_MODELS:
+                # Drop leftovers from an earlier interrupted move
+                model._base_manager.using(target).filter(user=user).delete()
+                fields = model._meta.concrete_fields
+                rows = list(model._base_manager.using(source).filter(user=user))
+                for start in range(0, len(rows), batch_size):
+                    model._base_manager.using(target)._insert(
+                        rows[start:start + batch_size], fields=fields, raw=True, using=target
+                    )
+
+        ShardAssignment.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+            user=user, defaults={'alias': target}
+        )
+        forget(user.pk)
+
+        with transaction.atomic(using=source):
+            if source == DEFAULT_DB_ALIAS:
+                for model in reversed(SHARDED_MODELS):
+                    model._base_manager.using(source).filter(user=user).delete()
+            else:
+                drop_user(user.pk, source)
@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tracker.fragments import bump
+from tracker.models import CategoryRule, Transaction
+from tracker.rules import matcher_for
+from tracker.sharding import fan_out
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply each user's categorisation rules to their existing transactions, "
+        "filling in uncategorised ones (or re-filing all with --overwrite)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only recategorize this username')
+        parser.add_argument('--overwrite', action='store_true', help='Also re-file transactions that have a category')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the transactions that would change')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Transactions read and updated per batch (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        # Rules may live on any shard; collect their owners from each of them
+        user_ids = set().union(*fan_out(lambda alias: set(
+            CategoryRule.objects.using(alias).filter(is_active=True).values_list('user_id', flat=True).distinct()
+        )).values())
+        users = User.objects.filter(pk__in=user_ids).order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        total = 0
+        for user in users:
+            changed = self.recategorize(user, options)
+            if changed:
+                verb = 'would re-file' if options['dry_run'] else 're-filed'
+                self.stdout.write(f"{user.username}: {verb} {changed} transaction(s)")
+            total += changed
+        self.stdout.write(self.style.SUCCESS(f"{total} transaction(s) across {len(users)} user(s)"))
+
+    def recategorize(self, user, options):
+        matcher = matcher_for(user)
+        if not len(matcher):
+            return 0
+
+        transactions = Transaction.objects.for_user(user).order_by('pk')
+        if not options['overwrite']:
+            transactions = transactions.filter(category__isnull=True)
+
+        changed = 0
+        last_pk = None
+        while True:
+            # Keyset pagination: updates do not shift later batches
+            batch = transactions if last_pk is None else transactions.filter(pk__gt=last_pk)
+            rows = list(batch.values_list(
+                'pk', 'category_id', 'transaction_type', 'payment_method', 'description', 'amount'
+            )[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            moves = defaultdict(list)
+            for pk, category_id, transaction_type, payment_method, description, amount in rows:
+                matched = matcher.match(transaction_type, payment_method, description, amount)
+                if matched is not None and matched != category_id:
+                    moves[matched].append(pk)
+            if not moves:
+                continue
+
+            changed += sum(len(pks) for pks in moves.values())
+            if options['dry_run']:
+                continue
+            # One UPDATE per target category instead of one per row
+            now = timezone.now()
+            with transaction.atomic(using=transactions.db):
+                for category_id, pks in moves.items():
+                    Transaction.objects.for_user(user).filter(pk__in=pks).update(
+                        category_id=category_id, updated_at=now
+                    )
+
+        if changed and not options['dry_run']:
+            bump(user.pk, 'transactions')
+        return changed
@@ -0,0 +1,43 @@
+import hashlib
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.vendor import vendor_files, vendor_url
+
+
+STATIC_DIR = Path(__file__).resolve().parents[2] / 'static'
+
+
+class Command(BaseCommand):
+    help = "Download pinned Tailwind, Chart.js, jQuery and Font Awesome files into tracker/static/vendor/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download files that already exist')
+        parser.add_argument('--timeout', type=int, default=30, help='Seconds per download (default: 30)')
+
+    def handle(self, *args, **options):
+        fetched = 0
+        for path, url in vendor_files():
+            target = STATIC_DIR / path
+            if target.exists() and not options['force']:
+                continue
+
+            try:
+                request = Request(url, headers={'User-Agent': 'finance-tracker vendor_assets'})
+                with urlopen(request, timeout=options['timeout']) as response:
+                    data = response.read()
+            except (URLError, OSError) as e:
+                raise CommandError(f"Cannot download {url}: {e}")
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            fetched += 1
+            self.stdout.write(f"{path}  {len(data):>9,} bytes  sha256 {hashlib.sha256(data).hexdigest()[:16]}")
+
+        vendor_url.cache_clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"Downloaded {fetched} files; run collectstatic to hash and compress them"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tracker.warmup import STEPS, warm_up
+
+
+class Command(BaseCommand):
+    help = "Pre-parse tracker templates, build the URL resolver and open database connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip', action='append', default=[], choices=[name for name, _ in STEPS],
+            help='Skip a warm-up step (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        for name, (count, seconds) in warm_up(skip=options['skip']).items():
+            self.stdout.write(f"{name:<10} {count:>4}  {seconds * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS("Warm-up complete"))
@@ -0,0 +1,116 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import profiling
+from .models import UserProfile
+
+
+class AuthCache:
+    """
+    Per-process TTL cache of authenticated users (with their profile loaded).
+
+    Entries are keyed by the session's user id, backend and auth hash.
+    Signals call ``invalidate()`` when a user (e.g. a password change) or
+    profile is saved or deleted; other worker processes pick the change up
+    within ``TRACKER_AUTH_CACHE_TTL`` seconds, when their entry expires.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, user = entry
+        if expires < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        # Views may modify request.user; never hand out the shared instance
+        return copy.deepcopy(user)
+
+    def set(self, key, user, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(user))
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+auth_cache = AuthCache()
+
+
+def get_cached_user(request):
+    ttl = settings.TRACKER_AUTH_CACHE_TTL
+    session = request.session
+    try:
+        key = (str(session[SESSION_KEY]), session[BACKEND_SESSION_KEY], session.get(HASH_SESSION_KEY))
+    except KeyError:
+        return auth.get_user(request)
+
+    if ttl:
+        user = auth_cache.get(key)
+        if user is not None:
+            return user
+
+    user = auth.get_user(request)
+    if ttl and user.is_authenticated:
+        # Load the profile too; most views need it and it is read-mostly
+        try:
+            user.profile
+        except UserProfile.DoesNotExist:
+            pass
+        auth_cache.set(key, user, ttl)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    ``AuthenticationMiddleware`` that reuses recently verified users.
+
+    ``django.contrib.auth.get_user()`` still does the full check (session
+    hash against the password, ``is_active``) on a cache miss; hits skip the
+    ``User`` and ``UserProfile`` queries.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+class ProfilingMiddleware:
+    """
+    Profile a view on demand (staff ``X-Profile`` header or ``?_profile=1``)
+    or for one in ``TRACKER_PROFILE_SAMPLE_RATE`` requests; see
+    ``tracker.profiling``. Keep it last so CSRF and authentication have run.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trigger = profiling.trigger_for(request, view_func, settings.TRACKER_PROFILE_SAMPLE_RATE)
+        if trigger is None:
+            return None
+        return profiling.profile_view(request, view_func, view_args, view_kwargs, trigger)
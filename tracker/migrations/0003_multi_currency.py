@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:56
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_remove_transaction_tracker_tra_user_id_ea3525_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(choices=[('birr', 'Ethiopian Birr (ETB)'), ('usd', 'US Dollar ($)'), ('eur', 'Euro (€)'), ('gbp', 'British Pound (£)')], default='birr', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_currency', models.CharField(choices=[('birr', 'Ethiopian Birr (ETB)'), ('usd', 'US Dollar ($)'), ('eur', 'Euro (€)'), ('gbp', 'British Pound (£)')], max_length=10)),
+                ('quote_currency', models.CharField(choices=[('birr', 'Ethiopian Birr (ETB)'), ('usd', 'US Dollar ($)'), ('eur', 'Euro (€)'), ('gbp', 'British Pound (£)')], max_length=10)),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, validators=[django.core.validators.MinValueValidator(0)])),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('base_currency', 'quote_currency', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:00
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Round
+import tracker.fields
+
+
+MONEY_COLUMNS = [
+    ('transaction', 'amount'),
+    ('category', 'monthly_budget'),
+]
+
+
+def to_minor_units(apps, schema_editor):
+    for model_name, field_name in MONEY_COLUMNS:
+        model = apps.get_model('tracker', model_name)
+        model.objects.using(schema_editor.connection.alias).update(**{
+            f'{field_name}_cents': Cast(
+                Round(F(field_name) * Value(100)), models.BigIntegerField()
+            )
+        })
+
+
+def from_minor_units(apps, schema_editor):
+    for model_name, field_name in MONEY_COLUMNS:
+        model = apps.get_model('tracker', model_name)
+        model.objects.using(schema_editor.connection.alias).update(**{
+            field_name: Cast(
+                F(f'{field_name}_cents') * Value(0.01),
+                models.DecimalField(max_digits=12, decimal_places=2)
+            )
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_multi_currency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_cents',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='monthly_budget_cents',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='monthly_budget',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.RunPython(to_minor_units, from_minor_units),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='monthly_budget',
+        ),
+        migrations.RenameField(
+            model_name='transaction',
+            old_name='amount_cents',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='category',
+            old_name='monthly_budget_cents',
+            new_name='monthly_budget',
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=tracker.fields.MoneyField(validators=[django.core.validators.MinValueValidator(0.01)]),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='monthly_budget',
+            field=tracker.fields.MoneyField(default=0, help_text='Monthly budget limit (for expense categories only)', validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
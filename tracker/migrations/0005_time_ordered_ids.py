@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:58
+
+from django.db import migrations, models
+import tracker.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_money_minor_units'),
+    ]
+
+    # The default is applied in Python, so only the migration state changes;
+    # this avoids rebuilding both tables on SQLite.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='category',
+                    name='id',
+                    field=models.UUIDField(default=tracker.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='transaction',
+                    name='id',
+                    field=models.UUIDField(default=tracker.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import tracker.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracker', '0005_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month')),
+                ('currency', models.CharField(choices=[('birr', 'Ethiopian Birr (ETB)'), ('usd', 'US Dollar ($)'), ('eur', 'Euro (€)'), ('gbp', 'British Pound (£)')], default='birr', max_length=10)),
+                ('income', tracker.fields.MoneyField(default=0)),
+                ('expenses', tracker.fields.MoneyField(default=0)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('category_totals', models.JSONField(default=dict)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_months', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('user', 'month')},
+            },
+        ),
+    ]
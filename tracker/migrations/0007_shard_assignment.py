@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tracker', '0006_archived_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardAssignment',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='shard_assignment', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('alias', models.CharField(max_length=50)),
+                ('assigned_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_shard_assignment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date', 'created_at'], name='tracker_tra_date_a0ee3a_idx'),
+        ),
+    ]
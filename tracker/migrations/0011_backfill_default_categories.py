@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations
+
+from tracker.models import DEFAULT_CATEGORIES
+
+
+def backfill_default_categories(apps, schema_editor):
+    """
+    Default categories used to be created lazily on the categories page;
+    they are now created at registration, so give existing users who never
+    opened that page theirs here
+    """
+    alias = schema_editor.connection.alias
+    if alias == 'default' and any(name.startswith('shard_') for name in settings.DATABASES):
+        return  # per-user rows live on the shards, each of which runs this too
+
+    User = apps.get_model('auth', 'User')
+    Category = apps.get_model('tracker', 'Category')
+    has_defaults = Category.objects.using(alias).filter(is_default=True).values('user_id')
+    for user_id in User.objects.using(alias).exclude(pk__in=has_defaults).values_list('pk', flat=True).iterator():
+        Category.objects.using(alias).bulk_create([
+            Category(user_id=user_id, name=name, category_type=category_type, icon=icon, is_default=True)
+            for name, category_type, icon in DEFAULT_CATEGORIES
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tracker', '0010_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_default_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracker', '0011_backfill_default_categories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('trigger', models.CharField(choices=[('staff', 'Requested by staff'), ('sample', 'Sampled')], max_length=10)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.TextField()),
+                ('view_name', models.CharField(max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField(help_text='Wall time under the profiler, which slows the view down')),
+                ('sql_count', models.PositiveIntegerField()),
+                ('sql_ms', models.FloatField()),
+                ('peak_memory', models.PositiveBigIntegerField(help_text='Peak bytes allocated by the view (tracemalloc)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:51
+
+from django.db import migrations, models
+import tracker.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_digest',
+            field=models.CharField(blank=True, editable=False, help_text="Content hash naming the avatar's thumbnails; empty until they are generated", max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to=tracker.models.avatar_upload_to),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:54
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+
+
+# Copied from tracker.periods as it was when this migration was written, so
+# later changes there do not change what the migration does
+FILL_START = date(2000, 1, 1)
+FILL_END = date(2050, 12, 31)
+
+
+def next_month(day):
+    return date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+
+
+def period_bounds(day):
+    """``{period: (start, end)}``, each end being the next period's first day"""
+    week = day - timedelta(days=day.weekday())
+    month = day.replace(day=1)
+    quarter = date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return {
+        'week': (week, week + timedelta(days=7)),
+        'month': (month, next_month(month)),
+        'quarter': (quarter, next_month(next_month(next_month(quarter)))),
+        'year': (date(day.year, 1, 1), date(day.year + 1, 1, 1)),
+    }
+
+
+def fill_calendar(apps, schema_editor):
+    """Reference data: every database (default and shards) gets the same rows"""
+    alias = schema_editor.connection.alias
+    CalendarDay = apps.get_model('tracker', 'CalendarDay')
+
+    def rows():
+        for offset in range((FILL_END - FILL_START).days + 1):
+            day = FILL_START + timedelta(days=offset)
+            row = CalendarDay(date=day, weekday=day.weekday())
+            for period, (start, end) in period_bounds(day).items():
+                setattr(row, f'{period}_start', start)
+                setattr(row, f'{period}_end', end)
+            yield row
+
+    CalendarDay.objects.using(alias).bulk_create(rows(), batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_avatar_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('weekday', models.PositiveSmallIntegerField(help_text='0 is Monday')),
+                ('week_start', models.DateField()),
+                ('week_end', models.DateField()),
+                ('month_start', models.DateField()),
+                ('month_end', models.DateField()),
+                ('quarter_start', models.DateField()),
+                ('quarter_end', models.DateField()),
+                ('year_start', models.DateField()),
+                ('year_end', models.DateField()),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.RunPython(fill_calendar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import tracker.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracker', '0014_calendar_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_type', models.CharField(choices=[('contains', 'Description contains'), ('regex', 'Description matches regex')], default='contains', max_length=10)),
+                ('pattern', models.CharField(blank=True, help_text='Matched case-insensitively; empty matches every description', max_length=200)),
+                ('min_amount', tracker.fields.MoneyField(blank=True, null=True)),
+                ('max_amount', tracker.fields.MoneyField(blank=True, null=True)),
+                ('payment_method', models.CharField(blank=True, choices=[('cash', 'Cash'), ('card', 'Credit/Debit Card'), ('bank', 'Bank Transfer'), ('mobile', 'Mobile Payment'), ('other', 'Other')], help_text='Empty matches every payment method', max_length=20)),
+                ('priority', models.PositiveSmallIntegerField(default=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='tracker.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['priority', 'created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:10
+
+from django.db import migrations, models
+import tracker.fields
+
+from tracker.duplicates import fingerprint
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """Fingerprint existing rows, in batches of primary keys"""
+    alias = schema_editor.connection.alias
+    Transaction = apps.get_model('tracker', 'Transaction')
+    rows = Transaction._base_manager.using(alias).order_by('pk')
+    last_pk = None
+    while True:
+        batch = list((rows if last_pk is None else rows.filter(pk__gt=last_pk)).only(
+            'pk', 'transaction_type', 'amount', 'currency', 'payment_method', 'description'
+        )[:2000])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        for row in batch:
+            row.fingerprint = fingerprint(row.transaction_type, row.amount, row.currency, row.payment_method, row.description)
+        Transaction._base_manager.using(alias).bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0015_category_rule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=tracker.fields.FingerprintField(blank=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'fingerprint', 'date'], name='transaction_fingerprint'),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
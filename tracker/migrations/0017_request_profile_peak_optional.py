@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0016_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requestprofile',
+            name='peak_memory',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Peak bytes allocated by the view (tracemalloc); empty when it could not be measured', null=True),
+        ),
+    ]
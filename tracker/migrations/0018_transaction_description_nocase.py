@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:54
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0017_request_profile_peak_optional'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(django.db.models.functions.comparison.Collate('description', 'NOCASE'), name='transaction_description_nocase'),
+        ),
+    ]
@@ -1,11 +1,100 @@
 from django.db import models
+from django.db.models.functions import Collate
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator
-import uuid
 
+from .duplicates import FINGERPRINT_FIELDS, fingerprint
+from .fields import FingerprintField, MoneyField
+from .ids import uuid7
 
-class Category(models.Model):
+
+CURRENCY_CHOICES = (
+    ('birr', 'Ethiopian Birr (ETB)'),
+    ('usd', 'US Dollar ($)'),
+    ('eur', 'Euro (€)'),
+    ('gbp', 'British Pound (£)'),
+)
+
+CURRENCY_SYMBOLS = {
+    'birr': 'birr',
+    'usd': '$',
+    'eur': '€',
+    'gbp': '£',
+}
+
+# (name, type, icon) of the categories every new user starts with
+DEFAULT_CATEGORIES = (
+    ('Food', 'expense', '🍔'),
+    ('Transport', 'expense', '🚗'),
+    ('Shopping', 'expense', '🛍️'),
+    ('Bills', 'expense', '📄'),
+    ('Entertainment', 'expense', '🎬'),
+    ('Other', 'expense', '📦'),
+    
+    ('Salary', 'income', '💼'),
+    ('Freelance', 'income', '💻'),
+    ('Gifts', 'income', '🎁'),
+    ('Other Income', 'income', '💰'),
+)
+
+
+class UserScopedQuerySet(models.QuerySet):
+    """QuerySet for per-user data, which may live on a shard database"""
+    
+    def for_user(self, user):
+        from .sharding import shard_for
+        return self.using(shard_for(user)).filter(user=user)
+
+
+class SoftDeleteQuerySet(UserScopedQuerySet):
+    """
+    QuerySet for rows that are hidden by setting ``deleted_at`` and purged
+    later by the ``compact_deleted`` command
+    """
+    
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+    
+    def soft_delete(self):
+        return self.update(deleted_at=timezone.now())
+    
+    def restore(self):
+        return self.update(deleted_at=None)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Default manager that leaves out soft-deleted rows"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    Deleting through ``soft_delete()`` is a single-row UPDATE; related rows
+    are only touched when ``compact_deleted`` purges the row, and until
+    then ``restore()`` undoes it. ``objects`` hides deleted rows,
+    ``all_objects`` includes them; ``delete()`` still deletes for real.
+    """
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+    
+    def restore(self):
+        self.deleted_at = None
+        self.save(update_fields=['deleted_at'])
+
+
+class Category(SoftDeleteModel):
     """
     Expense/Income Categories
     """
@@ -14,15 +103,13 @@ class Category(models.Model):
         ('expense', 'Expense'),
     )
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories')
     name = models.CharField(max_length=100)
     category_type = models.CharField(max_length=10, choices=CATEGORY_TYPES)
     icon = models.CharField(max_length=10, default='📦')
-    monthly_budget = models.DecimalField(
-        max_digits=12, 
-        decimal_places=2, 
-        default=0.00,
+    monthly_budget = MoneyField(
+        default=0,
         validators=[MinValueValidator(0)],
         help_text="Monthly budget limit (for expense categories only)"
     )
@@ -34,12 +121,24 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
         unique_together = ['user', 'name', 'category_type']
         ordering = ['category_type', 'name']
+        indexes = [
+            # Only deleted rows are indexed; compact_deleted looks them up
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='category_deleted_at'),
+        ]
     
     def __str__(self):
         return f"{self.get_category_type_display()}: {self.name}"
+    
+    @classmethod
+    def defaults_for(cls, user_id):
+        """Unsaved ``DEFAULT_CATEGORIES`` for a new user"""
+        return [
+            cls(user_id=user_id, name=name, category_type=category_type, icon=icon, is_default=True)
+            for name, category_type, icon in DEFAULT_CATEGORIES
+        ]
 
 
-class Transaction(models.Model):
+class Transaction(SoftDeleteModel):
     """
     Financial Transactions (Income/Expenses)
     """
@@ -57,20 +156,17 @@ class Transaction(models.Model):
         ('other', 'Other'),
     )
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
-    amount = models.DecimalField(
-        max_digits=12, 
-        decimal_places=2,
-        validators=[MinValueValidator(0.01)]
-    )
+    amount = MoneyField(validators=[MinValueValidator(0.01)])
     category = models.ForeignKey(
         Category, 
         on_delete=models.SET_NULL, 
         null=True, 
         related_name='transactions'
     )
+    currency = models.CharField(max_length=10, choices=CURRENCY_CHOICES, default='birr')
     description = models.TextField(blank=True)
     date = models.DateField(default=timezone.now)
     payment_method = models.CharField(
@@ -78,6 +174,8 @@ class Transaction(models.Model):
         choices=PAYMENT_METHODS, 
         default='cash'
     )
+    # See tracker.duplicates; kept up to date on every write
+    fingerprint = FingerprintField(default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -86,26 +184,46 @@ class Transaction(models.Model):
         indexes = [
             models.Index(fields=['user', 'date']),
             models.Index(fields=['user', 'transaction_type']),
+            # Cross-user listings (admin changelist, date hierarchy)
+            models.Index(fields=['date', 'created_at']),
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='transaction_deleted_at'),
+            # Duplicate lookups: same fingerprint within a date window
+            models.Index(fields=['user', 'fingerprint', 'date'], name='transaction_fingerprint'),
+            # Admin description search; SQLite only uses an index for
+            # LIKE 'term%' when it compares case-insensitively
+            models.Index(Collate('description', 'NOCASE'), name='transaction_description_nocase'),
         ]
     
     def __str__(self):
         return f"{self.transaction_type}: {self.amount} - {self.description[:50]}"
     
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None and set(update_fields) & set(FINGERPRINT_FIELDS):
+            update_fields = {*update_fields, 'fingerprint'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+    
+    def get_fingerprint(self):
+        return fingerprint(self.transaction_type, self.amount, self.currency, self.payment_method, self.description)
+    
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('transaction_detail', args=[str(self.id)])
+    
+    @property
+    def currency_symbol(self):
+        return CURRENCY_SYMBOLS.get(self.currency, 'birr')
+
+
+def avatar_upload_to(instance, filename):
+    """One directory per user, so replaced avatars and their thumbnails can be swept"""
+    return f'avatars/{instance.user_id}/{filename}'
 
 
 class UserProfile(models.Model):
     """
     Extended User Profile
     """
-    CURRENCY_CHOICES = (
-        ('birr', 'Ethiopian Birr (ETB)'),
-        ('usd', 'US Dollar ($)'),
-        ('eur', 'Euro (€)'),
-        ('gbp', 'British Pound (£)'),
-    )
+    CURRENCY_CHOICES = CURRENCY_CHOICES
     
     TIMEZONE_CHOICES = (
         ('Africa/Addis_Ababa', 'Africa/Addis Ababa (EAT)'),
@@ -115,7 +233,11 @@ class UserProfile(models.Model):
     )
     
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
-    avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar = models.ImageField(upload_to=avatar_upload_to, null=True, blank=True)
+    avatar_digest = models.CharField(
+        max_length=12, blank=True, editable=False,
+        help_text="Content hash naming the avatar's thumbnails; empty until they are generated"
+    )
     currency = models.CharField(max_length=10, choices=CURRENCY_CHOICES, default='birr')
     timezone = models.CharField(max_length=50, choices=TIMEZONE_CHOICES, default='Africa/Addis_Ababa')
     enable_notifications = models.BooleanField(default=True)
@@ -128,13 +250,10 @@ class UserProfile(models.Model):
     
     @property
     def currency_symbol(self):
-        symbols = {
-            'birr': 'birr',
-            'usd': '$',
-            'eur': '€',
-            'gbp': '£',
-        }
-        return symbols.get(self.currency, 'birr')
+        return CURRENCY_SYMBOLS.get(self.currency, 'birr')
+    
+    def avatar_thumbnail_name(self, size, extension):
+        return f'avatars/{self.user_id}/avatar.{self.avatar_digest}.{size}.{extension}'
 
 
 class BudgetAlert(models.Model):
@@ -153,6 +272,8 @@ class BudgetAlert(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = UserScopedQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['user', 'category']
     
@@ -160,6 +281,49 @@ class BudgetAlert(models.Model):
         return f"Alert for {self.category.name} at {self.threshold_percentage}%"
 
 
+class CategoryRule(models.Model):
+    """
+    Files transactions under ``category`` when their description matches
+    ``pattern`` and they meet the optional amount and payment method
+    conditions (tracker.rules). When several rules match, the lowest
+    ``priority`` wins.
+    """
+    MATCH_TYPES = (
+        ('contains', 'Description contains'),
+        ('regex', 'Description matches regex'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='category_rules')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='rules')
+    match_type = models.CharField(max_length=10, choices=MATCH_TYPES, default='contains')
+    pattern = models.CharField(
+        max_length=200, blank=True,
+        help_text="Matched case-insensitively; empty matches every description"
+    )
+    min_amount = MoneyField(null=True, blank=True)
+    max_amount = MoneyField(null=True, blank=True)
+    payment_method = models.CharField(
+        max_length=20, choices=Transaction.PAYMENT_METHODS, blank=True,
+        help_text="Empty matches every payment method"
+    )
+    priority = models.PositiveSmallIntegerField(default=100)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = UserScopedQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['priority', 'created_at']
+    
+    def __str__(self):
+        return f"{self.get_match_type_display()} {self.pattern!r} → {self.category.name}"
+    
+    def clean(self):
+        from .rules import validate_pattern
+        
+        validate_pattern(self.match_type, self.pattern)
+
+
 class FinancialReport(models.Model):
     """
     Generated Financial Reports
@@ -177,8 +341,147 @@ class FinancialReport(models.Model):
     file_path = models.FileField(upload_to='reports/', null=True, blank=True)
     generated_at = models.DateTimeField(auto_now_add=True)
     
+    objects = UserScopedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-generated_at']
     
     def __str__(self):
         return f"{self.report_type} Report - {self.month.strftime('%B %Y')}"
+
+
+
+class ExchangeRate(models.Model):
+    """
+    Daily exchange rates (1 unit of base currency = rate units of quote currency)
+    """
+    base_currency = models.CharField(max_length=10, choices=CURRENCY_CHOICES)
+    quote_currency = models.CharField(max_length=10, choices=CURRENCY_CHOICES)
+    date = models.DateField()
+    rate = models.DecimalField(
+        max_digits=18,
+        decimal_places=8,
+        validators=[MinValueValidator(0)]
+    )
+    
+    class Meta:
+        unique_together = ['base_currency', 'quote_currency', 'date']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.base_currency}/{self.quote_currency} {self.rate} on {self.date}"
+
+
+class CalendarDay(models.Model):
+    """
+    One row per day with the week (Monday first), month, quarter and year it
+    falls in (see tracker.periods). Each ``*_end`` is the first day of the
+    next period. Grouping joins this table on the date instead of calling
+    date functions per row. Like exchange rates, every shard has a copy.
+    """
+    date = models.DateField(primary_key=True)
+    weekday = models.PositiveSmallIntegerField(help_text="0 is Monday")
+    week_start = models.DateField()
+    week_end = models.DateField()
+    month_start = models.DateField()
+    month_end = models.DateField()
+    quarter_start = models.DateField()
+    quarter_end = models.DateField()
+    year_start = models.DateField()
+    year_end = models.DateField()
+    
+    class Meta:
+        ordering = ['date']
+    
+    def __str__(self):
+        return self.date.isoformat()
+
+
+class ArchivedMonth(models.Model):
+    """
+    Pre-aggregated summary of a month moved to the transaction archive
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_months')
+    month = models.DateField(help_text="First day of the archived month")
+    currency = models.CharField(max_length=10, choices=CURRENCY_CHOICES, default='birr')
+    income = MoneyField(default=0)
+    expenses = MoneyField(default=0)
+    transaction_count = models.IntegerField(default=0)
+    category_totals = models.JSONField(default=dict)  # Expense totals by category name
+    archived_at = models.DateTimeField(auto_now=True)
+    
+    objects = UserScopedQuerySet.as_manager()
+    
+    class Meta:
+        unique_together = ['user', 'month']
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"Archive for {self.user.username} - {self.month.strftime('%B %Y')}"
+
+
+class ShardAssignment(models.Model):
+    """
+    Database alias holding a user's rows when sharding is enabled
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='shard_assignment')
+    alias = models.CharField(max_length=50)
+    assigned_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} on {self.alias}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a mutating API request sent with an ``Idempotency-Key``
+    header, replayed when the same request is retried (tracker.idempotency)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the method, path and form data")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Empty while the request is in progress")
+    content_type = models.CharField(max_length=100, blank=True)
+    response_body = models.BinaryField(blank=True, default=b'')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    objects = UserScopedQuerySet.as_manager()
+    
+    class Meta:
+        unique_together = ['user', 'key']
+    
+    def __str__(self):
+        return f"{self.key} for {self.user.username}"
+
+
+class RequestProfile(models.Model):
+    """
+    A profiled request (tracker.profiling); the report and the raw pstats
+    dump are files named ``name`` under ``TRACKER_PROFILE_DIR``
+    """
+    TRIGGERS = (
+        ('staff', 'Requested by staff'),
+        ('sample', 'Sampled'),
+    )
+    
+    name = models.CharField(max_length=100, unique=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    trigger = models.CharField(max_length=10, choices=TRIGGERS)
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    view_name = models.CharField(max_length=200)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField(help_text="Wall time under the profiler, which slows the view down")
+    sql_count = models.PositiveIntegerField()
+    sql_ms = models.FloatField()
+    peak_memory = models.PositiveBigIntegerField(
+        null=True, blank=True,
+        help_text="Peak bytes allocated by the view (tracemalloc); empty when it could not be measured"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,93 @@
+"""
+Calendar periods (week, month, quarter, year) and each user's "today".
+
+Transaction dates are calendar dates as the user entered them. Mapping a
+day to its week or month therefore does not depend on a timezone, and the
+``CalendarDay`` table has one row per day for every user. The timezone
+only decides which day "today" is: ``local_today()`` uses the profile's
+timezone instead of the server's UTC date.
+
+``bounds()`` gives the ``[start, end)`` of a period for range filters on
+the ``(user, date)`` index; ``date__month``/``date__week`` lookups would
+call a date function on every row instead. ``bucket()`` groups rows by
+period by looking the date up in ``CalendarDay``. That replaces
+``TruncMonth`` and friends, which SQLite runs as Python callbacks.
+"""
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db.models import DateField, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CalendarDay
+
+
+PERIODS = ('week', 'month', 'quarter', 'year')
+
+# Range filled by migration 0014; extend it with fill_calendar
+FILL_START = date(2000, 1, 1)
+FILL_END = date(2050, 12, 31)
+
+
+def _next_month(day):
+    return date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+
+
+def bounds(day, period='month'):
+    """First day of the ``period`` containing ``day`` and of the one after"""
+    if period == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if period == 'month':
+        start = day.replace(day=1)
+        return start, _next_month(start)
+    if period == 'quarter':
+        start = date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+        return start, _next_month(_next_month(_next_month(start)))
+    if period == 'year':
+        return date(day.year, 1, 1), date(day.year + 1, 1, 1)
+    raise ValueError(f"Unknown period {period!r}; expected one of {', '.join(PERIODS)}")
+
+
+def trailing(day, period='month', count=6):
+    """``[(start, end), ...]`` of the ``count`` periods up to the one containing ``day``, oldest first"""
+    spans = [bounds(day, period)]
+    while len(spans) < count:
+        spans.insert(0, bounds(spans[0][0] - timedelta(days=1), period))
+    return spans
+
+
+def calendar_day(day):
+    """The ``CalendarDay`` row for ``day``"""
+    row = CalendarDay(date=day, weekday=day.weekday())
+    for period in PERIODS:
+        start, end = bounds(day, period)
+        setattr(row, f'{period}_start', start)
+        setattr(row, f'{period}_end', end)
+    return row
+
+
+def calendar_days(start, end):
+    """``CalendarDay`` rows from ``start`` to ``end`` inclusive"""
+    for offset in range((end - start).days + 1):
+        yield calendar_day(start + timedelta(days=offset))
+
+
+def bucket(period='month', prefix=''):
+    """Expression for the start of the ``period`` containing each row's ``{prefix}date``"""
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {', '.join(PERIODS)}")
+    return Subquery(
+        CalendarDay.objects.filter(date=OuterRef(f'{prefix}date')).values(f'{period}_start')[:1],
+        output_field=DateField()
+    )
+
+
+def local_today(timezone_name=None):
+    """Today's date in ``timezone_name`` (a profile's timezone), else the server's"""
+    if timezone_name:
+        try:
+            return timezone.localdate(timezone=ZoneInfo(timezone_name))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.localdate()
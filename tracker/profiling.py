@@ -0,0 +1,207 @@
+"""
+On-demand request profiling (``tracker.middleware.ProfilingMiddleware``).
+
+A staff user adds an ``X-Profile: 1`` header or ``?_profile=1`` to any
+request, and the view runs under ``cProfile``. Setting
+``TRACKER_PROFILE_SAMPLE_RATE`` to N also profiles one in N requests to
+``tracker`` views, for any user. When neither applies, the middleware does a
+header lookup and one comparison per request.
+
+Each profile records:
+- the call tree, saved as a report and as a raw pstats dump that opens in
+  snakeviz or ``python -m pstats``;
+- every SQL statement on every database, with its time (parameters are not
+  stored);
+- the view's peak ``tracemalloc`` allocation, unless something else has
+  tracemalloc running; the report then says why there is no peak.
+
+The profiler and tracemalloc are process-wide (cProfile is, from Python
+3.12), so one request is profiled at a time. A sampled request arriving
+while another is profiled runs unprofiled; a staff request waits up to
+``STAFF_WAIT`` seconds for its turn.
+
+Files are written to ``TRACKER_PROFILE_DIR``, and a ``RequestProfile`` row
+indexes them for the admin. Only the newest ``TRACKER_PROFILE_KEEP`` are
+kept. The profiler and tracemalloc slow the view down, so compare durations
+between profiles, not with unprofiled timings.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from .models import RequestProfile
+
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_FLAG = '_profile'
+
+REPORT_FUNCTIONS = 60
+REPORT_QUERIES = 50
+
+STAFF_WAIT = 30
+
+# Held by the request being profiled
+_profiling = threading.Lock()
+
+
+class QueryRecorder:
+    """``execute_wrapper`` collecting ``(alias, sql, seconds)`` for every statement"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((context['connection'].alias, sql, time.perf_counter() - start))
+
+
+def trigger_for(request, view_func, sample_rate):
+    """``'staff'``, ``'sample'`` or ``None`` (the common case, kept cheap)"""
+    if request.META.get(HEADER) or QUERY_FLAG in request.GET:
+        user = getattr(request, 'user', None)
+        return 'staff' if user is not None and user.is_active and user.is_staff else None
+    if (
+        sample_rate
+        and random.randrange(sample_rate) == 0
+        and getattr(view_func, '__module__', '').startswith('tracker.')
+        and not asyncio.iscoroutinefunction(view_func)
+    ):
+        return 'sample'
+    return None
+
+
+def profile_dir():
+    return Path(settings.TRACKER_PROFILE_DIR)
+
+
+def profile_view(request, view_func, view_args, view_kwargs, trigger):
+    """
+    Run the view under the profiler, SQL recorder and tracemalloc, and save
+    the result; ``None`` (run the view as usual) if another request holds
+    the profiler
+    """
+    if not _profiling.acquire(timeout=STAFF_WAIT if trigger == 'staff' else 0):
+        return None
+
+    recorder = QueryRecorder()
+    profiler = cProfile.Profile()
+    # Started outside this module (e.g. PYTHONTRACEMALLOC); not ours to reset
+    measuring = not tracemalloc.is_tracing()
+    if measuring:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            profiler.enable()
+            try:
+                response = view_func(request, *view_args, **view_kwargs)
+                # Lazy responses would otherwise render after the profiler stops
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+        peak = max(0, tracemalloc.get_traced_memory()[1] - baseline) if measuring else None
+    finally:
+        if measuring:
+            tracemalloc.stop()
+        _profiling.release()
+
+    record = save(request, response, view_func, trigger, duration, profiler, recorder.queries, peak)
+    response['X-Profile-Id'] = record.name
+    return response
+
+
+def save(request, response, view_func, trigger, duration, profiler, queries, peak):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    user = getattr(request, 'user', None)
+
+    record = RequestProfile(
+        name=name,
+        user=user if user is not None and user.is_authenticated else None,
+        trigger=trigger,
+        method=request.method,
+        path=request.get_full_path(),
+        view_name=f"{getattr(view_func, '__module__', '')}.{getattr(view_func, '__qualname__', view_func)}",
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        sql_count=len(queries),
+        sql_ms=sum(seconds for _, _, seconds in queries) * 1000,
+        peak_memory=peak,
+    )
+    profiler.dump_stats(directory / f'{name}.prof')
+    (directory / f'{name}.txt').write_text(report(record, profiler, queries), encoding='utf-8')
+    record.save(using=DEFAULT_DB_ALIAS)
+    prune()
+    return record
+
+
+def report(record, profiler, queries):
+    out = io.StringIO()
+    out.write(f"{record.method} {record.path} -> {record.status_code}\n")
+    out.write(f"view: {record.view_name}   trigger: {record.trigger}\n")
+    if record.peak_memory is None:
+        peak = "not measured (tracemalloc was already running)"
+    else:
+        peak = f"{record.peak_memory / 1024:.1f} KiB"
+    out.write(f"time: {record.duration_ms:.1f} ms (profiled)   peak allocation: {peak}\n")
+    out.write(f"SQL: {record.sql_count} statements, {record.sql_ms:.1f} ms\n")
+
+    if queries:
+        repeated = Counter(sql for _, sql, _ in queries)
+        out.write(f"\n--- Slowest SQL (of {len(queries)}) ---\n")
+        for alias, sql, seconds in sorted(queries, key=lambda query: -query[2])[:REPORT_QUERIES]:
+            times = f"  x{repeated[sql]}" if repeated[sql] > 1 else ''
+            out.write(f"{seconds * 1000:8.2f} ms  [{alias}]{times}  {sql}\n")
+
+    out.write("\n--- Call tree, by cumulative time ---\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_FUNCTIONS)
+    out.write("\n--- Callees of the project's own functions ---\n")
+    stats.print_callees(str(settings.BASE_DIR))
+    return out.getvalue()
+
+
+def report_path(record):
+    return profile_dir() / f'{record.name}.txt'
+
+
+def stats_path(record):
+    return profile_dir() / f'{record.name}.prof'
+
+
+def delete_files(records):
+    for record in records:
+        report_path(record).unlink(missing_ok=True)
+        stats_path(record).unlink(missing_ok=True)
+
+
+def prune():
+    """Keep only the newest ``TRACKER_PROFILE_KEEP`` profiles"""
+    old = list(RequestProfile.objects.using(DEFAULT_DB_ALIAS).only('pk', 'name')[settings.TRACKER_PROFILE_KEEP:])
+    if old:
+        delete_files(old)
+        RequestProfile.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=[record.pk for record in old]).delete()
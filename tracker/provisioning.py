@@ -0,0 +1,167 @@
+"""
+Bulk user provisioning from a CSV file (``provision_users`` and the user
+admin's "Provision users" page).
+
+Registering users one at a time runs the ``User`` post_save receivers per
+row. Here each table gets a few batched ``bulk_create`` calls instead, and
+``provision()`` does by hand what those receivers would have done for a new
+user:
+
+- ``UserProfile`` row (``create_user_profile``)
+- shard placement and auth row copy (``mirror_user_to_shard``)
+- default categories (``create_default_categories``)
+
+The version bumps and auth cache invalidation are skipped, because nothing is
+cached yet for a user who did not exist.
+
+CSV columns: ``username`` (required), ``email``, ``password``, ``first_name``,
+``last_name``, ``currency``, ``timezone``. Passwords are hashed in a process
+pool. A row without a password gets an unusable password, so the user sets
+one through the password reset flow.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .models import Category, UserProfile, CURRENCY_SYMBOLS
+from .sharding import assign_new_users
+
+
+class ProvisioningError(ValueError):
+    """The CSV cannot be provisioned as given"""
+
+
+def read_csv(handle):
+    """Validated rows from an open CSV file; raises ``ProvisioningError``"""
+    reader = csv.DictReader(handle)
+    if 'username' not in (reader.fieldnames or []):
+        raise ProvisioningError("The CSV needs a header row with at least a 'username' column")
+
+    timezones = dict(UserProfile.TIMEZONE_CHOICES)
+    default_currency = UserProfile._meta.get_field('currency').default
+    default_timezone = UserProfile._meta.get_field('timezone').default
+
+    rows, seen = [], set()
+    for line_no, row in enumerate(reader, start=2):
+        def value(column):
+            return (row.get(column) or '').strip()
+
+        username = value('username')
+        try:
+            User.username_validator(username)
+        except ValidationError:
+            raise ProvisioningError(f"Line {line_no}: invalid username {username!r}")
+        if username in seen:
+            raise ProvisioningError(f"Line {line_no}: duplicate username {username!r}")
+        seen.add(username)
+
+        currency = value('currency').lower() or default_currency
+        if currency not in CURRENCY_SYMBOLS:
+            raise ProvisioningError(f"Line {line_no}: unsupported currency {currency!r}")
+        tz = value('timezone') or default_timezone
+        if tz not in timezones:
+            raise ProvisioningError(f"Line {line_no}: unsupported timezone {tz!r}")
+
+        rows.append({
+            'username': username,
+            'email': value('email'),
+            'password': row.get('password') or '',
+            'first_name': value('first_name'),
+            'last_name': value('last_name'),
+            'currency': currency,
+            'timezone': tz,
+        })
+    return rows
+
+
+def _setup_worker():
+    # Spawned (not forked) workers start without settings loaded
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """``make_password()`` for each password, using up to ``workers`` processes"""
+    hashed = [None if password else make_password(None) for password in passwords]
+    pending = [(index, password) for index, password in enumerate(passwords) if password]
+    if not pending:
+        return hashed
+
+    plain = [password for _, password in pending]
+    workers = min(workers or os.cpu_count() or 1, len(plain))
+    if workers == 1:
+        results = map(make_password, plain)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+            chunksize = max(1, len(plain) // (workers * 4))
+            results = list(pool.map(make_password, plain, chunksize=chunksize))
+    for (index, _), password in zip(pending, results):
+        hashed[index] = password
+    return hashed
+
+
+def _shard_copy(user):
+    return User(**{field.attname: getattr(user, field.attname) for field in User._meta.concrete_fields})
+
+
+def provision(rows, workers=None, batch_size=1000):
+    """
+    Create the users in ``rows`` (from ``read_csv()``) that do not exist yet.
+    Returns ``(created users, skipped usernames)``.
+    """
+    usernames = [row['username'] for row in rows]
+    existing = set()
+    for start in range(0, len(usernames), batch_size):
+        existing.update(User.objects.filter(
+            username__in=usernames[start:start + batch_size]
+        ).values_list('username', flat=True))
+    rows = [row for row in rows if row['username'] not in existing]
+    if not rows:
+        return [], sorted(existing)
+
+    passwords = hash_passwords([row['password'] for row in rows], workers)
+    now = timezone.now()
+    users = [
+        User(
+            username=row['username'], email=row['email'], password=password,
+            first_name=row['first_name'], last_name=row['last_name'], date_joined=now,
+        )
+        for row, password in zip(rows, passwords)
+    ]
+
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+        if any(user.pk is None for user in users):
+            # Backends that cannot return ids from a bulk insert (MySQL)
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'pk'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, currency=row['currency'], timezone=row['timezone'])
+            for user, row in zip(users, rows)
+        ], batch_size=batch_size)
+
+        # Inside the default transaction, so a failing shard rolls the users back
+        placements = assign_new_users([user.pk for user in users])
+        by_alias = sorted(users, key=lambda user: placements[user.pk])
+        for alias, alias_users in groupby(by_alias, key=lambda user: placements[user.pk]):
+            alias_users = list(alias_users)
+            with transaction.atomic(using=alias):
+                if alias != DEFAULT_DB_ALIAS:
+                    User.objects.using(alias).bulk_create(
+                        [_shard_copy(user) for user in alias_users], batch_size=batch_size
+                    )
+                Category.objects.using(alias).bulk_create(
+                    [category for user in alias_users for category in Category.defaults_for(user.pk)],
+                    batch_size=batch_size,
+                )
+
+    return users, sorted(existing)
@@ -0,0 +1,241 @@
+"""
+Automatic categorisation with user-defined ``CategoryRule``\\s.
+
+A user's active rules are compiled into one ``Matcher``, cached per
+process. When a rule (or a category that rules point at) changes,
+``rules_changed()`` moves the user to a new version in the cache, so every
+worker rebuilds its matcher on next use.
+
+The rule that wins is the first one, in priority order, that matches a
+transaction. Most rules are "description contains <merchant>". Testing
+each rule in turn costs one substring search per rule per row. A
+``re`` alternation of all of them is no better, because ``re`` tries
+the alternatives one after another at every position. Instead the
+literals of the "contains" rules are merged into a trie-shaped regex:
+
+    merchants ["uber", "uber eats", "udemy"]  ->  u(?:ber(?:\\ eats)?|demy)
+
+``re`` walks it like an automaton (the stdlib has no Aho-Corasick). One
+``search()`` finds the longest literal at the leftmost position where any
+literal starts, and searching again from the next position finds the
+rest. Each literal maps to the rules whose literal is a prefix of it
+(including itself), so the first rule in priority order that occurs
+anywhere is among the candidates. Regex rules are combined into one
+alternation that rules them all out in a single search for most rows;
+when it matches they are tested one at a time. The candidates are then
+checked in priority order, including their amount range. Rules apply to
+their category's transaction type and, optionally, one payment method;
+each type/payment method pair gets its own patterns, compiled on first
+use.
+
+Matching is case-insensitive. ``create_transaction`` categorises rows
+sent without a category, ``categorize()`` does the same for rows created
+in bulk, and the ``recategorize`` command applies rules to existing rows
+in batches.
+"""
+import re
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .models import CategoryRule
+
+
+VERSION_KEY = 'tracker:rules:{}'
+MAX_CACHED_MATCHERS = 10000
+
+# A backreference would refer to another rule's group once the regex rules
+# are combined into one alternation
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+_matchers = {}
+
+
+def validate_pattern(match_type, pattern):
+    """Raise ``ValidationError`` for a rule pattern that cannot be compiled"""
+    if match_type not in dict(CategoryRule.MATCH_TYPES):
+        raise ValidationError(f"Unknown match type {match_type!r}")
+    if match_type != 'regex' or not pattern:
+        return
+    if BACKREFERENCE.search(pattern):
+        raise ValidationError("Regex rules cannot use backreferences")
+    try:
+        re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValidationError(f"Invalid regex: {e}")
+
+
+def trie_pattern(literals):
+    """A regex matching any of ``literals``, with common prefixes merged"""
+    root = {}
+    for literal in literals:
+        node = root
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        source = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if '' in node:
+            # A literal ends here and longer ones continue
+            source = f'(?:{source})?'
+        return source
+
+    return emit(root)
+
+
+class Bucket:
+    """The rules that apply to one transaction type and payment method"""
+
+    def __init__(self, rules, indexes):
+        literals = {}
+        regexes = []
+        # Rules with an empty pattern match every description
+        self.always = set()
+        for index in indexes:
+            rule = rules[index]
+            if not rule.pattern:
+                self.always.add(index)
+            elif rule.match_type == 'contains':
+                literals.setdefault(rule.pattern.lower(), []).append(index)
+            else:
+                regexes.append(index)
+
+        # Candidates for each literal found: the rules of every literal that
+        # is a prefix of it, since the search reports the longest one only
+        self.rules_by_literal = {
+            literal: sorted(
+                index
+                for end in range(1, len(literal) + 1)
+                for index in literals.get(literal[:end], ())
+            )
+            for literal in literals
+        }
+        self.search = re.compile(trie_pattern(literals)).search if literals else None
+
+        self.regexes = regexes
+        self.any_regex = None
+        if regexes:
+            alternatives = '|'.join(f'(?:{rules[index].pattern})' for index in regexes)
+            try:
+                self.any_regex = re.compile(alternatives, re.IGNORECASE).search
+            except re.error:
+                # e.g. two rules naming the same group, or inline flags;
+                # test each of them on every description instead
+                self.always.update(regexes)
+
+    def candidates_for(self, description):
+        """Indexes of the rules that may match ``description``"""
+        found = set(self.always)
+        if self.search is not None:
+            text = description.lower()
+            match = self.search(text)
+            while match is not None:
+                found.update(self.rules_by_literal[match.group()])
+                match = self.search(text, match.start() + 1)
+        if self.any_regex is not None and self.any_regex(description) is not None:
+            found.update(self.regexes)
+        return found
+
+
+class Matcher:
+    """A user's active rules, compiled; ``match()`` returns a category id or ``None``"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.regexes = {
+            index: re.compile(rule.pattern, re.IGNORECASE).search
+            for index, rule in enumerate(self.rules)
+            if rule.match_type == 'regex' and rule.pattern
+        }
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.rules)
+
+    def bucket(self, transaction_type, payment_method):
+        key = transaction_type, payment_method
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket(self.rules, [
+                index for index, rule in enumerate(self.rules)
+                if rule.category.category_type == transaction_type
+                and rule.payment_method in ('', payment_method)
+            ])
+        return bucket
+
+    def match(self, transaction_type, payment_method, description, amount):
+        description = description or ''
+        candidates = self.bucket(transaction_type, payment_method).candidates_for(description)
+        if not candidates:
+            return None
+
+        for index in sorted(candidates):
+            search = self.regexes.get(index)
+            if search is not None and search(description) is None:
+                continue
+            rule = self.rules[index]
+            if rule.min_amount is not None and amount < rule.min_amount:
+                continue
+            if rule.max_amount is not None and amount > rule.max_amount:
+                continue
+            return rule.category_id
+        return None
+
+
+def _version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def rules_changed(user_id):
+    """Make every process rebuild ``user_id``'s matcher on next use"""
+    cache.set(VERSION_KEY.format(user_id), time.time_ns(), None)
+
+
+def matcher_for(user):
+    """The cached ``Matcher`` of a user (or user id), rebuilt after rule changes"""
+    user_id = getattr(user, 'pk', user)
+    version = _version(user_id)
+    cached = _matchers.get(user_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rules = CategoryRule.objects.for_user(user_id).filter(
+        is_active=True,
+        category__deleted_at__isnull=True,
+    ).select_related('category').order_by('priority', 'created_at')
+    matcher = Matcher(rules)
+
+    if len(_matchers) >= MAX_CACHED_MATCHERS:
+        _matchers.clear()
+    _matchers[user_id] = (version, matcher)
+    return matcher
+
+
+def categorize(user, transactions):
+    """
+    Set ``category_id`` on the uncategorised (unsaved or bulk-loaded)
+    ``transactions`` that a rule matches; returns how many were set
+    """
+    matcher = matcher_for(user)
+    if not len(matcher):
+        return 0
+    matched = 0
+    for transaction in transactions:
+        if transaction.category_id is None:
+            category_id = matcher.match(
+                transaction.transaction_type, transaction.payment_method, transaction.description, transaction.amount
+            )
+            if category_id is not None:
+                transaction.category_id = category_id
+                matched += 1
+    return matched
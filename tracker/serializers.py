@@ -0,0 +1,123 @@
+"""
+JSON encoding for the API views.
+
+``dumps()`` uses orjson when it is installed and falls back to the stdlib
+encoder. ``JsonResponse`` and ``StreamingJsonResponse`` gzip their body for
+clients that accept it once it is larger than
+``TRACKER_JSON_GZIP_MIN_SIZE``. The streaming response encodes rows from
+``.values()`` querysets in batches, so a long list never sits in memory as
+one document.
+
+Money amounts are ``Decimal`` in Python. By default they are sent as JSON
+numbers, as the API always has. With ``exact_decimals`` (``?decimals=exact``
+on the endpoints) they are sent as exact strings such as ``"12.50"``.
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import Promise
+from django.utils.text import compress_sequence, compress_string
+
+
+@lru_cache(maxsize=None)
+def _orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def _default(obj, exact_decimals):
+    if isinstance(obj, Decimal):
+        return str(obj) if exact_decimals else float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    # orjson handles these natively; the stdlib encoder does not
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _float_default(obj):
+    return _default(obj, False)
+
+
+def _exact_default(obj):
+    return _default(obj, True)
+
+
+def dumps(data, exact_decimals=False):
+    """Encode ``data`` as compact UTF-8 JSON bytes"""
+    default = _exact_default if exact_decimals else _float_default
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def wants_exact_decimals(request):
+    return request.GET.get('decimals') == 'exact'
+
+
+def accepts_gzip(request):
+    return bool(re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+
+def iter_json_array(rows, exact_decimals=False, batch_size=1000):
+    """Encode an iterable of rows as a single JSON array, one chunk per batch"""
+    rows = iter(rows)
+    separator = b'['
+    while batch := list(islice(rows, batch_size)):
+        # One encoder call per batch; drop the batch's own brackets
+        yield separator + dumps(batch, exact_decimals)[1:-1]
+        separator = b','
+    yield b'[]' if separator == b'[' else b']'
+
+
+class JsonResponse(HttpResponse):
+    """
+    ``django.http.JsonResponse`` counterpart encoded with ``dumps()``.
+    Pass ``request`` to gzip bodies over ``TRACKER_JSON_GZIP_MIN_SIZE``.
+    """
+
+    def __init__(self, data, request=None, safe=True, exact_decimals=False, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(dumps(data, exact_decimals), **kwargs)
+        if request is not None:
+            patch_vary_headers(self, ('Accept-Encoding',))
+            if len(self.content) >= settings.TRACKER_JSON_GZIP_MIN_SIZE and accepts_gzip(request):
+                self.content = compress_string(self.content)
+                self['Content-Encoding'] = 'gzip'
+                self['Content-Length'] = str(len(self.content))
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """A JSON array streamed from ``rows`` (e.g. a ``.values().iterator()``)"""
+
+    def __init__(self, rows, request=None, exact_decimals=False, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        content = iter_json_array(rows, exact_decimals)
+        gzip = request is not None and accepts_gzip(request)
+        if gzip:
+            content = compress_sequence(content)
+        super().__init__(content, **kwargs)
+        if request is not None:
+            patch_vary_headers(self, ('Accept-Encoding',))
+        if gzip:
+            self['Content-Encoding'] = 'gzip'
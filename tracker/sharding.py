@@ -0,0 +1,195 @@
+"""
+Per-user sharding across several SQLite databases.
+
+With ``TRACKER_SHARD_COUNT`` > 0 the settings define ``shard_0`` ...
+``shard_N-1`` databases. Each user's Category/Transaction/BudgetAlert/
+FinancialReport/ArchivedMonth/IdempotencyKey/CategoryRule rows live on one shard,
+recorded in ``ShardAssignment`` (in the default database) and placed by
+user id the first time they are needed. Users who still have rows in the
+default database (from before sharding was turned on) are not placed;
+their queries keep going to the default database until ``rebalance_shards``
+moves them. The ``auth`` tables are migrated to every shard
+and each user row is mirrored there, so foreign keys keep working;
+``ExchangeRate`` and ``CalendarDay`` are reference data copied to every
+shard.
+
+Queries go through ``Model.objects.for_user(user)``; anything that spans
+users fans out with ``fan_out()``. With no shards configured everything
+resolves to the default database.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+
+
+SHARDED_MODELS = {
+    'category', 'transaction', 'budgetalert', 'financialreport', 'archivedmonth', 'idempotencykey', 'categoryrule',
+}
+REPLICATED_MODELS = {'exchangerate', 'calendarday'}
+SHARD_APPS = {'auth', 'contenttypes'}
+
+CACHE_KEY = 'tracker:shard:{}'
+CACHE_TIMEOUT = 60 * 60
+
+
+def shard_aliases():
+    return sorted(alias for alias in settings.DATABASES if alias.startswith('shard_'))
+
+
+def data_aliases():
+    """Every database that can hold per-user rows"""
+    return shard_aliases() or [DEFAULT_DB_ALIAS]
+
+
+def placement(user_id, aliases=None):
+    """Shard a user is placed on by default"""
+    aliases = aliases or shard_aliases()
+    return aliases[user_id % len(aliases)]
+
+
+def shard_for(user):
+    """Database alias holding ``user``'s rows (a User instance or id)"""
+    aliases = shard_aliases()
+    if not aliases:
+        return DEFAULT_DB_ALIAS
+
+    user_id = getattr(user, 'pk', user)
+    key = CACHE_KEY.format(user_id)
+    alias = cache.get(key)
+    if alias is None:
+        from .models import ShardAssignment
+
+        alias = ShardAssignment.objects.using(DEFAULT_DB_ALIAS).filter(
+            user_id=user_id
+        ).values_list('alias', flat=True).first()
+        if alias is None and has_rows_in_default(user_id):
+            # Placing them now would hide those rows; rebalance_shards moves
+            # them and assigns the shard
+            alias = DEFAULT_DB_ALIAS
+        elif alias is None:
+            try:
+                alias = ShardAssignment.objects.using(DEFAULT_DB_ALIAS).create(
+                    user_id=user_id, alias=placement(user_id, aliases)
+                ).alias
+            except IntegrityError:
+                alias = ShardAssignment.objects.using(DEFAULT_DB_ALIAS).get(user_id=user_id).alias
+        cache.set(key, alias, CACHE_TIMEOUT)
+    return alias
+
+
+def has_rows_in_default(user_id):
+    """Whether the default database still holds per-user rows of ``user_id``"""
+    from django.apps import apps
+
+    return any(
+        apps.get_model('tracker', model_name)._base_manager.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).exists()
+        for model_name in sorted(SHARDED_MODELS)
+    )
+
+
+def assign_new_users(user_ids):
+    """
+    Place users created in bulk, with one insert instead of one lookup and
+    insert per user; returns ``{user_id: alias}``
+    """
+    aliases = shard_aliases()
+    if not aliases:
+        return {user_id: DEFAULT_DB_ALIAS for user_id in user_ids}
+
+    from .models import ShardAssignment
+
+    placements = {user_id: placement(user_id, aliases) for user_id in user_ids}
+    ShardAssignment.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [ShardAssignment(user_id=user_id, alias=alias) for user_id, alias in placements.items()],
+        batch_size=1000,
+    )
+    cache.set_many({CACHE_KEY.format(user_id): alias for user_id, alias in placements.items()}, CACHE_TIMEOUT)
+    return placements
+
+
+def forget(user_id):
+    """Drop the cached placement after a user has been moved"""
+    cache.delete(CACHE_KEY.format(user_id))
+
+
+def mirror_user(user, alias=None):
+    """Copy the auth row for ``user`` onto its shard"""
+    alias = alias or shard_for(user)
+    if alias == DEFAULT_DB_ALIAS:
+        return
+    fields = {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields if not field.primary_key
+    }
+    User.objects.using(alias).update_or_create(pk=user.pk, defaults=fields)
+
+
+def drop_user(user_id, alias):
+    """
+    Delete a user's rows and auth copy from a shard.
+
+    The shard only has the per-user tables, so the auth row is removed
+    without Django's cascade collector (which would look for admin log and
+    profile tables that only exist in the default database).
+    """
+    from django.apps import apps
+
+    for model_name in (
+        'idempotencykey', 'archivedmonth', 'financialreport', 'budgetalert', 'categoryrule', 'transaction', 'category',
+    ):
+        apps.get_model('tracker', model_name)._base_manager.using(alias).filter(user_id=user_id).delete()
+    User.groups.through.objects.using(alias).filter(user_id=user_id).delete()
+    User.user_permissions.through.objects.using(alias).filter(user_id=user_id).delete()
+    User.objects.using(alias).filter(pk=user_id)._raw_delete(alias)
+
+
+def fan_out(func, aliases=None):
+    """Run ``func(alias)`` on every data database concurrently; returns ``{alias: result}``"""
+    aliases = aliases or data_aliases()
+    if len(aliases) == 1:
+        return {aliases[0]: func(aliases[0])}
+    with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+        return dict(zip(aliases, pool.map(func, aliases)))
+
+
+def is_sharded_model(model):
+    """Whether a model class or instance lives on user shards"""
+    return model._meta.app_label == 'tracker' and model._meta.model_name in SHARDED_MODELS
+
+
+class ShardRouter:
+    """Route per-user models to the owning user's shard"""
+
+    def _db_for_model(self, model, **hints):
+        if not is_sharded_model(model) or not shard_aliases():
+            return None
+
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if isinstance(instance, User):
+            return shard_for(instance.pk)
+        user_id = getattr(instance, 'user_id', None)
+        if user_id is not None:
+            return shard_for(user_id)
+        return instance._state.db
+
+    db_for_read = _db_for_model
+    db_for_write = _db_for_model
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded_model(obj1) or is_sharded_model(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not db.startswith('shard_'):
+            return None
+        if app_label in SHARD_APPS:
+            return True
+        if app_label == 'tracker':
+            return model_name is None or model_name in SHARDED_MODELS | REPLICATED_MODELS
+        return False
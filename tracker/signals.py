@@ -1,20 +1,152 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, ExchangeRate, Category, CategoryRule, Transaction
+from .currency import rates_changed
+from .fragments import bump
+from .events import transaction_changed
+from .middleware import auth_cache
+from .rules import rules_changed
+from .sharding import shard_aliases, shard_for, mirror_user, drop_user, forget
 
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, using='default', **kwargs):
     """Create user profile when a new user is created"""
-    if created:
+    if created and using == 'default':
         UserProfile.objects.create(user=instance)
 
 
+def only_last_login(update_fields):
+    """``login()`` saves just ``last_login``; nothing derived depends on it"""
+    return update_fields is not None and set(update_fields) == {'last_login'}
+
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, using='default', update_fields=None, **kwargs):
     """Save user profile when user is saved"""
+    if using != 'default' or only_last_login(update_fields):
+        return
     try:
         instance.profile.save()
     except UserProfile.DoesNotExist:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def mirror_user_to_shard(sender, instance, using, raw=False, update_fields=None, **kwargs):
+    """Keep a copy of the auth row on the user's shard for foreign keys"""
+    if raw or using != 'default' or not shard_aliases() or only_last_login(update_fields):
+        return
+    mirror_user(instance)
+
+
+@receiver(post_save, sender=User)
+def create_default_categories(sender, instance, created, using='default', raw=False, **kwargs):
+    """Give a new user the default categories, once, when the account is created"""
+    if not created or raw or using != 'default':
+        return
+    Category.objects.for_user(instance).bulk_create(Category.defaults_for(instance.pk))
+    # bulk_create skips post_save, so invalidate cached fragments here
+    bump(instance.pk, 'categories', 'transactions')
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_shard(sender, instance, using, **kwargs):
+    """Look up the shard before the assignment row is cascaded away"""
+    if using == 'default' and shard_aliases():
+        instance._shard_alias = shard_for(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def delete_user_from_shard(sender, instance, using, **kwargs):
+    """Remove the shard copy (and with it the user's data) when a user is deleted"""
+    alias = getattr(instance, '_shard_alias', None)
+    if using != 'default' or alias is None:
+        return
+    drop_user(instance.pk, alias)
+    forget(instance.pk)
+
+
+@receiver(post_save, sender=ExchangeRate)
+def replicate_rate(sender, instance, using, raw=False, **kwargs):
+    """Copy rates to every shard; conversions run inside shard queries"""
+    if raw or using != 'default':
+        return
+    for alias in shard_aliases():
+        ExchangeRate.objects.using(alias).update_or_create(
+            base_currency=instance.base_currency,
+            quote_currency=instance.quote_currency,
+            date=instance.date,
+            defaults={'rate': instance.rate},
+        )
+
+
+@receiver(post_delete, sender=ExchangeRate)
+def delete_replicated_rate(sender, instance, using, **kwargs):
+    if using != 'default':
+        return
+    for alias in shard_aliases():
+        ExchangeRate.objects.using(alias).filter(
+            base_currency=instance.base_currency,
+            quote_currency=instance.quote_currency,
+            date=instance.date,
+        ).delete()
+
+
+@receiver([post_save, post_delete], sender=ExchangeRate)
+def clear_rate_cache(sender, **kwargs):
+    """Drop cached rate lookups, in every process, when a rate is edited"""
+    rates_changed()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def bump_category_version(sender, instance, **kwargs):
+    """Category labels appear in dropdowns and in every transaction row"""
+    bump(instance.user_id, 'categories', 'transactions')
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=CategoryRule)
+def rebuild_rule_matcher(sender, instance, **kwargs):
+    """Rules compile in their category's type and skip deleted categories (see tracker.rules)"""
+    rules_changed(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def bump_transaction_version(sender, instance, **kwargs):
+    bump(instance.user_id, 'transactions')
+
+
+@receiver(post_save, sender=Transaction)
+def publish_transaction_saved(sender, instance, created, using, raw=False, update_fields=None, **kwargs):
+    """Push the change to the user's open dashboards (see tracker.events)"""
+    if raw:
+        return
+    if instance.deleted_at is not None:
+        action = 'deleted'
+    elif created or (update_fields and 'deleted_at' in update_fields):
+        action = 'created'  # a restored row reappears like a new one
+    else:
+        action = 'updated'
+    transaction_changed(instance, action, using)
+
+
+@receiver(post_delete, sender=Transaction)
+def publish_transaction_deleted(sender, instance, using, **kwargs):
+    transaction_changed(instance, 'deleted', using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+def bump_profile_version(sender, instance, update_fields=None, **kwargs):
+    if not only_last_login(update_fields):
+        bump(getattr(instance, 'user_id', instance.pk), 'profile')
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    """Drop this process's cached copy of the user (see tracker.middleware)"""
+    if not only_last_login(update_fields):
+        auth_cache.invalidate(getattr(instance, 'user_id', instance.pk))
@@ -1,12 +1,24 @@
 document.addEventListener('DOMContentLoaded', function() {
     // Toast notifications
-    window.showToast = function(message, duration = 3000) {
+    window.showToast = function(message, duration = 3000, action = null) {
         const toast = document.getElementById('toast');
         const toastMessage = document.getElementById('toast-message');
         
         if (!toast || !toastMessage) return;
         
         toastMessage.textContent = message;
+        toast.querySelector('.toast-action')?.remove();
+        if (action) {
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.className = 'toast-action mt-1 text-sm font-semibold text-indigo-300 hover:text-indigo-100';
+            button.textContent = action.label;
+            button.addEventListener('click', () => {
+                button.remove();
+                action.onClick();
+            });
+            toastMessage.after(button);
+        }
         toast.classList.remove('hidden', 'translate-y-32');
         toast.classList.add('block');
         
@@ -19,6 +31,118 @@ document.addEventListener('DOMContentLoaded', function() {
         }, duration);
     };
     
+    // Deletes are soft until compact_deleted runs, so the toast offers Undo
+    window.showDeletedToast = function(data) {
+        if (!data.undo_url) {
+            showToast(data.message);
+            return;
+        }
+        showToast(data.message, 8000, {
+            label: 'Undo',
+            onClick: () => fetch(data.undo_url, {
+                method: 'POST',
+                headers: { 'X-CSRFToken': csrftoken }
+            })
+            .then(response => response.json())
+            .then(result => {
+                showToast(result.success ? result.message : (result.errors || 'Could not undo'));
+                if (result.success) setTimeout(() => window.location.reload(), 800);
+            })
+            .catch(() => showToast('Could not undo'))
+        });
+    };
+    
+    // Idempotency-Key for a form submission (see tracker/idempotency.py).
+    // The key is kept on the form until the save succeeds, so a retry after
+    // a timeout or a double click replays the first response instead of
+    // saving twice.
+    window.idempotencyKey = function(form) {
+        if (!form.dataset.idempotencyKey) {
+            form.dataset.idempotencyKey = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : Date.now().toString(36) + Math.random().toString(36).slice(2);
+        }
+        return form.dataset.idempotencyKey;
+    };
+    
+    // Live dashboard updates over Server-Sent Events (see tracker/events.py).
+    // While the stream is open, saving a transaction updates the cards,
+    // charts, recent list and budget alerts in place instead of reloading.
+    window.liveUpdates = false;
+    const liveDashboard = document.getElementById('live-dashboard');
+    if (liveDashboard && window.EventSource) {
+        const currencySymbol = liveDashboard.dataset.currencySymbol;
+        const formatMoney = value => currencySymbol + value.toLocaleString(undefined, {
+            minimumFractionDigits: 2,
+            maximumFractionDigits: 2
+        });
+        const fromHtml = html => {
+            const template = document.createElement('template');
+            template.innerHTML = html.trim();
+            return template.content.firstElementChild;
+        };
+        
+        // Replace the element for the same object, or add it at the top
+        function upsert(container, selector, html) {
+            const existing = container.querySelector(selector);
+            if (!html) {
+                if (existing) existing.remove();
+                return;
+            }
+            const element = fromHtml(html);
+            if (existing) {
+                existing.replaceWith(element);
+            } else {
+                container.querySelector('[data-empty]')?.remove();
+                container.prepend(element);
+            }
+        }
+        
+        const source = new EventSource(liveDashboard.dataset.streamUrl);
+        source.onopen = () => { window.liveUpdates = true; };
+        source.onerror = () => { window.liveUpdates = false; };
+        
+        source.addEventListener('transaction', e => {
+            const data = JSON.parse(e.data);
+            const list = document.getElementById('recent-transactions');
+            upsert(list, `[data-transaction-id="${data.id}"]`, data.html);
+            
+            const rows = list.querySelectorAll('[data-transaction-id]');
+            if (rows.length > 10) rows[rows.length - 1].remove();
+        });
+        
+        source.addEventListener('totals', e => {
+            const data = JSON.parse(e.data);
+            ['income', 'expenses', 'balance'].forEach(key => {
+                liveDashboard.querySelector(`[data-live="${key}"]`).textContent = formatMoney(data[key]);
+            });
+            liveDashboard.querySelector('[data-live="savings_rate"]').textContent = `${data.savings_rate}%`;
+            
+            const charts = window.dashboardCharts || {};
+            if (charts.pie) {
+                charts.pie.data.labels = Object.keys(data.categories);
+                charts.pie.data.datasets[0].data = Object.values(data.categories);
+                charts.pie.update();
+            } else if (Object.keys(data.categories).length > 0) {
+                // First expense of the month: the chart was never drawn
+                window.location.reload();
+            }
+            if (charts.line) {
+                const points = charts.line.data.datasets[0].data;
+                points[points.length - 1] = data.expenses;
+                charts.line.update();
+            }
+        });
+        
+        source.addEventListener('budget_alert', e => {
+            const data = JSON.parse(e.data);
+            upsert(document.getElementById('budget-alerts'), `[data-category-id="${data.category_id}"]`, data.html);
+        });
+        
+        // The server dropped events for this page; start over
+        source.addEventListener('resync', () => window.location.reload());
+    }
+    
     // Mobile menu toggle
     const mobileMenuBtn = document.getElementById('mobile-menu-btn');
     const mobileMenuClose = document.getElementById('mobile-menu-close');
@@ -174,6 +298,9 @@ document.addEventListener('DOMContentLoaded', function() {
             saveBtn.textContent = 'Saving...';
             
             const formData = new FormData(this);
+            if (this.dataset.allowDuplicate) {
+                formData.append('allow_duplicate', '1');
+            }
             let url = this.action;
             
             // If editing, get the transaction ID from hidden field
@@ -186,18 +313,29 @@ document.addEventListener('DOMContentLoaded', function() {
                 method: 'POST',
                 body: formData,
                 headers: {
-                    'X-CSRFToken': csrftoken
+                    'X-CSRFToken': csrftoken,
+                    'Idempotency-Key': idempotencyKey(this)
                 }
             })
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    showToast(data.message);
+                    delete this.dataset.idempotencyKey;
+                    delete this.dataset.allowDuplicate;
+                    showToast(data.duplicate_of ? `${data.message} (possible duplicate)` : data.message);
                     hideModal('transaction-modal');
-                    // Refresh page to show new transaction
-                    setTimeout(() => {
-                        window.location.reload();
-                    }, 1000);
+                    // Refresh page to show new transaction, unless the
+                    // event stream already has
+                    if (!window.liveUpdates) {
+                        setTimeout(() => {
+                            window.location.reload();
+                        }, 1000);
+                    }
+                } else if (data.duplicate_of && confirm(`${data.errors}. Save it anyway?`)) {
+                    // A different request body needs a new idempotency key
+                    delete this.dataset.idempotencyKey;
+                    this.dataset.allowDuplicate = '1';
+                    setTimeout(() => this.requestSubmit());
                 } else {
                     showToast(data.errors || 'Please check the form for errors');
                 }
@@ -427,7 +565,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    showToast(data.message);
+                    showDeletedToast(data);
                     // Remove the deleted item from the DOM
                     const element = document.querySelector(`[data-id="${deleteTarget}"]`);
                     if (element) {
@@ -475,6 +613,7 @@ document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('transaction-date').value = this.dataset.date;
             document.getElementById('transaction-description').value = this.dataset.description;
             document.getElementById('transaction-payment').value = this.dataset.payment;
+            document.getElementById('transaction-currency').value = this.dataset.currency;
             
             // Update category dropdown based on type
             updateCategoryDropdown(this.dataset.type);
@@ -670,7 +809,7 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(res => res.json())
             .then(data => {
-                if (data.success) { showToast(data.message); btn.closest('.category-item').remove(); }
+                if (data.success) { showDeletedToast(data); btn.closest('.category-item').remove(); }
                 else showToast(data.errors || 'Failed to delete category');
             }).catch(err => { console.error(err); showToast('Failed to delete category'); });
         });
@@ -737,9 +876,15 @@ document.addEventListener('DOMContentLoaded', function() {
         e.preventDefault();
         const btn = this.querySelector('button[type="submit"]'); const orig = btn.textContent;
         btn.disabled=true; btn.textContent='Saving...';
-        fetch(this.action, { method:'POST', headers:{ 'X-CSRFToken':csrftoken }, body:new FormData(this) })
+        const body = new FormData(this);
+        if (this.dataset.allowDuplicate) body.append('allow_duplicate', '1');
+        fetch(this.action, { method:'POST', headers:{ 'X-CSRFToken':csrftoken, 'Idempotency-Key':idempotencyKey(this) }, body })
             .then(r=>r.json())
-            .then(d=>{ if(d.success){ showToast(d.message); hideModal('transaction-modal'); setTimeout(()=>location.reload(),800);} else showToast(d.errors||'Error'); })
+            .then(d=>{
+                if(d.success){ delete this.dataset.idempotencyKey; delete this.dataset.allowDuplicate; showToast(d.duplicate_of ? `${d.message} (possible duplicate)` : d.message); hideModal('transaction-modal'); if(!window.liveUpdates) setTimeout(()=>location.reload(),800);}
+                else if(d.duplicate_of && confirm(`${d.errors}. Save it anyway?`)){ delete this.dataset.idempotencyKey; this.dataset.allowDuplicate='1'; setTimeout(()=>this.requestSubmit()); }
+                else showToast(d.errors||'Error');
+            })
             .catch(e=>{ console.error(e); showToast('Error'); })
             .finally(()=>{ btn.disabled=false; btn.textContent=orig; });
     });
@@ -753,7 +898,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if(!confirm('Are you sure you want to delete this transaction?')) return;
             fetch(`/api/transactions/${id}/delete/`, { method:'POST', headers:{'X-CSRFToken':csrftoken,'Content-Type':'application/x-www-form-urlencoded'} })
             .then(r=>r.json())
-            .then(d=>{ if(d.success){ showToast(d.message); btn.closest('tr').remove(); } else showToast(d.errors||'Error'); })
+            .then(d=>{ if(d.success){ showDeletedToast(d); btn.closest('tr').remove(); } else showToast(d.errors||'Error'); })
             .catch(e=>{ console.error(e); showToast('Error'); });
         });
     });
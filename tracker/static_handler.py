@@ -0,0 +1,121 @@
+"""
+WSGI middleware serving collected static files, preferring the
+precompressed ``.br``/``.gz`` siblings written by
+``CompressedManifestStaticFilesStorage``.
+
+Content-hashed names never change, so they are sent with a one-year
+``immutable`` cache lifetime and browsers skip them entirely on repeat
+visits; anything else is revalidated with an ETag. Enable it with
+``TRACKER_SERVE_STATIC=True`` when no front-end server handles /static/.
+With ``TRACKER_SERVE_MEDIA=True`` a second instance serves MEDIA_ROOT, where
+avatar thumbnails are content-hashed the same way.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from django.conf import settings
+
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE = 64 * 1024
+
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('font/ttf', '.ttf')
+
+
+class StaticFile:
+    """One static path and its precompressed variants, stat'ed once"""
+
+    def __init__(self, path, url_path):
+        self.variants = {}
+        for encoding, suffix in (*ENCODINGS, (None, '')):
+            candidate = path + suffix
+            if os.path.isfile(candidate):
+                stat = os.stat(candidate)
+                self.variants[encoding] = (candidate, stat.st_size, f'"{stat.st_size:x}-{int(stat.st_mtime):x}{suffix}"')
+
+        content_type, _ = mimetypes.guess_type(path)
+        if content_type and (content_type.startswith('text/') or content_type == 'application/javascript'):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type or 'application/octet-stream'
+        self.last_modified = formatdate(os.stat(path).st_mtime, usegmt=True)
+        if HASHED_NAME.search(url_path):
+            self.cache_control = 'public, max-age=31536000, immutable'
+        else:
+            self.cache_control = 'public, max-age=0, must-revalidate'
+
+    def choose(self, accept_encoding):
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accept_encoding:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+def read_chunks(path):
+    with open(path, 'rb') as handle:
+        yield from iter(lambda: handle.read(CHUNK_SIZE), b'')
+
+
+class PrecompressedStaticHandler:
+    def __init__(self, application, root=None, prefix=None, remember=True):
+        self.application = application
+        self.root = os.path.realpath(root or settings.STATIC_ROOT)
+        self.prefix = '/' + (prefix or settings.STATIC_URL).strip('/') + '/'
+        # Uploads come and go at runtime; only collected files can be remembered
+        self.remember = remember
+        self.files = {}
+
+    def __call__(self, environ, start_response):
+        path_info = environ.get('PATH_INFO', '')
+        if not path_info.startswith(self.prefix) or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+
+        static_file = self.find(path_info)
+        if static_file is None:
+            return self.application(environ, start_response)
+
+        encoding, (path, size, etag) = static_file.choose(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        headers = [
+            ('Content-Type', static_file.content_type),
+            ('Cache-Control', static_file.cache_control),
+            ('Last-Modified', static_file.last_modified),
+            ('ETag', etag),
+        ]
+        if len(static_file.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(open(path, 'rb'), CHUNK_SIZE)
+        return read_chunks(path)
+
+    def find(self, path_info):
+        """``StaticFile`` for a request path, or ``None`` outside STATIC_ROOT"""
+        if path_info in self.files:
+            return self.files[path_info]
+
+        relative = unquote(path_info[len(self.prefix):])
+        path = os.path.realpath(os.path.join(self.root, relative))
+        static_file = None
+        if path.startswith(self.root + os.sep) and os.path.isfile(path):
+            static_file = StaticFile(path, relative)
+
+        # Collected files only change on deploy; cache hits and misses alike
+        if self.remember and len(self.files) < 10000:
+            self.files[path_info] = static_file
+        return static_file
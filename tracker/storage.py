@@ -0,0 +1,61 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+
+# Formats that are already compressed gain nothing from gzip/brotli
+SKIP_EXTENSIONS = {
+    '.gz', '.br', '.zip', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif',
+    '.ico', '.woff', '.woff2', '.mp4', '.webm', '.pdf',
+}
+
+# Only keep a compressed variant that saves at least this fraction
+MIN_SAVING = 0.05
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files with ``.gz`` (and ``.br`` when the
+    ``brotli`` package is installed) siblings written at collectstatic time,
+    for ``tracker.static_handler`` or a front-end server to serve as-is.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        brotli = _brotli()
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed_name in self.compress(name, brotli):
+                yield name, compressed_name, True
+
+    def compress(self, name, brotli=None):
+        if any(name.endswith(ext) for ext in SKIP_EXTENSIONS) or not self.exists(name):
+            return
+
+        with self.open(name) as original:
+            data = original.read()
+
+        encoders = [('gz', lambda content: gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli:
+            encoders.append(('br', lambda content: brotli.compress(content, quality=11)))
+
+        for suffix, encode in encoders:
+            compressed = encode(data)
+            if len(compressed) > len(data) * (1 - MIN_SAVING):
+                continue
+            compressed_name = f'{name}.{suffix}'
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
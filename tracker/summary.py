@@ -0,0 +1,118 @@
+"""
+Current-month figures shared by the dashboard, its JSON API and the live
+event stream (tracker.events), so all three agree on what they show.
+
+"Today" should be the user's (``periods.local_today(profile.timezone)``);
+without one, the server's date is used.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .currency import converted_sum
+from .fields import MoneyField
+from .models import Category, Transaction
+from .periods import bounds, local_today
+
+
+ALERT_PERCENTAGE = 80  # Show alerts for 80% and above
+
+
+def month_transactions(user, today=None):
+    start, end = month_bounds(today)
+    return Transaction.objects.for_user(user).filter(date__gte=start, date__lt=end)
+
+
+def month_totals(user, currency, today=None):
+    """Income, expenses, balance and savings rate for the current month"""
+    transactions = month_transactions(user, today)
+
+    income = transactions.filter(transaction_type='income').aggregate(
+        total=converted_sum(currency)
+    )['total'] or Decimal('0')
+
+    expenses = transactions.filter(transaction_type='expense').aggregate(
+        total=converted_sum(currency)
+    )['total'] or Decimal('0')
+
+    balance = income - expenses
+    savings_rate = (balance / income * 100) if income > 0 else 0
+
+    return {
+        'income': income,
+        'expenses': expenses,
+        'balance': balance,
+        'savings_rate': round(savings_rate, 1),
+    }
+
+
+def month_category_expenses(user, currency, today=None):
+    """``{category name: total}`` of this month's expenses (pie chart data)"""
+    category_expenses = month_transactions(user, today).filter(transaction_type='expense').values('category__name').annotate(
+        total=converted_sum(currency)
+    )
+    return {
+        item['category__name'] or 'Uncategorized': float(item['total'])
+        for item in category_expenses
+    }
+
+
+def budget_alert(category, currency, today=None):
+    """
+    Alert dict for an expense category's spending this month, or ``None``
+    when it has no budget or is below ``ALERT_PERCENTAGE``.
+    """
+    if category.category_type != 'expense' or not category.monthly_budget or category.monthly_budget <= 0:
+        return None
+
+    total_spent = month_transactions(category.user_id, today).filter(
+        category=category,
+        transaction_type='expense'
+    ).aggregate(total=converted_sum(currency))['total'] or Decimal('0')
+
+    percentage = (total_spent / category.monthly_budget) * 100
+    if percentage < ALERT_PERCENTAGE:
+        return None
+
+    return {
+        'category_id': str(category.pk),
+        'category': category.name,
+        'spent': float(total_spent),
+        'budget': float(category.monthly_budget),
+        'percentage': float(percentage),
+        'level': 'danger' if percentage >= 100 else 'warning'
+    }
+
+
+def month_bounds(today=None):
+    """First day of ``today``'s month and of the month after"""
+    return bounds(today or local_today(), 'month')
+
+
+def category_spending(user, currency, today=None):
+    """
+    The user's categories annotated with this month's ``spent`` (expenses
+    converted into ``currency``), ``remaining`` budget and ``percentage`` of
+    the budget used (``None`` without a budget), in one grouped query.
+    """
+    start, end = month_bounds(today)
+    this_month = Q(
+        transactions__date__gte=start,
+        transactions__date__lt=end,
+        transactions__transaction_type='expense',
+        transactions__deleted_at__isnull=True,
+    )
+    return Category.objects.for_user(user).annotate(
+        spent=Coalesce(
+            converted_sum(currency, prefix='transactions__', filter=this_month),
+            Value(0),
+            output_field=MoneyField()
+        ),
+    ).annotate(
+        remaining=ExpressionWrapper(F('monthly_budget') - F('spent'), output_field=MoneyField()),
+        percentage=Case(
+            When(monthly_budget__gt=0, then=Cast('spent', FloatField()) * 100 / Cast('monthly_budget', FloatField())),
+            output_field=FloatField()
+        ),
+    )
@@ -0,0 +1,12 @@
+from django import template
+
+from tracker.vendor import vendor_url
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_static(name):
+    """URL of a pinned third-party asset: the vendored copy if present, else its CDN"""
+    return vendor_url(name)
@@ -0,0 +1,28 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from tracker.avatars import FORMATS, THUMBNAIL_SIZES
+
+
+register = template.Library()
+
+
+def thumbnail_size(pixels):
+    """The smallest thumbnail at least ``pixels`` wide, else the largest"""
+    return next((size for size in sorted(THUMBNAIL_SIZES) if size >= pixels), max(THUMBNAIL_SIZES))
+
+
+@register.inclusion_tag('tracker/includes/_avatar.html')
+def avatar(user, size):
+    """``user``'s avatar thumbnail for ``size`` CSS pixels (with a 2x source), or their initial"""
+    context = {'initial': user.username[:1].upper(), 'size': size}
+    profile = getattr(user, 'profile', None)
+    if profile is not None and profile.avatar_digest:
+        context['sources'] = {
+            extension: [
+                default_storage.url(profile.avatar_thumbnail_name(thumbnail_size(pixels), extension))
+                for pixels in (size, size * 2)
+            ]
+            for extension, _, _ in FORMATS
+        }
+    return context
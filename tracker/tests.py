@@ -1,3 +1,646 @@
-from django.test import TestCase
+import datetime
+import importlib.util
+import random
+import re
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import IntegrityError, connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from . import archive, profiling, writequeue
+from .models import ArchivedMonth, Category, CategoryRule, RequestProfile, ShardAssignment, Transaction
+from .rules import Matcher
+from .sharding import has_rows_in_default, placement, shard_aliases, shard_for
+from .throttling import STORES, parse_rates, throttled
+
+
+def loop_match(rules, transaction_type, payment_method, description, amount):
+    """What ``Matcher.match`` must return: the first rule, in order, that matches"""
+    for rule in rules:
+        if rule.category.category_type != transaction_type or rule.payment_method not in ('', payment_method):
+            continue
+        if rule.match_type == 'regex':
+            if re.search(rule.pattern, description, re.IGNORECASE) is None:
+                continue
+        elif rule.pattern.lower() not in description.lower():
+            continue
+        if rule.min_amount is not None and amount < rule.min_amount:
+            continue
+        if rule.max_amount is not None and amount > rule.max_amount:
+            continue
+        return rule.category_id
+    return None
+
+
+class MatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.food = Category(name='Food', category_type='expense')
+        self.transport = Category(name='Transport', category_type='expense')
+        self.salary = Category(name='Salary', category_type='income')
+
+    def rule(self, pattern, category, **kwargs):
+        return CategoryRule(category=category, pattern=pattern, **kwargs)
+
+    def match(self, rules, description, amount='10.00', transaction_type='expense', payment_method='cash'):
+        return Matcher(rules).match(transaction_type, payment_method, description, Decimal(amount))
+
+    def test_first_rule_in_priority_order_wins(self):
+        rules = [self.rule('uber', self.transport), self.rule('uber eats', self.food)]
+        self.assertEqual(self.match(rules, 'UBER EATS order 123'), self.transport.id)
+        self.assertEqual(self.match(rules[::-1], 'UBER EATS order 123'), self.food.id)
+
+    def test_prefix_of_a_longer_literal_is_a_candidate(self):
+        rules = [self.rule('uber eats', self.food), self.rule('ub', self.transport)]
+        self.assertEqual(self.match(rules, 'uber ride'), self.transport.id)
+
+    def test_overlapping_literals(self):
+        rules = [self.rule('bcd', self.food), self.rule('abc', self.transport)]
+        self.assertEqual(self.match(rules, 'xabcdx'), self.food.id)
+        self.assertEqual(self.match(rules, 'xabcx'), self.transport.id)
+
+    def test_regex_rules(self):
+        rules = [self.rule(r'^shell\b', self.transport, match_type='regex'), self.rule('shell', self.food)]
+        self.assertEqual(self.match(rules, 'Shell station 4'), self.transport.id)
+        self.assertEqual(self.match(rules, 'eggshell paint'), self.food.id)
+
+    def test_regex_rules_that_cannot_be_combined(self):
+        rules = [
+            self.rule(r'(?P<shop>tesco)', self.food, match_type='regex'),
+            self.rule(r'(?P<shop>bp) fuel', self.transport, match_type='regex'),
+        ]
+        self.assertEqual(self.match(rules, 'TESCO metro'), self.food.id)
+        self.assertEqual(self.match(rules, 'bp fuel 12'), self.transport.id)
+        self.assertIsNone(self.match(rules, 'bp shop'))
+
+    def test_empty_pattern_matches_everything_in_its_turn(self):
+        rules = [self.rule('coffee', self.food), self.rule('', self.transport)]
+        self.assertEqual(self.match(rules, 'coffee beans'), self.food.id)
+        self.assertEqual(self.match(rules, 'anything'), self.transport.id)
+        self.assertEqual(self.match(rules, ''), self.transport.id)
+
+    def test_amount_range(self):
+        rules = [
+            self.rule('market', self.transport, min_amount=Decimal('100'), max_amount=Decimal('200')),
+            self.rule('market', self.food),
+        ]
+        self.assertEqual(self.match(rules, 'market', amount='150.00'), self.transport.id)
+        self.assertEqual(self.match(rules, 'market', amount='200.00'), self.transport.id)
+        self.assertEqual(self.match(rules, 'market', amount='99.99'), self.food.id)
+        self.assertEqual(self.match(rules, 'market', amount='200.01'), self.food.id)
+
+    def test_payment_method_and_transaction_type(self):
+        rules = [
+            self.rule('acme', self.transport, payment_method='card'),
+            self.rule('acme', self.salary),
+            self.rule('acme', self.food),
+        ]
+        self.assertEqual(self.match(rules, 'acme', payment_method='card'), self.transport.id)
+        self.assertEqual(self.match(rules, 'acme', payment_method='cash'), self.food.id)
+        self.assertEqual(self.match(rules, 'acme', transaction_type='income'), self.salary.id)
+
+    def test_no_match(self):
+        self.assertIsNone(self.match([self.rule('coffee', self.food)], 'tea'))
+        self.assertIsNone(self.match([], 'tea'))
+
+    def test_same_result_as_a_loop_over_the_rules(self):
+        rng = random.Random(2024)
+        categories = [self.food, self.transport, self.salary]
+        alphabet = 'abcde '
+        for _ in range(200):
+            rules = []
+            for _ in range(rng.randrange(1, 15)):
+                pattern = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 4)))
+                rule = self.rule(pattern, rng.choice(categories), payment_method=rng.choice(['', '', 'card']))
+                if pattern and rng.random() < 0.2:
+                    rule.match_type, rule.pattern = 'regex', rng.choice([rf'{pattern}$', rf'^{pattern}', f'{pattern}+'])
+                if rng.random() < 0.2:
+                    rule.min_amount = Decimal(rng.randrange(0, 100))
+                if rng.random() < 0.2:
+                    rule.max_amount = Decimal(rng.randrange(0, 100))
+                rules.append(rule)
+            matcher = Matcher(rules)
+            for _ in range(50):
+                row = (
+                    rng.choice(['expense', 'income']), rng.choice(['cash', 'card']),
+                    ''.join(rng.choice(alphabet + alphabet.upper()) for _ in range(rng.randrange(0, 12))),
+                    Decimal(rng.randrange(0, 10000)) / 100,
+                )
+                self.assertEqual(matcher.match(*row), loop_match(rules, *row), (row, [(r.pattern, r.match_type) for r in rules]))
+
+
+class TrackerTestMixin:
+    """
+    Allows every database, so the tests also run with shards configured,
+    and starts from an empty cache: shard placements and data versions are
+    cached by user id, and ids repeat between tests
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+
+
+class TrackerTestCase(TrackerTestMixin, TestCase):
+    pass
+
+
+class CreateRuleTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(self.user)
+        self.category = Category.objects.for_user(self.user).create(user=self.user, name='Taxi', category_type='expense')
+
+    def create_rule(self, **fields):
+        return self.client.post('/api/rules/create/', {'category': self.category.pk, 'pattern': 'ride', **fields})
+
+    def test_limits_are_parsed(self):
+        response = self.create_rule(min_amount='5', max_amount='20.5', priority='3')
+        self.assertEqual(response.status_code, 200)
+        rule = CategoryRule.objects.for_user(self.user).get()
+        self.assertEqual((rule.min_amount, rule.max_amount, rule.priority), (Decimal('5.00'), Decimal('20.50'), 3))
+
+        created = self.client.post('/api/transactions/create/', {
+            'transaction-type': 'expense', 'amount': '12.00', 'date': '2024-03-01', 'description': 'Ride home',
+        }).json()
+        self.assertEqual(created['category_id'], str(self.category.pk))
+
+    def test_invalid_values_are_rejected(self):
+        for fields, error in (
+            ({'min_amount': 'abc'}, 'value must be a decimal number'),
+            ({'priority': 'first'}, 'value must be an integer'),
+            ({'priority': '-1'}, 'Priority cannot be negative'),
+            ({'min_amount': '20', 'max_amount': '5'}, 'Minimum amount cannot be more than the maximum amount'),
+        ):
+            response = self.create_rule(**fields)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(error, response.json()['errors'])
+        self.assertFalse(CategoryRule.objects.for_user(self.user).exists())
+
+
+class CreateTransactionTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(self.user)
+
+    def test_invalid_amount(self):
+        response = self.client.post('/api/transactions/create/', {
+            'transaction-type': 'expense', 'amount': 'abc', 'date': '2024-03-01', 'description': 'Lunch',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('value must be a decimal number', response.json()['errors'])
+        self.assertFalse(Transaction.objects.for_user(self.user).exists())
+
+    def test_invalid_date(self):
+        response = self.client.post('/api/transactions/create/', {
+            'transaction-type': 'expense', 'amount': '12.50', 'date': '2024-13-01', 'description': 'Lunch',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('it is an invalid date', response.json()['errors'])
+
+    def test_duplicate_is_reported(self):
+        form = {'transaction-type': 'expense', 'amount': '12.5', 'date': '2024-03-01', 'description': 'Lunch!'}
+        first = self.client.post('/api/transactions/create/', form).json()
+        second = self.client.post('/api/transactions/create/', {**form, 'amount': '12.50', 'date': '2024-03-02'}).json()
+        self.assertIsNone(first['duplicate_of'])
+        self.assertEqual(second['duplicate_of'], first['transaction_id'])
+
+
+class UpdateTransactionTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(self.user)
+        self.transaction = Transaction.objects.for_user(self.user).create(
+            user=self.user, transaction_type='expense', amount='12.50', date='2024-03-01', description='Lunch'
+        )
+
+    def update(self, **fields):
+        return self.client.post(f'/api/transactions/{self.transaction.pk}/update/', fields)
+
+    def test_amount_and_date_are_parsed(self):
+        self.assertEqual(self.update(amount='7.5', date='2024-03-02').status_code, 200)
+        self.transaction.refresh_from_db(using=shard_for(self.user))
+        self.assertEqual(self.transaction.amount, Decimal('7.50'))
+        self.assertEqual(self.transaction.date, datetime.date(2024, 3, 2))
+        self.assertEqual(self.transaction.fingerprint, self.transaction.get_fingerprint())
+
+    def test_invalid_values_are_rejected(self):
+        for fields, error in (
+            ({'amount': 'abc'}, 'value must be a decimal number'),
+            ({'date': '2024-02-30'}, 'it is an invalid date'),
+        ):
+            response = self.update(**fields)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(error, response.json()['errors'])
+        self.transaction.refresh_from_db(using=shard_for(self.user))
+        self.assertEqual((self.transaction.amount, self.transaction.date), (Decimal('12.50'), datetime.date(2024, 3, 1)))
+
+
+class DashboardTests(TrackerTestCase):
+    def test_uncategorized_transaction_without_description(self):
+        user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(user)
+        Transaction.objects.for_user(user).create(
+            user=user, transaction_type='expense', amount='5.00', date=datetime.date.today(), category=None
+        )
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'No description')
+        self.assertContains(response, 'Uncategorized')
+
+
+class IdempotencyTests(TrackerTestCase):
+    form = {'transaction-type': 'expense', 'amount': '12.50', 'date': '2024-03-01', 'description': 'Lunch'}
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(self.user)
+
+    def post(self, form, key='retry-1'):
+        return self.client.post('/api/transactions/create/', form, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_is_replayed(self):
+        first = self.post(self.form)
+        retry = self.post(self.form)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.for_user(self.user).count(), 1)
+
+    def test_key_reused_for_a_different_request(self):
+        self.post(self.form)
+        response = self.post({**self.form, 'amount': '99.00'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.for_user(self.user).count(), 1)
+        self.assertEqual(self.post(self.form, key='retry-2').status_code, 200)
+
+    def test_failed_attempt_releases_the_key(self):
+        self.assertEqual(self.post({**self.form, 'amount': 'abc'}).status_code, 400)
+        response = self.post(self.form)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+
+THROTTLE = {
+    'TRACKER_THROTTLE_BURST': 5, 'TRACKER_THROTTLE_RATE': 0.01,
+    'TRACKER_THROTTLE_RATES': '', 'TRACKER_THROTTLE_STORE': 'memory',
+}
+
+
+@override_settings(**THROTTLE)
+class ThrottlingTests(SimpleTestCase):
+    def setUp(self):
+        STORES['memory'].clear()
+        self.view = throttled(lambda request: JsonResponse({'success': True}))
+        self.factory = RequestFactory()
+
+    def call_many(self, user, count, responses):
+        for _ in range(count):
+            request = self.factory.post('/')
+            request.user = user
+            responses.append(self.view(request))
+
+    def test_flooding_user_is_throttled_alone(self):
+        flooder, other = User(pk=1, username='flooder'), User(pk=2, username='other')
+        flooded, others = [], []
+        threads = [threading.Thread(target=self.call_many, args=(flooder, 50, flooded)) for _ in range(8)]
+        threads.append(threading.Thread(target=self.call_many, args=(other, 5, others)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statuses = sorted(response.status_code for response in flooded)
+        self.assertEqual(statuses, [200] * 5 + [429] * 395)
+        for response in flooded:
+            if response.status_code == 429:
+                self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual([response.status_code for response in others], [200] * 5)
+
+    def test_invalid_limits_are_rejected(self):
+        for spec in ('create_transaction=5/0', 'create_transaction=5/-1', 'create_transaction=-1/1', 'create_transaction'):
+            with self.assertRaises(ImproperlyConfigured):
+                parse_rates(spec)
+        self.assertEqual(parse_rates('create_transaction=0/0'), {'create_transaction': (0, 0.0)})
+
+
+@override_settings(**THROTTLE)
+class ThrottledEndpointTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        STORES['memory'].clear()
+
+    def post(self, user):
+        self.client.force_login(user)
+        return self.client.post('/api/transactions/create/', {
+            'transaction-type': 'expense', 'amount': '1.00', 'date': '2024-03-01',
+            'description': 'Coffee', 'allow_duplicate': '1',
+        })
+
+    def test_other_users_are_not_throttled(self):
+        flooder = User.objects.create_user('flooder', password='test-password')
+        other = User.objects.create_user('other', password='test-password')
+        self.assertEqual([self.post(flooder).status_code for _ in range(5)], [200] * 5)
+        response = self.post(flooder)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.post(other).status_code, 200)
+        self.assertEqual(Transaction.objects.for_user(flooder).count(), 5)
+
+
+class MoneyFieldTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='test-password')
+
+    def test_amounts_are_stored_as_cents(self):
+        transaction = Transaction.objects.for_user(self.user).create(
+            user=self.user, transaction_type='expense', amount='12.345', date='2024-03-01', description='Lunch'
+        )
+        with connections[shard_for(self.user)].cursor() as cursor:
+            cursor.execute('SELECT amount FROM tracker_transaction WHERE id = %s', [transaction.id.hex])
+            self.assertEqual(cursor.fetchone()[0], 1235)
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.amount, Decimal('12.35'))
+
+    def test_sums_are_exact(self):
+        Transaction.objects.for_user(self.user).bulk_create([
+            Transaction(user=self.user, transaction_type='expense', amount='0.10', date='2024-03-01')
+            for _ in range(1000)
+        ])
+        self.assertEqual(Transaction.objects.for_user(self.user).aggregate(total=Sum('amount'))['total'], Decimal('100.00'))
+
+    def test_invalid_amount(self):
+        with self.assertRaisesMessage(ValidationError, 'value must be a decimal number'):
+            Transaction._meta.get_field('amount').to_python('12,50')
+
+
+class ProfilingTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(TRACKER_PROFILE_DIR=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.request = RequestFactory().get('/')
+        self.request.user = User.objects.create_user('staff', password='test-password', is_staff=True)
+
+    def profile(self, trigger):
+        view = lambda request: JsonResponse({'success': True})  # noqa: E731
+        return profiling.profile_view(self.request, view, (), {}, trigger)
+
+    def test_profile_is_saved(self):
+        response = self.profile('staff')
+        self.assertTrue(RequestProfile.objects.filter(name=response['X-Profile-Id']).exists())
+
+    def test_one_request_is_profiled_at_a_time(self):
+        with profiling._profiling:
+            self.assertIsNone(self.profile('sample'))
+        self.assertIn('X-Profile-Id', self.profile('sample'))
+
+
+@skipIf(shard_aliases(), "The historical models predate ShardAssignment, which the router needs")
+class MoneyMigrationTests(TransactionTestCase):
+    before = [('tracker', '0003_multi_currency')]
+    after = [('tracker', '0004_money_minor_units')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_decimal_amounts_become_cents(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model('auth', 'User').objects.create(username='alice')
+        category = apps.get_model('tracker', 'Category').objects.create(
+            user=user, name='Food', category_type='expense', monthly_budget=Decimal('250.50')
+        )
+        apps.get_model('tracker', 'Transaction').objects.create(
+            user=user, category=category, transaction_type='expense', amount=Decimal('19.99'), date='2024-03-01'
+        )
+
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model('tracker', 'Transaction').objects.get().amount, Decimal('19.99'))
+        self.assertEqual(apps.get_model('tracker', 'Category').objects.get().monthly_budget, Decimal('250.50'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT amount FROM tracker_transaction')
+            self.assertEqual(cursor.fetchone()[0], 1999)
+
+        apps = self.migrate(self.before)
+        self.assertEqual(apps.get_model('tracker', 'Transaction').objects.get().amount, Decimal('19.99'))
+
+
+@skipUnless(importlib.util.find_spec('numpy'), "Transaction archives require numpy")
+class ArchiveTests(TrackerTestMixin, TransactionTestCase):
+    # Commands fan out over threads, which cannot see an open test transaction
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(TRACKER_ARCHIVE_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user('alice', password='test-password')
+        for day in range(1, 4):
+            Transaction.objects.for_user(self.user).create(
+                user=self.user, transaction_type='expense', amount='10.00',
+                date=datetime.date(2019, 3, day), description=f'Lunch {day}'
+            )
+        Transaction.objects.for_user(self.user).create(
+            user=self.user, transaction_type='income', amount='500.00', date=datetime.date(2020, 1, 1)
+        )
+
+    def archive(self):
+        call_command('archive_transactions', '--before', '2020', stdout=mock.Mock())
+
+    def archived(self):
+        return archive.YearArchive(archive.archive_path(self.user.pk, 2019))
+
+    def test_closed_years_move_to_the_archive(self):
+        self.archive()
+        self.assertEqual(Transaction.objects.for_user(self.user).count(), 1)
+        self.assertEqual(self.archived().totals(), {'income': Decimal('0.00'), 'expense': Decimal('30.00')})
+        summary = ArchivedMonth.objects.for_user(self.user).get()
+        self.assertEqual((summary.month, summary.transaction_count, summary.expenses), (datetime.date(2019, 3, 1), 3, Decimal('30.00')))
+        rows = list(archive.iter_archived_rows(self.user))
+        self.assertEqual([row['description'] for row in rows], ['Lunch 3', 'Lunch 2', 'Lunch 1'])
+
+    def test_rows_are_not_archived_twice_after_a_failed_commit(self):
+        publish = archive.publish
+
+        def publish_then_fail(*args):
+            publish(*args)
+            raise RuntimeError("commit failed")
+
+        with mock.patch.object(archive, 'publish', publish_then_fail), self.assertRaises(RuntimeError):
+            self.archive()
+        # Rolled back: still live, but already in the published archive
+        self.assertEqual(Transaction.objects.for_user(self.user).count(), 4)
+        self.assertFalse(ArchivedMonth.objects.for_user(self.user).exists())
+
+        self.archive()
+        self.assertEqual(len(self.archived().column('date')), 3)
+        self.assertEqual(self.archived().totals()['expense'], Decimal('30.00'))
+        self.assertEqual(ArchivedMonth.objects.for_user(self.user).get().transaction_count, 3)
+
+
+class SoftDeleteTests(TrackerTestMixin, TransactionTestCase):
+    # compact_deleted fans out over threads, as in ArchiveTests
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(self.user)
+        self.category = Category.objects.for_user(self.user).create(user=self.user, name='Gym', category_type='expense')
+        self.transaction = Transaction.objects.for_user(self.user).create(
+            user=self.user, transaction_type='expense', amount='30.00', date='2024-03-01', category=self.category
+        )
+
+    def compact(self):
+        call_command('compact_deleted', stdout=mock.Mock())
+
+    def test_deleted_transaction_can_be_restored(self):
+        response = self.client.post(f'/api/transactions/{self.transaction.pk}/delete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Transaction.objects.for_user(self.user).exists())
+        self.assertTrue(Transaction.all_objects.for_user(self.user).deleted().exists())
+
+        self.assertEqual(self.client.post(response.json()['undo_url']).status_code, 200)
+        self.assertTrue(Transaction.objects.for_user(self.user).exists())
+        self.assertEqual(self.client.post(response.json()['undo_url']).status_code, 404)
+
+    def test_compaction_keeps_rows_inside_the_undo_window(self):
+        self.client.post(f'/api/transactions/{self.transaction.pk}/delete/')
+        self.compact()
+        self.assertTrue(Transaction.all_objects.for_user(self.user).exists())
+
+    @override_settings(TRACKER_UNDO_WINDOW=0)
+    def test_compaction_purges_a_deleted_category(self):
+        response = self.client.post(f'/api/categories/{self.category.pk}/delete/')
+        self.assertEqual(response.status_code, 200)
+        self.compact()
+
+        self.assertFalse(Category.all_objects.for_user(self.user).filter(pk=self.category.pk).exists())
+        self.transaction.refresh_from_db(using=shard_for(self.user))
+        self.assertIsNone(self.transaction.category_id)
+        self.assertEqual(self.client.post(response.json()['undo_url']).status_code, 404)
+
+
+@override_settings(TRACKER_WRITE_QUEUE=True)
+class WriteQueueTests(TrackerTestMixin, TransactionTestCase):
+    # The writer thread commits on its own connection
+    form = {'transaction-type': 'expense', 'amount': '12.50', 'date': '2024-03-01', 'description': 'Lunch'}
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(writequeue.write_queue.close)
+        self.user = User.objects.create_user('alice', password='test-password')
+        self.client.force_login(self.user)
+
+    def row(self, **fields):
+        return Transaction(user=self.user, transaction_type='expense', amount='3.00', date='2024-03-01', **fields)
+
+    def test_response_waits_for_the_commit(self):
+        response = self.client.post('/api/transactions/create/', self.form)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Transaction.objects.for_user(self.user).filter(pk=response.json()['transaction_id']).exists())
+
+    @override_settings(TRACKER_WRITE_QUEUE_DELAY=500, TRACKER_WRITE_QUEUE_TIMEOUT=0)
+    def test_timeout_falls_back_to_the_status_url(self):
+        response = self.client.post('/api/transactions/create/', self.form)
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'pending')
+
+        writequeue.write_queue.close()
+        self.assertEqual(self.client.get(status_url).json()['status'], 'written')
+
+    def test_bad_row_fails_alone(self):
+        # The foreign key is only checked at commit, so this fails the batch
+        bad_row = self.row(category_id='01a153cd-0000-7000-8000-000000000000')
+        with self.assertLogs('tracker.writequeue', 'WARNING'):
+            good = writequeue.submit(self.row())
+            bad = writequeue.submit(bad_row)
+            self.assertIsNone(good.exception(timeout=5))
+            self.assertIsInstance(bad.exception(timeout=5), IntegrityError)
+        self.assertEqual(writequeue.status(self.user.pk, str(bad_row.pk))['status'], 'failed')
+        self.assertEqual(Transaction.objects.for_user(self.user).count(), 1)
+
+    def test_cache_error_after_commit_does_not_fail_the_rows(self):
+        with mock.patch.object(writequeue, 'cache') as broken, self.assertLogs('tracker.writequeue', 'WARNING'):
+            broken.delete_many.side_effect = ConnectionError('cache is down')
+            self.assertIsNone(writequeue.submit(self.row()).exception(timeout=5))
+            writequeue.write_queue.close()
+        self.assertEqual(Transaction.objects.for_user(self.user).count(), 1)
+
+
+@skipUnless(shard_aliases(), "Run with TRACKER_SHARD_COUNT=2 to test sharding")
+class ShardingTests(TrackerTestCase):
+    def test_rows_live_on_the_users_shard(self):
+        user = User.objects.create_user('alice', password='test-password')
+        alias = shard_for(user)
+        self.assertEqual(alias, placement(user.pk))
+        Transaction.objects.for_user(user).create(user=user, transaction_type='expense', amount='5.00', date='2024-03-01')
+        for other in {'default', *shard_aliases()} - {alias}:
+            self.assertFalse(Transaction.objects.using(other).filter(user_id=user.pk).exists())
+        self.assertEqual(Transaction.objects.using(alias).filter(user_id=user.pk).count(), 1)
+        self.assertEqual(Category.objects.for_user(user).count(), Category.objects.using(alias).filter(user_id=user.pk).count())
+
+    def test_users_with_rows_in_default_are_moved_by_rebalance(self):
+        user = User.objects.create_user('alice', password='test-password')
+        # As if the account predates sharding: no assignment, rows in default
+        alias = shard_for(user)
+        ShardAssignment.objects.filter(user=user).delete()
+        Category.all_objects.using(alias).filter(user_id=user.pk).delete()
+        cache.clear()
+        # user_id, not user: assigning the instance would route (and place) it
+        Transaction.objects.using('default').bulk_create([
+            Transaction(user_id=user.pk, transaction_type='expense', amount='5.00', date='2024-03-01')
+        ])
+
+        self.assertEqual(shard_for(user), 'default')
+        self.assertFalse(ShardAssignment.objects.filter(user=user).exists())
+        self.assertEqual(Transaction.objects.for_user(user).count(), 1)
+
+        call_command('rebalance_shards', stdout=mock.Mock())
+        self.assertEqual(shard_for(user), placement(user.pk))
+        self.assertFalse(has_rows_in_default(user.pk))
+        self.assertEqual(Transaction.objects.for_user(user).count(), 1)
+
+
+class TransactionAdminSearchTests(TrackerTestCase):
+    def search(self, term):
+        model_admin = admin.site._registry[Transaction]
+        queryset, _ = model_admin.get_search_results(RequestFactory().get('/'), Transaction._base_manager.all(), term)
+        return queryset
+
+    def test_description_search_is_case_insensitive(self):
+        user = User.objects.create_user('alice', password='test-password')
+        Transaction.objects.for_user(user).create(
+            user=user, transaction_type='expense', amount='5.00', date='2024-03-01', description='Lunch at work'
+        )
+        self.assertEqual(self.search('lunch').using(shard_for(user)).count(), 1)
+        self.assertEqual(self.search('work').using(shard_for(user)).count(), 0)
+
+    def test_description_search_uses_the_nocase_index(self):
+        self.assertIn('transaction_description_nocase', self.search('Lunch').explain())
@@ -0,0 +1,156 @@
+"""
+Per-user write throttling for the mutating API views.
+
+SQLite has a single writer, so one scripted client looping over
+``/api/transactions/create/`` can make every other user's writes queue up
+behind it. ``throttled`` gives each user a token bucket per view:
+``burst`` requests can be made at once, and tokens come back at ``rate``
+per second (a positive number). A request that finds the bucket empty is answered with 429
+and ``Retry-After`` (the seconds until a token is back) without running
+the view, so it never reaches the database.
+
+The defaults are ``TRACKER_THROTTLE_BURST`` and ``TRACKER_THROTTLE_RATE``.
+``TRACKER_THROTTLE_RATES`` overrides them per view name, as in
+``"create_transaction=60/2,delete_category=5/0.1"`` (burst/rate).
+A burst of 0 turns throttling off. ``check_settings()`` runs at start-up,
+so a malformed spec or a rate of 0 stops the server from starting instead
+of failing requests.
+
+Buckets live in a store chosen by ``TRACKER_THROTTLE_STORE``:
+- ``memory`` (the default) is a dict in each worker process. A check costs
+  a few microseconds, but with N workers a user gets up to N times the
+  limit.
+- ``cache`` keeps buckets in the default cache, shared by every worker.
+  It is one get and one set per check, without locking, so concurrent
+  requests can occasionally both take the last token.
+"""
+import math
+import threading
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+
+
+CACHE_KEY = 'tracker:throttle:{}:{}'
+
+
+def check_limit(name, burst, rate):
+    if burst < 0 or (burst > 0 and not rate > 0):
+        raise ImproperlyConfigured(
+            f"Throttle limit for {name} must have a burst of 0 or more and a positive rate, not {burst}/{rate}"
+        )
+
+
+@lru_cache(maxsize=8)
+def parse_rates(spec):
+    """``"view=burst/rate,..."`` -> ``{view: (burst, rate)}``"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, limit = item.partition('=')
+        burst, _, rate = limit.partition('/')
+        try:
+            burst, rate = int(burst), float(rate)
+        except ValueError:
+            raise ImproperlyConfigured(f"TRACKER_THROTTLE_RATES: expected view=burst/rate, got {item!r}")
+        check_limit(name.strip(), burst, rate)
+        rates[name.strip()] = (burst, rate)
+    return rates
+
+
+def check_settings():
+    """Raise ``ImproperlyConfigured`` for throttle settings that would fail requests"""
+    check_limit('TRACKER_THROTTLE_BURST/RATE', settings.TRACKER_THROTTLE_BURST, settings.TRACKER_THROTTLE_RATE)
+    parse_rates(settings.TRACKER_THROTTLE_RATES)
+    if settings.TRACKER_THROTTLE_STORE not in STORES:
+        raise ImproperlyConfigured(f"TRACKER_THROTTLE_STORE must be one of {', '.join(STORES)}")
+
+
+def limit_for(view_name):
+    """``(burst, rate)`` of a view"""
+    default = (settings.TRACKER_THROTTLE_BURST, settings.TRACKER_THROTTLE_RATE)
+    return parse_rates(settings.TRACKER_THROTTLE_RATES).get(view_name, default)
+
+
+def refill(state, now, burst, rate):
+    """Tokens in a bucket last left with ``state`` = ``(tokens, at)``"""
+    if state is None:
+        return burst
+    tokens, at = state
+    return min(burst, tokens + (now - at) * rate)
+
+
+class MemoryStore:
+    """Buckets of this worker process"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        """Take a token; returns 0, or the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = refill(self._buckets.get(key), now, burst, rate)
+            if tokens >= 1:
+                if len(self._buckets) >= self.max_entries:
+                    self._buckets.clear()
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            return (1 - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheStore:
+    """Buckets in the default cache, shared by every worker"""
+
+    def take(self, key, burst, rate):
+        now = time.time()
+        cache_key = CACHE_KEY.format(*key)
+        tokens = refill(cache.get(cache_key), now, burst, rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        # A bucket that has refilled completely is the same as no bucket
+        cache.set(cache_key, (tokens - 1, now), math.ceil(burst / rate) + 1)
+        return 0
+
+    def clear(self):
+        pass
+
+
+STORES = {'memory': MemoryStore(), 'cache': CacheStore()}
+
+
+def store():
+    return STORES[settings.TRACKER_THROTTLE_STORE]
+
+
+def throttled(view):
+    """
+    Limit how often each user can call a mutating view. Apply inside
+    ``login_required`` and outside ``idempotent``, so throttled requests do
+    not claim idempotency keys.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        burst, rate = limit_for(view.__name__)
+        if burst > 0:
+            wait = store().take((request.user.pk, view.__name__), burst, rate)
+            if wait:
+                retry_after = math.ceil(wait)
+                response = JsonResponse({
+                    'success': False,
+                    'errors': f'Too many requests; try again in {retry_after} second{"s" if retry_after != 1 else ""}'
+                }, status=429)
+                response['Retry-After'] = str(retry_after)
+                return response
+        return view(request, *args, **kwargs)
+
+    return wrapper
@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, include
 from . import views
 
 urlpatterns = [
@@ -16,12 +16,8 @@ urlpatterns = [
     path('reports/', views.reports_view, name='reports'),
     path('profile/', views.profile_view, name='profile'),
     
-    # API/Functional URLs
-    path('api/transactions/create/', views.create_transaction, name='create_transaction'),
-    path('api/transactions/<uuid:transaction_id>/update/', views.update_transaction, name='update_transaction'),
-    path('api/transactions/<uuid:transaction_id>/delete/', views.delete_transaction, name='delete_transaction'),
-    path('api/categories/create/', views.create_category, name='create_category'),
-    path('api/categories/<uuid:category_id>/update/', views.update_category, name='update_category'),
-    path('api/categories/<uuid:category_id>/delete/', views.delete_category, name='delete_category'),
     path('download-csv/', views.download_csv, name='download_csv'),
+    
+    # API/Functional URLs
+    path('', include('tracker.api_urls')),
 ]
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Third-party front-end assets, pinned.
+
+``manage.py vendor_assets`` downloads every file below into
+``tracker/static/vendor/`` so pages can be served without reaching public
+CDNs. Templates link assets through ``{% vendor_static %}``, which uses the
+local copy once it exists and the pinned CDN URL otherwise.
+"""
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+
+FONT_AWESOME = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0'
+FONT_AWESOME_FONTS = ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+
+# name -> (static path, CDN URL)
+ASSETS = {
+    'tailwind': ('vendor/tailwind/tailwind-3.4.1.js', 'https://cdn.tailwindcss.com/3.4.1'),
+    'chart.js': ('vendor/chart.js/chart-4.4.0.umd.js', 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js'),
+    'jquery': ('vendor/jquery/jquery-3.6.0.min.js', 'https://code.jquery.com/jquery-3.6.0.min.js'),
+    'font-awesome': ('vendor/font-awesome/css/all.min.css', f'{FONT_AWESOME}/css/all.min.css'),
+}
+
+# Files referenced from inside vendored assets (static path, URL)
+DEPENDENCIES = [
+    (f'vendor/font-awesome/webfonts/{font}.{ext}', f'{FONT_AWESOME}/webfonts/{font}.{ext}')
+    for font in FONT_AWESOME_FONTS
+    for ext in ('woff2', 'ttf')
+]
+
+
+def vendor_files():
+    """Every ``(static path, URL)`` pair to download"""
+    return [asset for asset in ASSETS.values()] + DEPENDENCIES
+
+
+@lru_cache(maxsize=None)
+def vendor_url(name):
+    path, cdn_url = ASSETS[name]
+    if finders.find(path):
+        return static(path)
+    return cdn_url
@@ -1,23 +1,31 @@
-import json
-import csv
-from datetime import datetime, timedelta
+import concurrent.futures
+from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Sum
-from django.utils import timezone
+from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
 from django.views.decorators.http import require_POST, require_GET
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Count
+from asgiref.sync import sync_to_async
 
-from .models import Transaction, Category, UserProfile
-from .forms import (
-    UserRegistrationForm, UserLoginForm, PasswordResetRequestForm,
-    UserProfileForm
-)
+from .models import Transaction, Category, CategoryRule, UserProfile, CURRENCY_SYMBOLS
+from .currency import converted_amount, converted_sum, convert
+from .archive import iter_archived_rows, archived_month_totals
+from .idempotency import idempotent
+from .throttling import throttled
+from . import duplicates, events, rules, serializers, writequeue
+from .summary import month_totals, month_category_expenses, budget_alert, category_spending, month_bounds
+from .periods import bounds, bucket, local_today, trailing
+
+# csv and tracker.forms (which pulls in django.contrib.auth.forms) are
+# imported inside the views that use them, keeping worker start-up lean
 
 
 # Authentication Views
@@ -30,6 +38,8 @@ def welcome_view(request):
 
 def login_view(request):
     """User login"""
+    from .forms import UserLoginForm
+    
     if request.user.is_authenticated:
         return redirect('dashboard')
     
@@ -49,6 +59,8 @@ def login_view(request):
 
 
 def register_view(request):
+    from .forms import UserRegistrationForm
+    
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
@@ -64,9 +76,6 @@ def register_view(request):
                 profile.currency = 'USD'  # or your default
                 profile.save()
                 
-                # Create default categories for the new user
-                create_default_categories(user)
-                
             return redirect('dashboard')
     else:
         form = UserRegistrationForm()
@@ -76,6 +85,8 @@ def register_view(request):
 
 def forgot_password_view(request):
     """Password reset request"""
+    from .forms import PasswordResetRequestForm
+    
     if request.user.is_authenticated:
         return redirect('dashboard')
     
@@ -101,7 +112,8 @@ def logout_view(request):
 def get_user_profile(user):
     """Safely get or create user profile"""
     try:
-        return UserProfile.objects.get(user=user)
+        # Usually already loaded by CachedAuthenticationMiddleware
+        return user.profile
     except UserProfile.DoesNotExist:
         return UserProfile.objects.create(user=user)
 
@@ -110,108 +122,58 @@ def dashboard_view(request):
     """Dashboard/Financial Overview"""
     # Safely get user profile
     user_profile = get_user_profile(request.user)
+    currency = user_profile.currency
     
-    today = timezone.now().date()
-    current_month = today.replace(day=1)
-    current_year = today.year
-    current_month_num = today.month
-    
-    # Get monthly summary
-    monthly_transactions = Transaction.objects.filter(
-        user=request.user,
-        date__year=current_year,
-        date__month=current_month_num
-    )
-    
-    income = monthly_transactions.filter(transaction_type='income').aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0')
-    
-    expenses = monthly_transactions.filter(transaction_type='expense').aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0')
-    
-    balance = income - expenses
-    savings_rate = (balance / income * 100) if income > 0 else 0
+    today = local_today(user_profile.timezone)
+    totals = month_totals(request.user, currency, today)
     
     # Category breakdown for pie chart
-    category_data = {}
-    category_expenses = monthly_transactions.filter(transaction_type='expense').values('category__name').annotate(
-        total=Sum('amount')
-    )
+    category_data = month_category_expenses(request.user, currency, today)
     
-    for item in category_expenses:
-        category_name = item['category__name'] or 'Uncategorized'
-        category_data[category_name] = float(item['total'])
-    
-    # Monthly trend (last 6 months)
-    monthly_trend = []
-    for i in range(5, -1, -1):
-        month_date = today.replace(day=1) - timedelta(days=30*i)
-        month_expenses = Transaction.objects.filter(
-            user=request.user,
+    # Monthly trend (last 6 calendar months), grouped in one query
+    trend_months = trailing(today, 'month', 6)
+    expenses_by_month = dict(
+        Transaction.objects.for_user(request.user).filter(
             transaction_type='expense',
-            date__year=month_date.year,
-            date__month=month_date.month
-        ).aggregate(total=Sum('amount'))['total'] or 0
+            date__gte=trend_months[0][0],
+            date__lt=trend_months[-1][1]
+        ).annotate(month=bucket('month')).values('month').annotate(
+            total=converted_sum(currency)
+        ).order_by().values_list('month', 'total')
+    )
+    archived = archived_month_totals(request.user, [start for start, _ in trend_months])
+    monthly_trend = []
+    for month_start, _ in trend_months:
+        month_expenses = expenses_by_month.get(month_start) or 0
+        
+        summary = archived.get(month_start)
+        if summary:
+            month_expenses += convert(summary.expenses, summary.currency, currency, summary.month)
         
         monthly_trend.append({
-            'month': month_date.strftime('%b'),
+            'month': month_start.strftime('%b'),
             'amount': float(month_expenses)
         })
     
     # Recent transactions
-    recent_transactions = Transaction.objects.filter(
-        user=request.user
-    ).select_related('category').order_by('-date', '-created_at')[:10]
+    recent_transactions = Transaction.objects.for_user(request.user).select_related('category').order_by('-date', '-created_at')[:10]
     
     # Budget alerts calculation
-    budget_alerts = []
-    expense_categories = Category.objects.filter(
-        user=request.user,
+    expense_categories = Category.objects.for_user(request.user).filter(
         category_type='expense',
         monthly_budget__gt=0
     )
-    
-    for category in expense_categories:
-        # Calculate total spent in current month for this category
-        total_spent = monthly_transactions.filter(
-            category=category,
-            transaction_type='expense'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
-        if category.monthly_budget > 0:
-            percentage = (total_spent / category.monthly_budget) * 100
-            
-            if percentage >= 80:  # Show alerts for 80% and above
-                budget_alerts.append({
-                    'category': category.name,
-                    'spent': float(total_spent),
-                    'budget': float(category.monthly_budget),
-                    'percentage': float(percentage),
-                    'level': 'danger' if percentage >= 100 else 'warning'
-                })
-    
-    # Get user's categories for dashboard (pass as JSON for JavaScript)
-    categories = Category.objects.filter(user=request.user)
-    categories_json = json.dumps([{
-        'id': str(cat.id),
-        'name': cat.name,
-        'icon': cat.icon,
-        'type': cat.category_type
-    } for cat in categories])
+    budget_alerts = [
+        alert for alert in (budget_alert(category, currency, today) for category in expense_categories)
+        if alert
+    ]
     
     context = {
-        'income': income,
-        'expenses': expenses,
-        'balance': balance,
-        'savings_rate': round(savings_rate, 1),
-        'category_data': json.dumps(category_data),
-        'monthly_trend': json.dumps(monthly_trend),
+        **totals,
+        'category_data': serializers.dumps(category_data).decode(),
+        'monthly_trend': serializers.dumps(monthly_trend).decode(),
         'recent_transactions': recent_transactions,
         'budget_alerts': budget_alerts,
-        'categories': categories,
-        'categories_json': categories_json,
         'user_profile': user_profile,
     }
     
@@ -220,41 +182,28 @@ def dashboard_view(request):
 @login_required
 def transactions_view(request):
     """All transactions with filtering"""
-    transactions = Transaction.objects.filter(
-        user=request.user
-    ).select_related('category').order_by('-date', '-created_at')
-    
-    # Apply filters
-    transaction_type = request.GET.get('type')
-    category_id = request.GET.get('category')
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    
-    if transaction_type and transaction_type != 'all':
-        transactions = transactions.filter(transaction_type=transaction_type)
-    
-    if category_id and category_id != 'all':
-        transactions = transactions.filter(category_id=category_id)
-    
-    if date_from:
-        transactions = transactions.filter(date__gte=date_from)
-    
-    if date_to:
-        transactions = transactions.filter(date__lte=date_to)
-    
-    # Calculate total
-    transactions_total = transactions.aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0')
+    transactions = filter_transactions(
+        request,
+        Transaction.objects.for_user(request.user).select_related('category').order_by('-date', '-created_at')
+    )
     
     # Get user profile for currency
     user_profile = get_user_profile(request.user)
     
+    # Calculate total in the profile currency; the count lets the template
+    # skip fetching rows when the cached table is still current
+    summary = transactions.aggregate(
+        total=converted_sum(user_profile.currency),
+        count=Count('id')
+    )
+    transactions_total = summary['total'] or Decimal('0')
+    
     # Get categories for filter dropdown
-    categories = Category.objects.filter(user=request.user)
+    categories = Category.objects.for_user(request.user)
     
     context = {
         'transactions': transactions,
+        'transaction_count': summary['count'],
         'categories': categories,
         'transactions_total': transactions_total,
         'user_profile': user_profile,
@@ -265,36 +214,27 @@ def transactions_view(request):
 @login_required
 def categories_view(request):
     """Categories and budgets management"""
+    user_profile = get_user_profile(request.user)
+    currency = user_profile.currency
 
-    if not Category.objects.filter(user=request.user, is_default=True).exists():
-        create_default_categories(request.user)
-
-    expense_categories = Category.objects.filter(
-        user=request.user,
-        category_type='expense'
-    )
-
-    income_categories = Category.objects.filter(
-        user=request.user,
-        category_type='income'
-    )
-
-    today = timezone.now().date()
-    current_month = today.replace(day=1)
+    # Default categories are created at registration (signals.create_default_categories)
+    today = local_today(user_profile.timezone)
+    categories = list(category_spending(request.user, currency, today))
+    expense_categories = [category for category in categories if category.category_type == 'expense']
+    income_categories = [category for category in categories if category.category_type == 'income']
 
-    total_budget = sum(cat.monthly_budget for cat in expense_categories)
+    total_budget = sum(category.monthly_budget for category in expense_categories)
 
-    total_spent = Transaction.objects.filter(
-        user=request.user,
+    # Uncategorized expenses count too, so this is not the sum of the rows
+    start, end = month_bounds(today)
+    total_spent = Transaction.objects.for_user(request.user).filter(
         transaction_type='expense',
-        date__year=current_month.year,
-        date__month=current_month.month
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        date__gte=start,
+        date__lt=end
+    ).aggregate(total=converted_sum(currency))['total'] or Decimal('0')
 
     remaining = total_budget - total_spent
 
-    user_profile = get_user_profile(request.user)
-
     context = {
         'expense_categories': expense_categories,
         'income_categories': income_categories,
@@ -309,35 +249,31 @@ def categories_view(request):
 @login_required
 def reports_view(request):
     """Financial reports generation"""
-    today = timezone.now().date()
+    # Get user profile for currency
+    user_profile = get_user_profile(request.user)
+    currency = user_profile.currency
     
     # Year-to-date summary
-    ytd_income = Transaction.objects.filter(
-        user=request.user,
-        transaction_type='income',
-        date__year=today.year
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-    
-    ytd_expenses = Transaction.objects.filter(
-        user=request.user,
-        transaction_type='expense',
-        date__year=today.year
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+    year_start, year_end = bounds(local_today(user_profile.timezone), 'year')
+    this_year = Transaction.objects.for_user(request.user).filter(date__gte=year_start, date__lt=year_end)
+    
+    ytd_income = this_year.filter(
+        transaction_type='income'
+    ).aggregate(total=converted_sum(currency))['total'] or Decimal('0')
+    
+    ytd_expenses = this_year.filter(
+        transaction_type='expense'
+    ).aggregate(total=converted_sum(currency))['total'] or Decimal('0')
     
     ytd_savings = ytd_income - ytd_expenses
     
     # Top spending categories
-    top_categories = Transaction.objects.filter(
-        user=request.user,
-        transaction_type='expense',
-        date__year=today.year
+    top_categories = this_year.filter(
+        transaction_type='expense'
     ).values('category__name').annotate(
-        total=Sum('amount')
+        total=converted_sum(currency)
     ).order_by('-total')[:5]
     
-    # Get user profile for currency
-    user_profile = get_user_profile(request.user)
-    
     context = {
         'ytd_income': ytd_income,
         'ytd_expenses': ytd_expenses,
@@ -352,6 +288,9 @@ def reports_view(request):
 @login_required
 def profile_view(request):
     """User profile and settings"""
+    from . import avatars
+    from .forms import UserProfileForm
+    
     profile, created = UserProfile.objects.get_or_create(user=request.user)
     
     if request.method == 'POST':
@@ -359,13 +298,19 @@ def profile_view(request):
         if form.is_valid():
             profile = form.save()
             
-            # Update user info
+            # Update user info; saving the user re-saves user.profile
+            # (signals.save_user_profile), so it must be the updated one
             user = request.user
+            user.profile = profile
             user.first_name = form.cleaned_data.get('first_name', '')
             user.last_name = form.cleaned_data.get('last_name', '')
             user.email = form.cleaned_data.get('email', '')
             user.save()
             
+            # After both saves, which would write back the old avatar_digest
+            if 'avatar' in form.changed_data:
+                avatars.schedule(profile)
+            
             messages.success(request, 'Profile updated successfully')
             return redirect('profile')
     else:
@@ -382,6 +327,8 @@ def profile_view(request):
 # API Views
 @login_required
 @require_POST
+@throttled
+@idempotent
 def create_transaction(request):
     """Create a new transaction via AJAX"""
     try:
@@ -392,39 +339,97 @@ def create_transaction(request):
         date = request.POST.get('date')
         description = request.POST.get('description')
         payment_method = request.POST.get('payment_method', 'cash')
+        currency = request.POST.get('currency') or get_user_profile(request.user).currency
         
         # Validate required fields
-        if not all([transaction_type, amount, category_id, date]):
+        if not all([transaction_type, amount, date]):
             return JsonResponse({
                 'success': False,
                 'errors': 'Missing required fields'
             }, status=400)
         
-        # Get category
-        try:
-            category = Category.objects.get(id=category_id, user=request.user)
-        except Category.DoesNotExist:
+        if currency not in CURRENCY_SYMBOLS:
             return JsonResponse({
                 'success': False,
-                'errors': 'Invalid category'
+                'errors': 'Invalid currency'
             }, status=400)
         
+        # Rules and the duplicate check compute with the amount and date, so
+        # parse them first; bad values get the model fields' messages
+        amount = Transaction._meta.get_field('amount').to_python(amount)
+        date = Transaction._meta.get_field('date').to_python(date)
+        
+        # Get category, or let the user's rules pick one (tracker.rules)
+        if category_id:
+            try:
+                category_id = Category.objects.for_user(request.user).values_list(
+                    'id', flat=True
+                ).get(id=category_id)
+            except Category.DoesNotExist:
+                return JsonResponse({
+                    'success': False,
+                    'errors': 'Invalid category'
+                }, status=400)
+        else:
+            category_id = rules.matcher_for(request.user).match(
+                transaction_type, payment_method, description, amount
+            )
+        
+        # Look for a likely duplicate (tracker.duplicates)
+        duplicate_of = None
+        if not request.POST.get('allow_duplicate'):
+            duplicate_of = duplicates.find(
+                request.user,
+                duplicates.fingerprint(transaction_type, amount, currency, payment_method, description),
+                date
+            )
+        if duplicate_of and settings.TRACKER_DUPLICATES == 'skip':
+            return JsonResponse({
+                'success': False,
+                'errors': 'This looks like a duplicate of an existing transaction',
+                'duplicate_of': str(duplicate_of)
+            }, status=409)
+        
         # Create transaction
-        transaction = Transaction.objects.create(
+        transaction = Transaction(
             user=request.user,
             transaction_type=transaction_type,
             amount=amount,
-            category=category,
+            currency=currency,
+            category_id=category_id,
             date=date,
             description=description or '',
             payment_method=payment_method
         )
+        result = {
+            'transaction_id': str(transaction.id),
+            'category_id': category_id and str(category_id),
+            'duplicate_of': duplicate_of and str(duplicate_of)
+        }
         
-        return JsonResponse({
-            'success': True,
-            'message': 'Transaction added successfully',
-            'transaction_id': str(transaction.id)
-        })
+        if settings.TRACKER_WRITE_QUEUE:
+            # Group commit (tracker.writequeue): a bad row must fail here,
+            # not in the writer's batch
+            transaction.clean_fields(exclude=['user', 'category'])
+            pending = writequeue.submit(transaction)
+            if request.headers.get('Prefer') != 'respond-async':
+                try:
+                    pending.result(timeout=settings.TRACKER_WRITE_QUEUE_TIMEOUT)
+                except concurrent.futures.TimeoutError:
+                    pass
+                else:
+                    return JsonResponse({'success': True, 'message': 'Transaction added successfully', **result})
+            writequeue.track(transaction)
+            return JsonResponse({
+                'success': True,
+                'message': 'Transaction queued',
+                'status_url': reverse('transaction_write_status', args=[transaction.id]),
+                **result
+            }, status=202)
+        
+        transaction.save()
+        
+        return JsonResponse({'success': True, 'message': 'Transaction added successfully', **result})
         
     except Exception as e:
         return JsonResponse({
@@ -435,6 +440,8 @@ def create_transaction(request):
 
 @login_required
 @require_POST
+@throttled
+@idempotent
 def create_category(request):
     """Create a new category via AJAX"""
     try:
@@ -450,8 +457,7 @@ def create_category(request):
             }, status=400)
         
         # Check for duplicate category
-        if Category.objects.filter(
-            user=request.user,
+        if Category.objects.for_user(request.user).filter(
             name=name,
             category_type=category_type
         ).exists():
@@ -460,8 +466,15 @@ def create_category(request):
                 'errors': 'Category already exists'
             }, status=400)
         
+        # A deleted category keeps its name in the unique index until it is
+        # compacted; reusing the name purges it now instead
+        Category.all_objects.for_user(request.user).deleted().filter(
+            name=name,
+            category_type=category_type
+        ).delete()
+        
         # Create category
-        category = Category.objects.create(
+        category = Category.objects.for_user(request.user).create(
             user=request.user,
             name=name,
             category_type=category_type,
@@ -486,13 +499,15 @@ def create_category(request):
 @require_GET
 def download_csv(request):
     """Download transactions as CSV"""
-    transactions = Transaction.objects.filter(user=request.user).order_by('-date')
+    import csv
+    
+    transactions = Transaction.objects.for_user(request.user).select_related('category').order_by('-date')
     
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
     
     writer = csv.writer(response)
-    writer.writerow(['Date', 'Type', 'Category', 'Description', 'Amount', 'Payment Method'])
+    writer.writerow(['Date', 'Type', 'Category', 'Description', 'Amount', 'Currency', 'Payment Method'])
     
     for transaction in transactions:
         writer.writerow([
@@ -501,49 +516,101 @@ def download_csv(request):
             transaction.category.name if transaction.category else '',
             transaction.description,
             transaction.amount,
+            transaction.currency.upper(),
             transaction.get_payment_method_display(),
         ])
     
+    # Older years live in the archive files
+    type_labels = dict(Transaction.TRANSACTION_TYPES)
+    payment_labels = dict(Transaction.PAYMENT_METHODS)
+    for row in iter_archived_rows(request.user):
+        writer.writerow([
+            row['date'],
+            type_labels.get(row['transaction_type'], row['transaction_type']),
+            row['category'],
+            row['description'],
+            row['amount'],
+            row['currency'].upper(),
+            payment_labels.get(row['payment_method'], row['payment_method']),
+        ])
+    
     return response
 
 
 # Helper Functions
-def create_default_categories(user):
-    """Create default categories for new user"""
-    default_categories = [
-        ('Food', 'expense', '🍔', 0),
-        ('Transport', 'expense', '🚗', 0),
-        ('Shopping', 'expense', '🛍️', 0),
-        ('Bills', 'expense', '📄', 0),
-        ('Entertainment', 'expense', '🎬', 0),
-        ('Other', 'expense', '📦', 0),
-
-        ('Salary', 'income', '💼', 0),
-        ('Freelance', 'income', '💻', 0),
-        ('Gifts', 'income', '🎁', 0),
-        ('Other Income', 'income', '💰', 0),
-    ]
+def filter_transactions(request, transactions):
+    """Apply the type/category/date filters from the query string"""
+    transaction_type = request.GET.get('type')
+    category_id = request.GET.get('category')
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    
+    if transaction_type and transaction_type != 'all':
+        transactions = transactions.filter(transaction_type=transaction_type)
+    
+    if category_id and category_id != 'all':
+        transactions = transactions.filter(category_id=category_id)
+    
+    if date_from:
+        transactions = transactions.filter(date__gte=date_from)
+    
+    if date_to:
+        transactions = transactions.filter(date__lte=date_to)
+    
+    return transactions
 
-    categories = []
-    for name, category_type, icon, budget in default_categories:
-        categories.append(Category(
-            user=user,
-            name=name,
-            category_type=category_type,
-            icon=icon,
-            monthly_budget=budget,
-            is_default=True
-        ))
 
-    Category.objects.bulk_create(categories)
+def transaction_rows(transactions, currency):
+    """
+    API rows for a transaction queryset, read with ``.values()`` (no model
+    instances) and converted into ``currency`` inside the query
+    """
+    payment_labels = dict(Transaction.PAYMENT_METHODS)
+    rows = transactions.annotate(converted_amount=converted_amount(currency)).values(
+        'id', 'date', 'transaction_type', 'category__name', 'description',
+        'amount', 'currency', 'converted_amount', 'payment_method'
+    )
+    for row in rows.iterator(chunk_size=2000):
+        yield {
+            'id': row['id'],
+            'date': row['date'],
+            'type': row['transaction_type'],
+            'category': row['category__name'] or '',
+            'description': row['description'],
+            'amount': row['amount'],
+            'currency': row['currency'],
+            'converted_amount': row['converted_amount'],
+            'payment_method': payment_labels.get(row['payment_method'], row['payment_method']),
+        }
+
 
 # REST API Views
+@login_required
+@require_GET
+def transaction_write_status(request, transaction_id):
+    """Whether a transaction accepted with 202 (see tracker.writequeue) has been written"""
+    entry = writequeue.status(request.user.pk, str(transaction_id))
+    if entry is not None and entry['status'] == 'failed':
+        return JsonResponse({'success': False, **entry})
+    # Checked before trusting "pending": the writer clears it after commit
+    if Transaction.all_objects.for_user(request.user).filter(id=transaction_id).exists():
+        return JsonResponse({'success': True, 'status': 'written'})
+    if entry is not None:
+        return JsonResponse({'success': True, **entry})
+    return JsonResponse({
+        'success': False,
+        'errors': 'Transaction not found'
+    }, status=404)
+
+
 @login_required
 @require_POST
+@throttled
+@idempotent
 def update_transaction(request, transaction_id):
     """Update an existing transaction"""
     try:
-        transaction = Transaction.objects.get(id=transaction_id, user=request.user)
+        transaction = Transaction.objects.for_user(request.user).get(id=transaction_id)
         
         # Parse form data
         transaction_type = request.POST.get('transaction-type')
@@ -552,24 +619,34 @@ def update_transaction(request, transaction_id):
         date = request.POST.get('date')
         description = request.POST.get('description')
         payment_method = request.POST.get('payment_method')
+        currency = request.POST.get('currency')
         
         # Update fields
         if transaction_type:
             transaction.transaction_type = transaction_type
+        # As in create_transaction: the fingerprint and the post_save
+        # handlers compute with these, so parse them before assigning
         if amount:
-            transaction.amount = amount
+            transaction.amount = Transaction._meta.get_field('amount').to_python(amount)
         if category_id:
             try:
-                category = Category.objects.get(id=category_id, user=request.user)
+                category = Category.objects.for_user(request.user).get(id=category_id)
                 transaction.category = category
             except Category.DoesNotExist:
                 pass
         if date:
-            transaction.date = date
+            transaction.date = Transaction._meta.get_field('date').to_python(date)
         if description is not None:
             transaction.description = description
         if payment_method:
             transaction.payment_method = payment_method
+        if currency:
+            if currency not in CURRENCY_SYMBOLS:
+                return JsonResponse({
+                    'success': False,
+                    'errors': 'Invalid currency'
+                }, status=400)
+            transaction.currency = currency
         
         transaction.save()
         
@@ -592,15 +669,18 @@ def update_transaction(request, transaction_id):
 
 @login_required
 @require_POST
+@throttled
+@idempotent
 def delete_transaction(request, transaction_id):
     """Delete a transaction"""
     try:
-        transaction = Transaction.objects.get(id=transaction_id, user=request.user)
-        transaction.delete()
+        transaction = Transaction.objects.for_user(request.user).get(id=transaction_id)
+        transaction.soft_delete()
         
         return JsonResponse({
             'success': True,
-            'message': 'Transaction deleted successfully'
+            'message': 'Transaction deleted successfully',
+            'undo_url': reverse('restore_transaction', args=[transaction.id])
         })
         
     except Transaction.DoesNotExist:
@@ -610,14 +690,38 @@ def delete_transaction(request, transaction_id):
         }, status=404)
 
 
+@login_required
+@require_POST
+@throttled
+@idempotent
+def restore_transaction(request, transaction_id):
+    """Undo a delete, until compact_deleted purges the transaction"""
+    try:
+        transaction = Transaction.all_objects.for_user(request.user).deleted().get(id=transaction_id)
+        transaction.restore()
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Transaction restored'
+        })
+        
+    except Transaction.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'errors': 'Transaction not found or can no longer be restored'
+        }, status=404)
+
+
 from decimal import Decimal, InvalidOperation
 
 @login_required
 @require_POST
+@throttled
+@idempotent
 def update_category(request, category_id):
     """Update category"""
     try:
-        category = Category.objects.get(id=category_id, user=request.user)
+        category = Category.objects.for_user(request.user).get(id=category_id)
 
         name = request.POST.get('name')
         category_type = request.POST.get('category-type')
@@ -651,6 +755,12 @@ def update_category(request, category_id):
         elif category.category_type != 'expense':
             category.monthly_budget = 0  # reset income budget
 
+        # As in create_category, a deleted category gives up its name
+        Category.all_objects.for_user(request.user).deleted().filter(
+            name=category.name,
+            category_type=category.category_type
+        ).delete()
+
         category.save()
         return JsonResponse({'success': True, 'message': 'Category updated successfully'})
 
@@ -661,10 +771,12 @@ def update_category(request, category_id):
 
 @login_required
 @require_POST
+@throttled
+@idempotent
 def delete_category(request, category_id):
     """Delete a category"""
     try:
-        category = Category.objects.get(id=category_id, user=request.user)
+        category = Category.objects.for_user(request.user).get(id=category_id)
         
         # Don't delete default categories
         if category.is_default:
@@ -673,11 +785,12 @@ def delete_category(request, category_id):
                 'errors': 'Cannot delete default categories'
             }, status=400)
         
-        category.delete()
+        category.soft_delete()
         
         return JsonResponse({
             'success': True,
-            'message': 'Category deleted successfully'
+            'message': 'Category deleted successfully',
+            'undo_url': reverse('restore_category', args=[category.id])
         })
         
     except Category.DoesNotExist:
@@ -686,58 +799,304 @@ def delete_category(request, category_id):
             'errors': 'Category not found'
         }, status=404)
 
+
+@login_required
+@require_POST
+@throttled
+@idempotent
+def restore_category(request, category_id):
+    """Undo a delete, until compact_deleted purges the category"""
+    try:
+        category = Category.all_objects.for_user(request.user).deleted().get(id=category_id)
+        category.restore()
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Category restored'
+        })
+        
+    except Category.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'errors': 'Category not found or can no longer be restored'
+        }, status=404)
+
 # REST API endpoints
 @login_required
 @require_GET
 def api_dashboard_summary(request):
     """API endpoint for dashboard data"""
-    today = timezone.now().date()
-    current_month = today.replace(day=1)
+    user_profile = get_user_profile(request.user)
+    
+    return serializers.JsonResponse(
+        month_totals(request.user, user_profile.currency, local_today(user_profile.timezone)),
+        request=request,
+        exact_decimals=serializers.wants_exact_decimals(request)
+    )
+
+
+@login_required
+@require_GET
+def api_recent_transactions(request):
+    """API endpoint for recent transactions"""
+    currency = get_user_profile(request.user).currency
+    transactions = Transaction.objects.for_user(request.user).order_by('-date', '-created_at')[:10]
     
-    monthly_transactions = Transaction.objects.filter(
-        user=request.user,
-        date__year=current_month.year,
-        date__month=current_month.month
+    return serializers.JsonResponse(
+        list(transaction_rows(transactions, currency)),
+        request=request,
+        safe=False,
+        exact_decimals=serializers.wants_exact_decimals(request)
+    )
+
+
+@login_required
+@require_GET
+def api_transactions(request):
+    """API endpoint listing every (filtered) transaction, streamed as a JSON array"""
+    currency = get_user_profile(request.user).currency
+    transactions = filter_transactions(
+        request,
+        Transaction.objects.for_user(request.user).order_by('-date', '-created_at')
     )
     
-    income = monthly_transactions.filter(transaction_type='income').aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0')
+    return serializers.StreamingJsonResponse(
+        transaction_rows(transactions, currency),
+        request=request,
+        exact_decimals=serializers.wants_exact_decimals(request)
+    )
+
+
+@login_required
+@require_GET
+def api_categories(request):
+    """API endpoint listing categories with this month's spend against budget"""
+    user_profile = get_user_profile(request.user)
+    rows = category_spending(
+        request.user, user_profile.currency, local_today(user_profile.timezone)
+    ).values(
+        'id', 'name', 'category_type', 'icon', 'is_default',
+        'monthly_budget', 'spent', 'remaining', 'percentage'
+    )
     
-    expenses = monthly_transactions.filter(transaction_type='expense').aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0')
+    return serializers.JsonResponse(
+        [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'type': row['category_type'],
+                'icon': row['icon'],
+                'is_default': row['is_default'],
+                'monthly_budget': row['monthly_budget'],
+                'spent': row['spent'],
+                'remaining': row['remaining'],
+                'percentage': None if row['percentage'] is None else round(row['percentage'], 1),
+            }
+            for row in rows
+        ],
+        request=request,
+        safe=False,
+        exact_decimals=serializers.wants_exact_decimals(request)
+    )
+
+
+@login_required
+@require_GET
+def api_rules(request):
+    """API endpoint listing the user's categorisation rules, in the order they are tried"""
+    rows = CategoryRule.objects.for_user(request.user).values(
+        'id', 'category_id', 'match_type', 'pattern', 'min_amount', 'max_amount',
+        'payment_method', 'priority', 'is_active'
+    )
     
-    balance = income - expenses
-    savings_rate = (balance / income * 100) if income > 0 else 0
+    return serializers.JsonResponse(
+        list(rows),
+        request=request,
+        safe=False,
+        exact_decimals=serializers.wants_exact_decimals(request)
+    )
+
+
+@login_required
+@require_POST
+@throttled
+@idempotent
+def create_rule(request):
+    """Create a categorisation rule via AJAX"""
+    try:
+        category_id = request.POST.get('category')
+        match_type = request.POST.get('match_type', 'contains')
+        pattern = request.POST.get('pattern', '').strip()
+        payment_method = request.POST.get('payment_method', '')
+        
+        if not category_id:
+            return JsonResponse({
+                'success': False,
+                'errors': 'Category is required'
+            }, status=400)
+        
+        try:
+            category = Category.objects.for_user(request.user).get(id=category_id)
+        except Category.DoesNotExist:
+            return JsonResponse({
+                'success': False,
+                'errors': 'Invalid category'
+            }, status=400)
+        
+        if payment_method and payment_method not in dict(Transaction.PAYMENT_METHODS):
+            return JsonResponse({
+                'success': False,
+                'errors': 'Invalid payment method'
+            }, status=400)
+        
+        try:
+            rules.validate_pattern(match_type, pattern)
+        except ValidationError as e:
+            return JsonResponse({
+                'success': False,
+                'errors': e.messages[0]
+            }, status=400)
+        
+        # The matcher compares with these, so parse them here; bad values get
+        # the model fields' messages
+        min_amount = CategoryRule._meta.get_field('min_amount').to_python(request.POST.get('min_amount') or None)
+        max_amount = CategoryRule._meta.get_field('max_amount').to_python(request.POST.get('max_amount') or None)
+        priority = CategoryRule._meta.get_field('priority').to_python(request.POST.get('priority') or 100)
+        
+        if priority < 0:
+            return JsonResponse({
+                'success': False,
+                'errors': 'Priority cannot be negative'
+            }, status=400)
+        
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            return JsonResponse({
+                'success': False,
+                'errors': 'Minimum amount cannot be more than the maximum amount'
+            }, status=400)
+        
+        rule = CategoryRule.objects.for_user(request.user).create(
+            user=request.user,
+            category=category,
+            match_type=match_type,
+            pattern=pattern,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            payment_method=payment_method,
+            priority=priority
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Rule added successfully',
+            'rule_id': rule.id
+        })
+        
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'errors': str(e)
+        }, status=400)
+
+
+@login_required
+@require_POST
+@throttled
+@idempotent
+def delete_rule(request, rule_id):
+    """Delete a categorisation rule"""
+    deleted, _ = CategoryRule.objects.for_user(request.user).filter(id=rule_id).delete()
+    if not deleted:
+        return JsonResponse({
+            'success': False,
+            'errors': 'Rule not found'
+        }, status=404)
     
     return JsonResponse({
-        'income': float(income),
-        'expenses': float(expenses),
-        'balance': float(balance),
-        'savings_rate': round(float(savings_rate), 1),
+        'success': True,
+        'message': 'Rule deleted successfully'
     })
 
 
 @login_required
 @require_GET
-def api_recent_transactions(request):
-    """API endpoint for recent transactions"""
-    transactions = Transaction.objects.filter(
-        user=request.user
-    ).select_related('category').order_by('-date', '-created_at')[:10]
-    
-    data = [
-        {
-            'id': str(t.id),
-            'date': t.date.strftime('%Y-%m-%d'),
-            'type': t.transaction_type,
-            'category': t.category.name if t.category else '',
-            'description': t.description,
-            'amount': float(t.amount),
-            'payment_method': t.get_payment_method_display(),
-        }
-        for t in transactions
-    ]
+def api_monthly_report(request):
+    """API endpoint for a single month's report, including archived months"""
+    try:
+        month_start = datetime.strptime(request.GET.get('month', ''), '%Y-%m').date()
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'errors': 'Expected month=YYYY-MM'
+        }, status=400)
+    
+    next_month = bounds(month_start, 'month')[1]
+    currency = get_user_profile(request.user).currency
+    
+    month_transactions = Transaction.objects.for_user(request.user).filter(
+        date__gte=month_start,
+        date__lt=next_month
+    )
+    
+    totals = {'income': Decimal('0'), 'expense': Decimal('0')}
+    for item in month_transactions.values('transaction_type').annotate(
+        total=converted_sum(currency)
+    ).order_by():
+        totals[item['transaction_type']] += item['total']
+    
+    categories = {}
+    for item in month_transactions.filter(transaction_type='expense').values('category__name').annotate(
+        total=converted_sum(currency)
+    ).order_by():
+        name = item['category__name'] or 'Uncategorized'
+        categories[name] = categories.get(name, Decimal('0')) + item['total']
+    
+    # Archived months are served from their pre-aggregated summary
+    summary = archived_month_totals(request.user, [month_start]).get(month_start)
+    if summary:
+        totals['income'] += convert(summary.income, summary.currency, currency, month_start)
+        totals['expense'] += convert(summary.expenses, summary.currency, currency, month_start)
+        for name, total in summary.category_totals.items():
+            categories[name] = categories.get(name, Decimal('0')) + convert(
+                total, summary.currency, currency, month_start
+            )
+    
+    return serializers.JsonResponse({
+        'month': month_start.strftime('%Y-%m'),
+        'income': totals['income'],
+        'expenses': totals['expense'],
+        'balance': totals['income'] - totals['expense'],
+        'archived': summary is not None,
+        'categories': [
+            {'name': name, 'total': total}
+            for name, total in sorted(categories.items(), key=lambda item: item[1], reverse=True)
+        ],
+    }, request=request, exact_decimals=serializers.wants_exact_decimals(request))
+
+
+async def event_stream(request):
+    """
+    Server-Sent Events stream of live dashboard updates (see tracker.events).
+    
+    Async so that an idle connection costs a coroutine and a queue instead
+    of a worker thread, which means it only streams under ASGI. Under WSGI
+    it answers 204, which tells EventSource not to reconnect; pages then
+    keep reloading after writes. login_required/require_GET only wrap sync
+    views on this Django version, hence the checks inline.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return JsonResponse({
+            'success': False,
+            'errors': 'Authentication required'
+        }, status=401)
     
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    response = StreamingHttpResponse(events.stream(request.user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+    return response
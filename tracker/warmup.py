@@ -0,0 +1,67 @@
+"""
+Start-up warm-up for web workers.
+
+A fresh worker otherwise pays on its first requests for locating and
+parsing templates, building the URL resolver and connecting to the
+databases. ``warm_up()`` does all three up front; it runs from
+``TrackerConfig.ready()`` when ``TRACKER_WARMUP`` is set and from
+``manage.py warmup``.
+"""
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+
+def tracker_template_names():
+    """Every template shipped in ``tracker/templates``, as loader names"""
+    root = Path(apps.get_app_config('tracker').path) / 'templates'
+    return sorted(
+        path.relative_to(root).as_posix()
+        for path in root.rglob('*')
+        if path.is_file() and path.suffix in ('.html', '.txt')
+    )
+
+
+def warm_templates():
+    """Parse tracker templates into each engine's cached loader"""
+    names = tracker_template_names()
+    for engine in engines.all():
+        for name in names:
+            engine.get_template(name)
+    return len(names)
+
+
+def warm_urls():
+    """Import every view module and build the resolve/reverse tables"""
+    # Populating the reverse table walks every (included) pattern
+    return len(get_resolver().reverse_dict)
+
+
+def warm_databases():
+    """Open a connection to every configured database"""
+    for alias in connections:
+        connections[alias].ensure_connection()
+    return len(connections.all())
+
+
+STEPS = (
+    ('templates', warm_templates),
+    ('urls', warm_urls),
+    ('databases', warm_databases),
+)
+
+
+def warm_up(skip=()):
+    """Run each warm-up step; returns ``{step: (count, seconds)}``"""
+    results = {}
+    for name, step in STEPS:
+        if name in skip:
+            continue
+        start = time.perf_counter()
+        count = step()
+        results[name] = (count, time.perf_counter() - start)
+    return results
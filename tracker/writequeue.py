@@ -0,0 +1,176 @@
+"""
+Group commit for ``create_transaction`` (``TRACKER_WRITE_QUEUE``).
+
+In autocommit mode every new transaction is its own SQLite write
+transaction: take the write lock, insert, sync the journal and database to
+disk, release. The syncs dominate, so a busy feed gets a few hundred rows a
+second no matter how cheap the insert is. With the queue on, the view
+validates the row and hands it to ``submit()``. One writer thread per
+process collects rows for up to ``TRACKER_WRITE_QUEUE_DELAY`` milliseconds
+(or ``TRACKER_WRITE_QUEUE_BATCH`` rows), inserts them with one
+``bulk_create`` per database, and commits once. ``post_save`` is sent for
+every row inside that transaction, so fragment versions and live updates
+behave as for ``save()``.
+
+``submit()`` returns a ``Future`` that resolves once the batch has
+committed. The view waits for it, so a 200 still means the row is on disk.
+A client that sends ``Prefer: respond-async`` gets 202 straight away, with
+the transaction id as its token and a status URL to poll. ``track()``
+records the row as pending in the default cache, and a failed row's error
+replaces that entry, so any worker can answer the poll as long as
+``CACHES`` is shared between workers. Rows are only in memory until their
+batch commits, so those rows are lost if the process dies first; their
+entry then reads pending until it expires after ``STATUS_TTL`` seconds.
+
+If a batch fails, its rows are retried one by one, so a bad row only fails
+itself.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+
+from .models import Transaction
+from .sharding import shard_for
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_KEY = 'tracker:writequeue:{}:{}'
+STATUS_TTL = 24 * 60 * 60
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Rows waiting for the writer thread, which is started on first use"""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, row):
+        """Queue an unsaved, validated ``Transaction``; returns a ``Future``"""
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='write-queue', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        self._queue.put((row, future))
+        return future
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + settings.TRACKER_WRITE_QUEUE_DELAY / 1000
+            stop = False
+            while len(batch) < settings.TRACKER_WRITE_QUEUE_BATCH:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self.write(batch)
+            except Exception as e:
+                logger.exception("Write queue batch of %d rows failed", len(batch))
+                for row, future in batch:
+                    if not future.done():
+                        self.resolve_failed(row, future, e)
+                connections.close_all()
+            if stop:
+                return
+
+    def write(self, batch):
+        by_alias = defaultdict(list)
+        for row, future in batch:
+            by_alias[shard_for(row.user_id)].append((row, future))
+
+        for alias, items in by_alias.items():
+            rows = [row for row, _ in items]
+            try:
+                with transaction.atomic(using=alias):
+                    Transaction.objects.using(alias).bulk_create(rows)
+                    for row in rows:
+                        post_save.send(Transaction, instance=row, created=True, update_fields=None, raw=False, using=alias)
+            except Exception:
+                logger.warning("Write queue batch of %d rows failed; retrying them one by one", len(rows), exc_info=True)
+                self.write_each(alias, items)
+            else:
+                self.resolve_written(items)
+
+    def write_each(self, alias, items):
+        written = []
+        for row, future in items:
+            row._state.adding, row._state.db = True, None
+            try:
+                with transaction.atomic(using=alias):
+                    row.save(force_insert=True, using=alias)
+            except Exception as e:
+                self.resolve_failed(row, future, e)
+            else:
+                written.append((row, future))
+        self.resolve_written(written)
+
+    def resolve_written(self, items):
+        for row, future in items:
+            future.set_result(row)
+        # Written rows are found in the database; one cache call per batch.
+        # The rows have committed either way, so a cache error is only logged
+        try:
+            cache.delete_many([status_key(row) for row, _ in items])
+        except Exception:
+            logger.warning("Could not clear the status of %d written rows", len(items), exc_info=True)
+
+    def resolve_failed(self, row, future, error):
+        future.set_exception(error)
+        try:
+            cache.set(status_key(row), {'status': 'failed', 'errors': str(error)}, STATUS_TTL)
+        except Exception:
+            logger.warning("Could not record the failure of queued row %s", row.pk, exc_info=True)
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+
+write_queue = WriteQueue()
+
+
+def status_key(row):
+    return STATUS_KEY.format(row.user_id, row.pk)
+
+
+def submit(row):
+    return write_queue.submit(row)
+
+
+def track(row):
+    """Record a submitted row as pending, for a client answered with 202"""
+    # add(), so an error recorded in the meantime is not overwritten
+    cache.add(status_key(row), {'status': 'pending'}, STATUS_TTL)
+
+
+def status(user_id, token):
+    """``{'status': 'pending'}``, ``{'status': 'failed', 'errors': ...}`` or ``None``"""
+    return cache.get(STATUS_KEY.format(user_id, token))